@@ -0,0 +1,577 @@
+# backend/aggregates.py
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from backend.dataset_index import INDEXED_COLUMNS
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Dimensiones por las que filtran /kpis y /grouped
+DIM_COLUMNS = {
+    "month":    "Order Date",
+    "customer": "Customer Name",
+    "product":  "Product Name",
+}
+DIMS = tuple(DIM_COLUMNS)
+
+# Agregados parciales aditivos guardados por celda del cubo
+MEASURES = ("sales", "sales_n", "profit", "quantity",
+            "discount", "discount_n", "ratio", "ratio_n", "rows")
+
+
+def month_key(month: str) -> int | None:
+    """
+    Clave entera de un mes "YYYY-MM" (año * 12 + mes - 1), o None si el
+    valor es un período de otra frecuencia ("2019", "2019-03-05"): como
+    la comparación con to_period("M") de los endpoints originales, no
+    coincide con ningún mes y el resultado queda vacío.
+    """
+    p = pd.Period(month)
+    if not isinstance(p.freq, pd.offsets.MonthEnd):
+        return None
+    return p.year * 12 + p.month - 1
+
+
+# -------------------------------------------------------------------
+# Cubo por versión del dataset
+# -------------------------------------------------------------------
+class SalesCube:
+    """
+    Agregados parciales de Sales, Profit, Quantity, Discount y de
+    Profit/Sales, indexados por (mes, cliente, producto) y opcionalmente
+    por un campo agrupable. Cada combinación de filtros se resuelve con
+    una búsqueda binaria sobre una tabla ya agregada ("rollup") en lugar
+    de recorrer las filas del dataset.
+    """
+
+    def __init__(self, snapshot):
+        self.version   = snapshot.version
+        self._snapshot = snapshot
+
+        # Códigos de cliente, producto y mes del índice del snapshot
+        index = snapshot.index
+        month = index.month()
+        self._month_min = index.month_min
+        cust_codes, self.customers = self._index_codes("Customer Name")
+        prod_codes, self.products  = self._index_codes("Product Name")
+
+        # Cada dimensión se guarda como código + 1 (0 = "todas" / NaN)
+        self._dim_values = {
+            "month":    month.codes + 1,
+            "customer": cust_codes.astype("int64") + 1,
+            "product":  prod_codes.astype("int64") + 1,
+        }
+        self._radix = {d: int(v.max()) + 2 if len(v) else 2 for d, v in self._dim_values.items()}
+
+        self._measures = self._build_measures(snapshot)
+        self._fields: dict[str, tuple[np.ndarray, pd.Index]] = {}
+        self._rollups: dict[tuple, tuple[np.ndarray, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_measures(snapshot, start: int = 0) -> pd.DataFrame:
+        """
+        Medidas por fila (sumas y conteos de no nulos) desde la fila `start`.
+        """
+        cols = ["Sales", "Profit", "Quantity", "Discount"]
+        df   = snapshot.select(cols)
+        if start:
+            df = df.iloc[start:].reset_index(drop=True)
+        # Las columnas ausentes se tratan como vacías; los endpoints ya
+        # validan las que necesitan antes de consultar el cubo.
+        for c in cols:
+            if c not in df.columns:
+                df[c] = pd.Series(np.nan, index=df.index, dtype="float64")
+
+        sales, profit = df["Sales"], df["Profit"]
+        ratio = profit / sales
+        return pd.DataFrame({
+            "sales":      sales.fillna(0),
+            "sales_n":    sales.notna().astype("int64"),
+            "profit":     profit.fillna(0),
+            "quantity":   df["Quantity"].fillna(0) if df["Quantity"].hasnans else df["Quantity"],
+            "discount":   df["Discount"].fillna(0),
+            "discount_n": df["Discount"].notna().astype("int64"),
+            "ratio":      ratio.fillna(0),
+            "ratio_n":    ratio.notna().astype("int64"),
+            "rows":       np.ones(len(df), dtype="int64"),
+        })
+
+    def _index_codes(self, name: str):
+        col = self._snapshot.index.column(name)
+        if col is None:
+            return np.full(len(self._snapshot), -1, dtype="int64"), pd.Index([])
+        return col.codes, col.levels
+
+    # ---------------------------------------------------------------
+    # Claves
+    # ---------------------------------------------------------------
+    def _filter_values(self, month, vendor, product) -> dict | None:
+        """
+        Traduce los filtros a códigos del cubo. Devuelve None si algún
+        valor no existe en el dataset (resultado vacío).
+        """
+        values = {}
+        if month:
+            key = month_key(month)
+            if key is None:
+                return None
+            k = key - self._month_min + 1
+            if k < 1 or k >= self._radix["month"]:
+                return None
+            values["month"] = k
+        for dim, value, index in (("customer", vendor, self.customers),
+                                  ("product",  product, self.products)):
+            if value != "Todos":
+                pos = index.get_indexer([value])[0]
+                if pos < 0:
+                    return None
+                values[dim] = pos + 1
+        return values
+
+    def _skey(self, dims: tuple, values: dict) -> np.ndarray | int:
+        key = 0
+        for d in DIMS:
+            key = key * self._radix[d] + (values[d] if d in dims else 0)
+        return key
+
+    def _field_codes(self, field: str):
+        if field not in self._fields:
+            col = self._snapshot.index.column(field) if field in INDEXED_COLUMNS else None
+            self._fields[field] = (col.codes, col.levels) if col is not None else self._snapshot.codes(field)
+        return self._fields[field]
+
+    def _rollup(self, dims: tuple, field: str | None):
+        """
+        Tabla agregada por las dimensiones `dims` (+ campo), ordenada por
+        clave. Se construye una vez por combinación y versión.
+        """
+        key = (dims, field)
+        table = self._rollups.get(key)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._rollups.get(key)
+            if table is not None:
+                return table
+
+            grouped = self._aggregate(dims, field)
+            table = (grouped["skey"].to_numpy(), grouped)
+            self._rollups[key] = table
+            return table
+
+    def _aggregate(self, dims: tuple, field: str | None, start: int = 0) -> pd.DataFrame:
+        """
+        Agrupa las filas desde `start` por la clave de `dims` (+ campo).
+        """
+        values = {d: v[start:] for d, v in self._dim_values.items()}
+        n      = len(self._measures) - start
+        skey   = self._skey(dims, values)
+        if isinstance(skey, int):
+            skey = np.zeros(n, dtype="int64")
+        by = {"skey": skey}
+        if field is not None:
+            by["field"] = np.asarray(self._field_codes(field)[0][start:])
+        measures = self._measures.iloc[start:].reset_index(drop=True) if start else self._measures
+        return (
+            measures
+            .groupby([pd.Series(v, name=k) for k, v in by.items()], sort=True)
+            .sum()
+            .reset_index()
+        )
+
+    def extend(self, snapshot) -> "SalesCube":
+        """
+        Cubo de un snapshot anexado a éste: las medidas y los códigos de
+        dimensión sólo se calculan para las filas nuevas y se concatenan a
+        los de éste (re-numerados a los códigos del snapshot nuevo); las
+        tablas ya agregadas se re-numeran igual y se suman con las de las
+        filas nuevas, sin volver a agrupar las filas viejas.
+        """
+        start = snapshot.base_rows
+        cube  = SalesCube.__new__(SalesCube)
+        cube.version   = snapshot.version
+        cube._snapshot = snapshot
+
+        index = snapshot.index
+        month = index.month()
+        cube._month_min = index.month_min
+        cust_codes, cube.customers = cube._index_codes("Customer Name")
+        prod_codes, cube.products  = cube._index_codes("Product Name")
+
+        remap = {
+            "month":    np.arange(self._radix["month"]) + (self._month_min - cube._month_min),
+            "customer": np.concatenate([[-1], cube.customers.get_indexer(self.customers)]) + 1,
+            "product":  np.concatenate([[-1], cube.products.get_indexer(self.products)]) + 1,
+        }
+        remap["month"][0] = 0
+        if (remap["customer"][1:] == 0).any() or (remap["product"][1:] == 0).any():
+            return SalesCube(snapshot)
+
+        tail = {
+            "month":    np.asarray(month.codes[start:], dtype="int64") + 1,
+            "customer": np.asarray(cust_codes[start:], dtype="int64") + 1,
+            "product":  np.asarray(prod_codes[start:], dtype="int64") + 1,
+        }
+        cube._dim_values, cube._radix = {}, {}
+        for d, old in self._dim_values.items():
+            top = int(remap[d][:self._radix[d] - 1].max())
+            cube._dim_values[d] = np.concatenate([remap[d][old], tail[d]])
+            cube._radix[d] = max(top, int(tail[d].max()) if len(tail[d]) else 0) + 2
+
+        cube._measures = pd.concat([self._measures, self._build_measures(snapshot, start)],
+                                   ignore_index=True)
+        cube._fields  = {}
+        cube._rollups = {}
+        cube._lock    = threading.Lock()
+
+        for (dims, field), (skeys, table) in list(self._rollups.items()):
+            parts = {}
+            for d in reversed(DIMS):
+                parts[d] = remap[d][skeys % self._radix[d]]
+                skeys    = skeys // self._radix[d]
+            old = table.copy()
+            old["skey"] = cube._skey(DIMS, parts)
+            if field is not None:
+                old_levels = self._fields[field][1]
+                fmap = cube._field_codes(field)[1].get_indexer(old_levels)
+                if (fmap < 0).any():
+                    continue
+                fcodes = old["field"].to_numpy("int64")
+                old["field"] = np.where(fcodes >= 0, fmap[np.maximum(fcodes, 0)], -1)
+            keys = ["skey"] if field is None else ["skey", "field"]
+            merged = (
+                pd.concat([old, cube._aggregate(dims, field, start)], ignore_index=True)
+                .groupby(keys, sort=True)
+                .sum()
+                .reset_index()
+            )
+            cube._rollups[(dims, field)] = (merged["skey"].to_numpy(), merged)
+        return cube
+
+    def _slice(self, dims: tuple, field: str | None, values: dict) -> pd.DataFrame:
+        skeys, table = self._rollup(dims, field)
+        q  = self._skey(dims, values)
+        lo = np.searchsorted(skeys, q, side="left")
+        hi = np.searchsorted(skeys, q, side="right")
+        return table.iloc[lo:hi]
+
+    # ---------------------------------------------------------------
+    # Consultas
+    # ---------------------------------------------------------------
+    def kpis(self, month=None, vendor="Todos", product="Todos") -> dict:
+        values = self._filter_values(month, vendor, product)
+        if values is None:
+            totals = dict.fromkeys(MEASURES, 0)
+        else:
+            part   = self._slice(tuple(values), None, values)
+            totals = {m: (part[m].iloc[0] if len(part) else 0) for m in MEASURES}
+
+        total_sales    = totals["sales"]
+        count          = int(totals["rows"])
+        avg_profit_pct = _mean(totals["ratio"], totals["ratio_n"]) if total_sales else 0
+        avg_sales      = _mean(totals["sales"], totals["sales_n"]) if count else 0
+        return {
+            "total_sales":    float(total_sales),
+            "avg_profit_pct": float(avg_profit_pct),
+            "sale_count":     count,
+            "avg_sales":      float(avg_sales),
+        }
+
+    def grouped(self, field: str, month=None, vendor="Todos", product="Todos") -> pd.DataFrame:
+        codes, uniques = self._field_codes(field)
+        values = self._filter_values(month, vendor, product)
+        if values is None:
+            part = self._rollup((), field)[1].iloc[0:0]
+        else:
+            part = self._slice(tuple(values), field, values)
+
+        fcodes = part["field"].to_numpy("int64")
+        group  = uniques.take(np.where(fcodes >= 0, fcodes, 0))
+        group  = pd.Series(group, dtype=object).where(fcodes >= 0, np.nan)
+
+        # NaN al final, como groupby(dropna=False)
+        order = np.argsort(np.where(fcodes >= 0, fcodes, np.iinfo("int64").max), kind="stable")
+        part  = part.iloc[order]
+        out = pd.DataFrame({
+            "group":          group.iloc[order].to_numpy(),
+            "total_sales":    part["sales"].to_numpy(),
+            "total_quantity": part["quantity"].to_numpy(),
+            "avg_discount":   _mean(part["discount"].to_numpy(), part["discount_n"].to_numpy()),
+            "total_profit":   part["profit"].to_numpy(),
+        })
+        return out.sort_values("total_sales", ascending=False)
+
+
+    def grouped_many(self, groupings, month=None, vendor="Todos", product="Todos",
+                     top: int | None = None) -> list[pd.DataFrame]:
+        """
+        Varias agrupaciones con los mismos filtros. Las de un solo campo
+        salen del mismo rollup del cubo que `grouped` (tabla idéntica, con
+        las mismas sumas). Para las de varios campos la máscara de filas se
+        calcula una vez y cada tabla sale de bincount sobre los códigos ya
+        factorizados de sus campos.
+        """
+        tables = []
+        rows = meas = None
+        for fields in groupings:
+            if len(fields) == 1:
+                out = self.grouped(fields[0], month=month, vendor=vendor, product=product)
+                tables.append(out if top is None else out.head(top))
+                continue
+            if meas is None:
+                rows, meas = self._selection(month, vendor, product)
+            n_sel = len(meas["sales"])
+
+            # Clave combinada; NaN usa el último código de cada campo para
+            # quedar al final, como groupby(dropna=False)
+            key, radix, uniques = np.zeros(n_sel, dtype="int64"), [], []
+            for f in fields:
+                codes, index = self._field_codes(f)
+                c = codes if rows is None else codes[rows]
+                key = key * (len(index) + 1) + np.where(c >= 0, c, len(index))
+                radix.append(len(index) + 1)
+                uniques.append(index)
+
+            space = int(np.prod(radix, dtype="float64"))
+            if space <= max(1 << 16, 4 * n_sel):
+                present = np.flatnonzero(np.bincount(key, minlength=space))
+                sums = {m: np.bincount(key, weights=v, minlength=space)[present]
+                        for m, v in meas.items()}
+            else:
+                present, inv = np.unique(key, return_inverse=True)
+                sums = {m: np.bincount(inv, weights=v, minlength=len(present))
+                        for m, v in meas.items()}
+
+            labels = []
+            for c, index in zip(np.unravel_index(present, radix), uniques):
+                g = pd.Series(index.take(np.where(c < len(index), c, 0)), dtype=object)
+                labels.append(g.where(c < len(index), np.nan).to_numpy())
+            group = list(map(list, zip(*labels)))
+
+            quantity = sums["quantity"]
+            if np.issubdtype(meas["quantity"].dtype, np.integer):
+                quantity = quantity.astype("int64")
+            out = pd.DataFrame({
+                "group":          group,
+                "total_sales":    sums["sales"],
+                "total_quantity": quantity,
+                "avg_discount":   _mean(sums["discount"], sums["discount_n"]),
+                "total_profit":   sums["profit"],
+            }).sort_values("total_sales", ascending=False)
+            tables.append(out if top is None else out.head(top))
+        return tables
+
+    def _selection(self, month, vendor, product) -> tuple[np.ndarray | None, dict]:
+        """
+        Filas que cumplen los filtros (intersección de los índices del
+        snapshot; None = todas) y sus medidas.
+        """
+        filters = {DIM_COLUMNS[d]: v for d, v in (("customer", vendor), ("product", product))
+                   if v != "Todos"}
+        key = month_key(month) if month else None
+        if month and key is None:
+            rows = np.empty(0, dtype="int64")
+        else:
+            rows = self._snapshot.index.rows(filters, key)
+
+        cols = ("sales", "quantity", "discount", "discount_n", "profit")
+        meas = {m: self._measures[m].to_numpy() for m in cols}
+        if rows is not None:
+            meas = {m: v[rows] for m, v in meas.items()}
+        return rows, meas
+
+
+def _mean(total, n):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.divide(total, n, dtype="float64") if np.ndim(n) else (total / n if n else np.nan)
+
+
+# -------------------------------------------------------------------
+# Ventas diarias por cliente (para /sales_trend)
+# -------------------------------------------------------------------
+TREND_MEMO_SIZE = 256
+
+
+class DailySales:
+    """
+    Ventas por (día, cliente) precalculadas como tres arrays paralelos
+    ordenados por día: sólo se guardan las combinaciones con ventas, así
+    el tamaño no depende de clientes × días. Cada consulta (año, mes,
+    cliente) corta el rango de días con búsqueda binaria y el resultado
+    se memoiza en un LRU propio de esta versión del dataset.
+    """
+
+    def __init__(self, snapshot, start: int = 0):
+        self.version = snapshot.version
+
+        df    = snapshot.select(["Order Date", "Sales"]).iloc[start:]
+        dates = pd.to_datetime(df["Order Date"], errors="coerce")
+        customers = snapshot.index.column("Customer Name")
+        if customers is None:
+            raise KeyError("Customer Name")
+        codes, self.customers = customers.codes[start:].astype("int64"), customers.levels
+
+        # groupby descarta las filas con fecha o cliente nulos
+        valid = dates.notna().to_numpy() & (codes >= 0)
+        self.day, self.customer, self.sales = _sum_daily(
+            dates.to_numpy()[valid].astype("datetime64[D]").astype("int64"),
+            codes[valid],
+            df["Sales"].to_numpy()[valid],
+        )
+
+        self._memo: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extend(self, snapshot) -> "DailySales":
+        """
+        Series de un snapshot anexado a éste: sólo se agregan las filas
+        nuevas y se suman con las ya agregadas (clientes re-numerados).
+        """
+        daily = DailySales(snapshot, start=snapshot.base_rows)
+        remap = daily.customers.get_indexer(self.customers)
+        if (remap < 0).any():
+            return DailySales(snapshot)
+        daily.day, daily.customer, daily.sales = _sum_daily(
+            np.concatenate([self.day, daily.day]),
+            np.concatenate([remap[self.customer], daily.customer]),
+            np.concatenate([self.sales, daily.sales]),
+        )
+        return daily
+
+    def trend(self, year: int, month: str | None = None, vendor: str = "Todos",
+              fmt: str = "dense", top: int | None = None) -> dict:
+        key = (year, month, vendor, fmt, top)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        result = self._compute(year, month, vendor, fmt, top)
+
+        with self._lock:
+            self._memo[key] = result
+            if len(self._memo) > TREND_MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result
+
+    def _compute(self, year, month, vendor, fmt, top) -> dict:
+        if month:
+            periodo = pd.Period(month)
+            labels  = [f"{month}-{d:02d}" for d in range(1, periodo.days_in_month + 1)]
+            start   = _epoch_day(periodo.start_time)
+            stop    = start + periodo.days_in_month
+            if periodo.year != year:
+                stop = start
+        else:
+            labels = [f"{year}-{m:02d}" for m in range(1, 13)]
+            start  = _epoch_day(pd.Timestamp(year=year, month=1, day=1))
+            stop   = _epoch_day(pd.Timestamp(year=year + 1, month=1, day=1))
+
+        lo, hi = np.searchsorted(self.day, [start, stop])
+        day, cust, sales = self.day[lo:hi], self.customer[lo:hi], self.sales[lo:hi]
+
+        if vendor != "Todos":
+            code = self.customers.get_indexer([vendor])[0]
+            keep = cust == code
+            day, cust, sales = day[keep], cust[keep], sales[keep]
+
+        # Columna de cada punto: día del mes (0..30) o mes del año (0..11)
+        if month:
+            bucket = day - start
+        else:
+            bucket = day.astype("datetime64[D]").astype("datetime64[M]").astype("int64") % 12
+
+        vendors, row = np.unique(cust, return_inverse=True)
+        if top is not None and len(vendors) > top:
+            totals = np.bincount(row, weights=sales, minlength=len(vendors))
+            chosen = np.argsort(-totals, kind="stable")[:top]
+            remap  = np.full(len(vendors), -1)
+            remap[chosen] = np.arange(len(chosen))
+            row    = remap[row]
+            keep   = row >= 0
+            vendors, row, bucket, sales = vendors[chosen], row[keep], bucket[keep], sales[keep]
+
+        names = self.customers.take(vendors).tolist()
+
+        if fmt == "sparse":
+            width = len(labels)
+            flat, inv = np.unique(row * width + bucket, return_inverse=True)
+            values = np.bincount(inv, weights=sales, minlength=len(flat))
+            return {
+                "labels":  labels,
+                "vendors": names,
+                "points":  [[int(v), int(b), float(x)]
+                            for v, b, x in zip(flat // width, flat % width, values)],
+            }
+
+        # Formato denso original: en vista mensual sólo las columnas de los
+        # días con ventas; en vista anual los 12 meses.
+        cols   = np.unique(bucket) if month else np.arange(12)
+        matrix = np.zeros((len(vendors), len(cols)), dtype=self.sales.dtype)
+        np.add.at(matrix, (row, np.searchsorted(cols, bucket)), sales)
+        return {
+            "labels":   labels,
+            "datasets": [{"vendor": v, "values": vals}
+                         for v, vals in zip(names, matrix.tolist())],
+        }
+
+
+def _sum_daily(day, customer, sales) -> tuple:
+    daily = (
+        pd.DataFrame({"day": day, "customer": customer, "sales": sales})
+        .groupby(["day", "customer"], sort=True)["sales"]
+        .sum()
+    )
+    return (daily.index.get_level_values("day").to_numpy(),
+            daily.index.get_level_values("customer").to_numpy(),
+            daily.to_numpy())
+
+
+def _epoch_day(ts: pd.Timestamp) -> int:
+    return int(np.datetime64(ts.to_datetime64(), "D").astype("int64"))
+
+
+# -------------------------------------------------------------------
+# Estructuras vigentes (una por versión del dataset)
+# -------------------------------------------------------------------
+_current_lock = threading.Lock()
+_current: dict[type, object] = {}
+
+
+def _for_snapshot(cls, snapshot):
+    obj = _current.get(cls)
+    if obj is not None and obj.version == snapshot.version:
+        return obj
+    with _current_lock:
+        obj = _current.get(cls)
+        if obj is None or obj.version != snapshot.version:
+            # Snapshot anexado al vigente: se extiende en lugar de rehacer
+            if obj is not None and obj.version == snapshot.parent_version:
+                obj = obj.extend(snapshot)
+            else:
+                obj = cls(snapshot)
+            _current[cls] = obj
+        return obj
+
+
+def get_cube(snapshot) -> SalesCube:
+    """
+    Cubo del snapshot dado; se reconstruye sólo cuando cambia la versión.
+    """
+    return _for_snapshot(SalesCube, snapshot)
+
+
+def get_daily_sales(snapshot) -> DailySales:
+    """
+    Ventas diarias por cliente del snapshot dado (una vez por versión).
+    """
+    return _for_snapshot(DailySales, snapshot)
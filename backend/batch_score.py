@@ -0,0 +1,457 @@
+# backend/batch_score.py
+#
+# Puntuación offline de archivos grandes, sin pasar por la API. Usa la
+# misma lógica de features y codificación que los endpoints:
+#   - rows:   filas de pedidos crudas → best_xgb_model.pkl (como /predict_csv)
+#   - fields: columnas region, product_name, sub_category, order_date →
+#             model_Profit.pkl / model_Quantity.pkl (como /predict/by_fields)
+#   - --grid: todas las combinaciones producto × región × fecha del dataset
+#             vigente en un rango de fechas, puntuadas como en `fields`
+#
+#   python -m backend.batch_score pedidos.csv --output preds.parquet
+#   python -m backend.batch_score grilla.csv --mode fields --models profit quantity --output out.csv
+#   python -m backend.batch_score --grid 2024-01-01:2024-12-31 --output grilla.parquet --workers 8
+#
+# La entrada se corta en bloques de --chunk-rows filas que reparte un pool
+# de procesos; cada worker carga los modelos una sola vez. Cada bloque
+# terminado queda en <output>.parts/ y, si la corrida se corta, volver a
+# correr el mismo comando puntúa sólo los bloques que faltan.
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from backend.dataset import dataset_manager
+from backend.feature_engineering import BATCH_COLUMNS, TRAIN_CSV, build_features_batch, get_stats_index
+from backend.inference import INFERENCE_CORES, thread_budget
+from backend.lazy import lazy_import
+from backend.model_registry import registry
+from backend.model_utils import iter_chunk_predictions, load_predictor
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# Filas por bloque: cada bloque es una tarea del pool y un archivo parcial
+BATCH_CHUNK_ROWS = int(os.environ.get("BATCH_CHUNK_ROWS", 100_000))
+# Procesos del pool (por defecto, uno por núcleo; 0 = en este proceso)
+BATCH_WORKERS    = int(os.environ.get("BATCH_WORKERS", INFERENCE_CORES))
+
+FIELD_MODELS = ("profit", "quantity")
+
+
+# -------------------------------------------------------------------
+# Plan: bloques de cada entrada
+# -------------------------------------------------------------------
+def plan_csv(path: Path, chunk_rows: int) -> tuple[bytes, list[tuple]]:
+    """
+    Recorre el CSV una vez, sin parsearlo, y lo corta en bloques de
+    `chunk_rows` filas: (byte inicial, byte final, primera fila, filas).
+    Sólo corta en saltos de línea fuera de comillas, así que un campo
+    entrecomillado con saltos de línea queda entero en su bloque.
+    Devuelve también la línea de encabezado, que cada bloque antepone.
+    """
+    chunks = []
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = pos = len(header)
+        row = rows = 0
+        quoted = False
+        for line in f:
+            pos += len(line)
+            if line.count(b'"') % 2:
+                quoted = not quoted
+            if quoted or not line.strip():
+                continue
+            rows += 1
+            if rows == chunk_rows:
+                chunks.append((start, pos, row, rows))
+                start, row, rows = pos, row + rows, 0
+        if rows:
+            chunks.append((start, pos, row, rows))
+    return header, chunks
+
+
+def grid_axes(dates: str) -> dict:
+    """
+    Ejes de la grilla producto × región × fecha: los productos (cada uno
+    con su sub-categoría más frecuente) y las regiones del dataset vigente,
+    y los días del rango "AAAA-MM-DD:AAAA-MM-DD".
+    """
+    try:
+        first, last = dates.split(":")
+        days = pd.date_range(first, last, freq="D")
+    except ValueError as e:
+        raise ValueError(f"Rango de fechas inválido {dates!r} (se espera AAAA-MM-DD:AAAA-MM-DD): {e}")
+
+    cols     = ["Region", "Sub-Category", "Product Name"]
+    snapshot = dataset_manager.current()
+    if snapshot is not None:
+        df = snapshot.select(cols)
+    elif TRAIN_CSV.is_file():
+        df = pd.read_csv(TRAIN_CSV, encoding="latin1", usecols=cols)
+    else:
+        raise FileNotFoundError("No hay dataset publicado ni CSV de entrenamiento para armar la grilla.")
+    df = df.dropna()
+
+    pairs = (df.groupby(["Product Name", "Sub-Category"], observed=True).size()
+               .reset_index(name="n")
+               .sort_values(["n", "Sub-Category"], ascending=[False, True], kind="stable")
+               .drop_duplicates("Product Name")
+               .sort_values("Product Name"))
+    return {
+        "products":      pairs["Product Name"].astype(str).tolist(),
+        "subcategories": pairs["Sub-Category"].astype(str).tolist(),
+        "regions":       sorted(df["Region"].astype(str).unique().tolist()),
+        "dates":         days.strftime("%Y-%m-%d").tolist(),
+    }
+
+
+def grid_size(axes: dict) -> int:
+    return len(axes["products"]) * len(axes["regions"]) * len(axes["dates"])
+
+
+def _grid_frame(axes: dict, lo: int, hi: int) -> pd.DataFrame:
+    # Fila i de la grilla: producto i // (R·D), región (i // D) % R, fecha i % D
+    n_regions, n_dates = len(axes["regions"]), len(axes["dates"])
+    idx = np.arange(lo, hi)
+    p   = idx // (n_regions * n_dates)
+    return pd.DataFrame({
+        "region":       np.asarray(axes["regions"], dtype=object)[(idx // n_dates) % n_regions],
+        "product_name": np.asarray(axes["products"], dtype=object)[p],
+        "sub_category": np.asarray(axes["subcategories"], dtype=object)[p],
+        "order_date":   np.asarray(axes["dates"], dtype=object)[idx % n_dates],
+    })
+
+
+# -------------------------------------------------------------------
+# Worker: estado por proceso y puntuación de un bloque
+# -------------------------------------------------------------------
+_worker: dict = {}
+
+
+def _init_worker(mode: str, models: list[str], threads: int, axes: dict | None):
+    """
+    Inicializador de cada proceso del pool: reparte los hilos de XGBoost y
+    carga una sola vez los modelos y el índice de estadísticos (con fork
+    ya vienen cargados del proceso padre).
+    """
+    thread_budget.total = max(1, threads)
+    _worker.update(mode=mode, models=models, axes=axes)
+    if mode == "rows":
+        load_predictor()
+    else:
+        for name in models:
+            registry.predictor(name)
+        get_stats_index()
+
+
+def _init_pool_worker(*args):
+    # Ctrl+C llega a todo el grupo de procesos: lo atiende sólo el padre
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_worker(*args)
+
+
+def _read_chunk(task: dict) -> pd.DataFrame:
+    if task["path"] is None:
+        return _grid_frame(_worker["axes"], task["row"], task["row"] + task["rows"])
+    with open(task["path"], "rb") as f:
+        f.seek(task["start"])
+        data = f.read(task["end"] - task["start"])
+    dtype = str if _worker["mode"] == "fields" else None
+    return pd.read_csv(io.BytesIO(task["header"] + data), encoding="latin1", dtype=dtype)
+
+
+def score_frame(df: pd.DataFrame, mode: str, models: list[str], keep: list[str] = ()) -> pd.DataFrame:
+    """
+    Predicciones de un bloque con las columnas de `keep` (como texto).
+    En `rows` se codifica sin drop_first, como /predict_csv en streaming:
+    cada fila da lo mismo sea cual sea el tamaño de bloque. En `fields`
+    hay una columna pred_<modelo> por modelo.
+    """
+    out = pd.DataFrame({col: df[col].astype("string") for col in keep}, index=df.index)
+    if mode == "rows":
+        ((_, _, preds, error),) = iter_chunk_predictions([df], load_predictor())
+        if error is not None:
+            raise ValueError(error)
+        out["prediction"] = preds
+    else:
+        for name in models:
+            X = build_features_batch(df, model_type=name)
+            out[f"pred_{name}"] = registry.predictor(name).predict(X)
+    return out
+
+
+def _write_part(df: pd.DataFrame, path: Path):
+    tmp = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _score_chunk(task: dict) -> dict:
+    t0  = time.perf_counter()
+    df  = _read_chunk(task)
+    out = score_frame(df, _worker["mode"], _worker["models"], task["keep"])
+    out.insert(0, "row", np.arange(task["row"], task["row"] + len(out), dtype="int64"))
+    if task["source"] is not None:
+        out.insert(0, "source", task["source"])
+    _write_part(out, Path(task["part"]))
+    return {"id": task["id"], "rows": len(out), "seconds": time.perf_counter() - t0}
+
+
+# -------------------------------------------------------------------
+# Checkpoint y armado de la salida
+# -------------------------------------------------------------------
+def _load_manifest(parts_dir: Path, config: dict, restart: bool):
+    manifest = parts_dir / "manifest.json"
+    if restart and parts_dir.exists():
+        shutil.rmtree(parts_dir)
+    if manifest.is_file():
+        saved = json.loads(manifest.read_text())
+        if saved != config:
+            raise ValueError(f"{parts_dir} es de una corrida con otra configuración "
+                             f"(entradas, modelos o bloques distintos); usar --restart para descartarla.")
+        return
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    tmp = manifest.with_name("manifest.json.tmp")
+    tmp.write_text(json.dumps(config, indent=2))
+    os.replace(tmp, manifest)
+
+
+def assemble(parts: list[Path], output: Path):
+    """
+    Une los archivos parciales, en orden, en `output` (CSV con un único
+    encabezado o Parquet con un row group por parte).
+    """
+    tmp = output.with_name(output.name + ".tmp")
+    if output.suffix == ".parquet":
+        pq = lazy_import("pyarrow.parquet")
+        writer = None
+        try:
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(tmp, "wb") as out:
+            for i, part in enumerate(parts):
+                with open(part, "rb") as f:
+                    if i:
+                        f.readline()
+                    shutil.copyfileobj(f, out, 1 << 20)
+    os.replace(tmp, output)
+
+
+# -------------------------------------------------------------------
+# Corrida completa
+# -------------------------------------------------------------------
+def _log(message: str):
+    print(f"[batch_score] {message}", file=sys.stderr, flush=True)
+
+
+def run(inputs: list[Path], output: Path, mode: str = "rows", models: list[str] = FIELD_MODELS,
+        grid: str | None = None, keep: list[str] = (), workers: int = BATCH_WORKERS,
+        threads: int | None = None, chunk_rows: int = BATCH_CHUNK_ROWS,
+        restart: bool = False, keep_parts: bool = False) -> dict:
+    """
+    Puntúa `inputs` (o la grilla `grid`) y escribe `output`. Lanza
+    ValueError / FileNotFoundError ante una configuración inválida y
+    RuntimeError si algún bloque falló: los bloques terminados quedan
+    guardados y la próxima corrida reintenta sólo los que faltan.
+    """
+    if grid is not None:
+        mode = "fields"
+    models  = ["xgb"] if mode == "rows" else list(models)
+    unknown = [m for m in models if mode == "fields" and m not in FIELD_MODELS]
+    if unknown:
+        raise ValueError(f"Modelos desconocidos: {unknown} (se esperan {list(FIELD_MODELS)})")
+    if output.suffix == ".parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("Para escribir Parquet hace falta pyarrow.")
+    workers = max(0, workers)
+    threads = threads or max(1, INFERENCE_CORES // max(1, workers))
+    keep    = list(keep) or (list(BATCH_COLUMNS) if mode == "fields" else [])
+
+    # Modelos y estadísticos en el proceso padre: fija sus versiones para
+    # el checkpoint y, con fork, los workers los heredan ya cargados
+    t0 = time.perf_counter()
+    versions = {name: registry.get(name).version for name in models}
+    for name in models:
+        registry.predictor(name)
+    stats = get_stats_index().source_hash if mode == "fields" else None
+
+    # Plan de bloques
+    parts_dir = output.with_name(output.name + ".parts")
+    ext       = ".parquet" if output.suffix == ".parquet" else ".csv"
+    tasks, axes = [], None
+    if grid is not None:
+        axes  = grid_axes(grid)
+        total = grid_size(axes)
+        for i, lo in enumerate(range(0, total, chunk_rows)):
+            tasks.append({"path": None, "source": None, "row": lo, "rows": min(chunk_rows, total - lo),
+                          "part": str(parts_dir / f"part-000-{i:06d}{ext}")})
+        sources = {"grid": grid, "products": len(axes["products"]), "regions": len(axes["regions"])}
+    else:
+        sources = []
+        for f_idx, path in enumerate(inputs):
+            path = path.resolve()
+            if not path.is_file():
+                raise FileNotFoundError(f"No encontré el archivo CSV en la ruta: {path}")
+            header, chunks = plan_csv(path, chunk_rows)
+            columns = pd.read_csv(io.BytesIO(header), encoding="latin1", nrows=0).columns
+            missing = [c for c in keep + (list(BATCH_COLUMNS) if mode == "fields" else []) if c not in columns]
+            if missing:
+                raise ValueError(f"{path.name}: faltan columnas {sorted(set(missing))}")
+            for i, (start, end, row, rows) in enumerate(chunks):
+                tasks.append({"path": str(path), "header": header, "start": start, "end": end,
+                              "source": path.name if len(inputs) > 1 else None, "row": row, "rows": rows,
+                              "part": str(parts_dir / f"part-{f_idx:03d}-{i:06d}{ext}")})
+            st = path.stat()
+            sources.append({"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    if not tasks:
+        raise ValueError("No hay filas para puntuar.")
+    for i, task in enumerate(tasks):
+        task["id"], task["keep"] = i, keep
+
+    config = {"mode": mode, "models": versions, "stats": stats, "inputs": sources,
+              "chunk_rows": chunk_rows, "keep": keep, "format": ext}
+    _load_manifest(parts_dir, config, restart)
+    pending = [t for t in tasks if not Path(t["part"]).is_file()]
+    resumed = len(tasks) - len(pending)
+    total_rows = sum(t["rows"] for t in tasks)
+    _log(f"{total_rows:,} filas en {len(tasks)} bloques ({resumed} ya hechos), "
+         f"{workers or 'sin'} workers × {threads} hilos; preparación {time.perf_counter() - t0:.1f}s")
+
+    # Puntuación
+    t1, scored, completed, failed = time.perf_counter(), 0, resumed, []
+
+    def report(task, result=None, error=None):
+        nonlocal scored, completed
+        completed += 1
+        if error is not None:
+            failed.append(task["id"])
+            _log(f"bloque {task['id']} (filas {task['row']}–{task['row'] + task['rows'] - 1}) falló: {error}")
+            return
+        scored += result["rows"]
+        _log(f"{completed}/{len(tasks)} bloques · {scored:,} filas · "
+             f"{scored / (time.perf_counter() - t1):,.0f} filas/s")
+
+    if workers == 0:
+        _init_worker(mode, models, threads, axes)
+        for task in pending:
+            try:
+                result = _score_chunk(task)
+            except Exception as e:
+                report(task, error=f"{type(e).__name__}: {e}")
+                continue
+            report(task, result)
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_pool_worker,
+                                   initargs=(mode, models, threads, axes))
+        try:
+            futures = {pool.submit(_score_chunk, task): task for task in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report(futures[future], error=f"{type(e).__name__}: {e}")
+                    continue
+                report(futures[future], result)
+        except KeyboardInterrupt:
+            # Los bloques en curso terminan y se guardan; el resto se cancela
+            _log(f"interrumpido: esperando los bloques en curso; lo hecho queda en {parts_dir}")
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown()
+    seconds = time.perf_counter() - t1
+
+    if failed:
+        raise RuntimeError(f"Fallaron {len(failed)} bloques; los terminados quedaron en {parts_dir}. "
+                           f"Volver a correr el mismo comando reintenta sólo los que faltan.")
+
+    t2 = time.perf_counter()
+    assemble([Path(t["part"]) for t in tasks], output)
+    if not keep_parts:
+        shutil.rmtree(parts_dir)
+    return {
+        "output":         str(output),
+        "rows":           total_rows,
+        "chunks":         len(tasks),
+        "resumed_chunks": resumed,
+        "scored_rows":    scored,
+        "workers":        workers,
+        "threads":        threads,
+        "seconds":        seconds,
+        "rows_per_s":     scored / seconds if seconds > 0 else None,
+        "assemble_s":     time.perf_counter() - t2,
+    }
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación offline de CSV grandes en paralelo")
+    parser.add_argument("inputs", nargs="*", type=Path, help="CSV de entrada (uno o más)")
+    parser.add_argument("--output", "-o", type=Path, required=True,
+                        help="Archivo de salida (.csv o .parquet)")
+    parser.add_argument("--mode", choices=("rows", "fields"), default="rows",
+                        help="rows: pedidos crudos (modelo XGBoost); fields: region/product_name/"
+                             "sub_category/order_date (modelos profit/quantity)")
+    parser.add_argument("--models", nargs="+", choices=FIELD_MODELS, default=list(FIELD_MODELS),
+                        help="Modelos a aplicar en modo fields")
+    parser.add_argument("--grid", metavar="DESDE:HASTA",
+                        help="Puntuar la grilla producto × región × fecha del dataset vigente")
+    parser.add_argument("--keep", nargs="+", default=[], metavar="COLUMNA",
+                        help="Columnas de entrada que se copian a la salida")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help="Procesos del pool (0 = en este proceso)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Hilos de XGBoost por worker (por defecto, núcleos / workers)")
+    parser.add_argument("--chunk-rows", type=int, default=BATCH_CHUNK_ROWS)
+    parser.add_argument("--restart", action="store_true",
+                        help="Descartar los bloques de una corrida anterior y empezar de cero")
+    parser.add_argument("--keep-parts", action="store_true",
+                        help="No borrar <output>.parts/ al terminar")
+    args = parser.parse_args(argv)
+    if bool(args.inputs) == bool(args.grid):
+        parser.error("Indicar archivos de entrada o --grid (uno de los dos).")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows debe ser al menos 1.")
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        result = run(args.inputs, args.output, args.mode, args.models, args.grid, args.keep,
+                     args.workers, args.threads, args.chunk_rows, args.restart, args.keep_parts)
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        sys.exit(f"[batch_score] {e}")
+    except KeyboardInterrupt:
+        _log("volver a correr el mismo comando retoma desde los bloques que faltan")
+        sys.exit(130)
+    print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}))
+
+
+if __name__ == "__main__":
+    main()
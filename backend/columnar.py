@@ -0,0 +1,252 @@
+# backend/columnar.py
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# -------------------------------------------------------------------
+# Formato en disco
+# -------------------------------------------------------------------
+# <cache_dir>/<sha256 del CSV>/
+#     meta.json         columnas, tipo de cada una y categorías
+#     c<i>.npy          valores (numéricos / fechas) o códigos (texto)
+#     c<i>.<extra>.npy  arrays derivados de la columna (p.ej. el orden del
+#                       índice), escritos por el primer proceso que los pide
+#
+# Los .npy se abren con mmap_mode="r": varios workers comparten las mismas
+# páginas a través de la caché de páginas del sistema operativo y sólo se
+# leen del disco las columnas que se usan.
+FORMAT_VERSION = 1
+
+
+def _codes_dtype(n_levels: int):
+    return np.int16 if n_levels < 2**15 else np.int32
+
+
+def _column_entry(tmp: Path, file: str, col: str, s: pd.Series) -> dict:
+    if isinstance(s.dtype, pd.CategoricalDtype) or s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+        kind = "category" if isinstance(s.dtype, pd.CategoricalDtype) else "text"
+        cat  = s.array if kind == "category" else pd.Categorical(s)
+        np.save(tmp / file, np.asarray(cat.codes).astype(_codes_dtype(len(cat.categories))))
+        return {"name": col, "kind": kind, "file": file, "categories": cat.categories.tolist()}
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        np.save(tmp / file, s.to_numpy(dtype="datetime64[ns]"))
+        return {"name": col, "kind": "datetime", "file": file}
+    np.save(tmp / file, s.to_numpy())
+    return {"name": col, "kind": "numeric", "file": file}
+
+
+def _write_dir(target: Path, fill) -> Path:
+    """
+    Escribe la caché en un directorio temporal con fill(tmp) y la renombra
+    al final, así otro proceso nunca ve una caché a medio escribir.
+    """
+    target = Path(target)
+    tmp    = target.parent / f".{target.name}.{uuid.uuid4().hex}.tmp"
+    tmp.mkdir(parents=True)
+    try:
+        meta = fill(tmp)
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Otro proceso publicó la misma caché antes: nos quedamos con esa
+            if not (target / "meta.json").is_file():
+                raise
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def write_columnar(df: pd.DataFrame, target: Path, content_hash: str) -> Path:
+    """
+    Guarda un DataFrame ya parseado como columnas .npy + meta.json.
+    """
+    def fill(tmp):
+        columns = [_column_entry(tmp, f"c{i}.npy", col, df[col]) for i, col in enumerate(df.columns)]
+        return {"format": FORMAT_VERSION, "content_hash": content_hash,
+                "n_rows": len(df), "columns": columns}
+    return _write_dir(target, fill)
+
+
+def append_columnar(base: "ColumnarDataset", delta: pd.DataFrame, target: Path,
+                    content_hash: str) -> Path:
+    """
+    Nueva caché con las filas de `base` seguidas de las de `delta`, sin
+    volver a parsear el CSV base: los arrays se copian tal cual y sólo se
+    re-numeran los códigos de texto cuando el delta trae valores nuevos
+    (las categorías siguen ordenadas, como si se hubiera parseado todo).
+    meta.json guarda el hash del padre y sus filas, así las estructuras
+    derivadas pueden actualizarse en lugar de recalcularse.
+    """
+    unknown = [c for c in delta.columns if c not in base.columns]
+    if unknown:
+        raise ValueError(f"Columnas que no existen en el dataset vigente: {unknown}")
+    n_delta = len(delta)
+
+    def fill(tmp):
+        columns = []
+        for col in base.columns:
+            meta = dict(base._meta[col])
+            old  = base.array(col)
+            s    = delta[col] if col in delta.columns else pd.Series([None] * n_delta, dtype=object)
+            if meta["kind"] in ("category", "text"):
+                old_levels    = pd.Index(meta["categories"])
+                values        = pd.Series(s, dtype=object).to_numpy()
+                levels, remap = merged_levels(old_levels, values)
+                dtype         = _codes_dtype(len(levels))
+                if len(levels) == len(old_levels):
+                    head = old.astype(dtype)
+                else:
+                    head = np.where(old >= 0, remap[np.maximum(old, 0)], -1).astype(dtype)
+                if levels.is_monotonic_increasing:
+                    tail = lookup_sorted(levels, values).astype(dtype)
+                else:
+                    tail = levels.get_indexer(values).astype(dtype)
+                meta["categories"] = levels.tolist()
+            elif meta["kind"] == "datetime":
+                head = old
+                tail = pd.to_datetime(s, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            else:
+                tail = pd.to_numeric(s, errors="coerce").to_numpy()
+                head = old
+                if n_delta:
+                    dtype = np.result_type(old.dtype, tail.dtype)
+                    head, tail = head.astype(dtype, copy=False), tail.astype(dtype, copy=False)
+            np.save(tmp / meta["file"], np.concatenate([head, tail]))
+            columns.append(meta)
+        return {"format": FORMAT_VERSION, "content_hash": content_hash,
+                "n_rows": base.n_rows + n_delta, "columns": columns,
+                "parent": base.content_hash, "base_rows": base.n_rows}
+    return _write_dir(target, fill)
+
+
+def merged_levels(levels: pd.Index, values) -> tuple[pd.Index, np.ndarray]:
+    """
+    Categorías de `levels` más los valores nuevos de `values`, ordenadas,
+    y el re-mapeo de los códigos viejos (posición nueva de cada level).
+    Como `levels` ya viene ordenado, los valores nuevos se intercalan con
+    searchsorted en lugar de re-ordenar ni hashear todas las categorías.
+    """
+    extra = pd.Index(pd.unique(pd.Series(values, dtype=object).dropna()))
+    try:
+        if not levels.is_monotonic_increasing:
+            raise TypeError
+        extra = extra.sort_values()
+        extra = extra[lookup_sorted(levels, extra) < 0]
+        pos   = levels.searchsorted(extra)
+    except TypeError:
+        # Tipos mezclados o levels sin orden: se agregan al final
+        extra = extra[~extra.isin(levels)]
+        return levels.append(extra), np.arange(len(levels))
+    if not len(extra):
+        return levels, np.arange(len(levels))
+    merged = pd.Index(np.insert(levels.to_numpy(dtype=object), pos, extra.to_numpy(dtype=object)))
+    remap  = np.arange(len(levels)) + np.searchsorted(pos, np.arange(len(levels)), side="right")
+    return merged, remap
+
+
+def lookup_sorted(levels: pd.Index, values) -> np.ndarray:
+    """
+    Código de cada valor en `levels` (ordenado), -1 si no está.
+    """
+    values = pd.Index(values, dtype=object)
+    if not len(levels):
+        return np.full(len(values), -1, dtype=np.int64)
+    valid = ~values.isna()
+    codes = np.full(len(values), -1, dtype=np.int64)
+    if valid.any():
+        v   = values[valid]
+        pos = np.minimum(levels.searchsorted(v), len(levels) - 1)
+        hit = levels.take(pos).to_numpy(dtype=object) == v.to_numpy(dtype=object)
+        codes[np.flatnonzero(valid)[hit]] = pos[hit]
+    return codes
+
+
+# -------------------------------------------------------------------
+# Lectura memory-mapped
+# -------------------------------------------------------------------
+class ColumnarDataset:
+    """
+    Dataset columnar abierto con memory-mapping. Las columnas se abren al
+    pedirlas por primera vez; `select()` construye un DataFrame sólo con
+    las columnas indicadas.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Formato de caché no soportado en {self.path}")
+        self.content_hash = meta["content_hash"]
+        self.n_rows       = meta["n_rows"]
+        # Caché armada con append_columnar: hash y filas del dataset padre
+        self.parent_hash  = meta.get("parent")
+        self.base_rows    = meta.get("base_rows", 0)
+        self._meta        = {c["name"]: c for c in meta["columns"]}
+        self.columns      = [c["name"] for c in meta["columns"]]
+        self._arrays: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        return (Path(path) / "meta.json").is_file()
+
+    def array(self, name: str) -> np.ndarray:
+        """
+        Array memory-mapped (sólo lectura) de la columna: valores o códigos.
+        """
+        arr = self._arrays.get(name)
+        if arr is None:
+            arr = np.load(self.path / self._meta[name]["file"], mmap_mode="r")
+            self._arrays[name] = arr
+        return arr
+
+    def categories(self, name: str) -> list | None:
+        return self._meta[name].get("categories")
+
+    def series(self, name: str) -> pd.Series:
+        meta = self._meta[name]
+        arr  = self.array(name)
+        if meta["kind"] in ("category", "text"):
+            cat = pd.Categorical.from_codes(arr, categories=meta["categories"], validate=False)
+            if meta["kind"] == "text":
+                return pd.Series(np.asarray(cat), name=name)
+            return pd.Series(cat, name=name, copy=False)
+        return pd.Series(arr, name=name, copy=False)
+
+    def select(self, columns=None) -> pd.DataFrame:
+        names = self.columns if columns is None else [c for c in dict.fromkeys(columns) if c in self._meta]
+        return pd.DataFrame({c: self.series(c) for c in names}, columns=names, copy=False)
+
+    def derived(self, name: str, kind: str, build) -> np.ndarray:
+        """
+        Array derivado de la columna `name` (p.ej. su índice) guardado
+        junto a la caché: el primer proceso lo calcula con build() y lo
+        escribe; los demás lo abren memory-mapped en lugar de repetirlo.
+        Si la carpeta no se puede escribir se devuelve el array calculado.
+        """
+        path = self.path / f"{Path(self._meta[name]['file']).stem}.{kind}.npy"
+        if path.is_file():
+            try:
+                return np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                pass
+        arr = build()
+        tmp = self.path / f".{path.stem}.{uuid.uuid4().hex}.tmp.npy"
+        try:
+            np.save(tmp, arr)
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+        return arr
@@ -0,0 +1,585 @@
+# backend/dataset.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+from backend.columnar import ColumnarDataset, append_columnar, merged_levels, write_columnar
+from backend.dataset_index import DatasetIndex, series_codes
+from backend.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+BASE_DIR    = Path(__file__).resolve().parent
+PROJECT_DIR = BASE_DIR.parent
+
+DATE_COLUMNS = ("Order Date",)
+
+# Caché columnar en disco (una carpeta por hash de contenido del CSV).
+# DATASET_CACHE_DIR="" la desactiva y el dataset queda sólo en memoria.
+CACHE_DIR  = os.environ.get("DATASET_CACHE_DIR", str(PROJECT_DIR / ".dataset_cache"))
+CACHE_KEEP = 3
+
+# Puntero al dataset vigente dentro de la caché. Con varios workers,
+# el que recibe la subida lo reescribe y los demás lo ven al atender su
+# próxima petición y abren la misma caché memory-mapped.
+POINTER_NAME = "CURRENT.json"
+
+# Copia del CSV tal como se subió, una por hash de contenido (dentro de la
+# caché de ese hash, o en SOURCE_DIR si la caché está desactivada). Nunca
+# se reescribe: /metrics_xgb la evalúa desde el texto sin que otra subida
+# la cambie a mitad de camino, y sobrevive a un reinicio.
+SOURCE_NAME = "source.csv"
+SOURCE_DIR  = Path(os.environ.get("DATASET_SOURCE_DIR",
+                                  Path(tempfile.gettempdir()) / "dataset_sources"))
+
+# Una columna de texto se guarda como `category` si tiene menos valores
+# distintos que esta fracción del total de filas.
+CATEGORY_MAX_RATIO = 0.5
+
+# Columnas que identifican una fila ya cargada al anexar un CSV, en orden
+# de preferencia ("Row ID" por fila; "Order ID" descarta pedidos enteros)
+DEDUPE_COLUMNS = ("Row ID", "Order ID")
+
+
+# -------------------------------------------------------------------
+# Parseo del CSV
+# -------------------------------------------------------------------
+def parse_sales_csv(path) -> pd.DataFrame:
+    """
+    Lee el CSV de ventas (latin1), parsea las fechas y convierte las
+    columnas de texto de baja cardinalidad a `category`.
+    """
+    df = pd.read_csv(str(path), encoding="latin1")
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    n_rows = len(df)
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        if df[col].nunique(dropna=True) < CATEGORY_MAX_RATIO * n_rows:
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def file_content_hash(path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 del contenido del archivo, leído por bloques.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def frame_content_hash(df: pd.DataFrame) -> str:
+    """
+    SHA-256 de un DataFrame ya construido en memoria (columnas + valores).
+    """
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def prepare_dataset(path, cache_dir: str,
+                    content_hash: str | None = None) -> tuple[str, pd.DataFrame | None]:
+    """
+    Parte pesada de la carga: hash, parseo y escritura de la caché
+    columnar. No toca estado del proceso, así puede correr en un pool de
+    procesos. Devuelve (hash, None) si el dataset quedó en la caché de
+    `cache_dir`, o (hash, DataFrame) si la caché está desactivada.
+    Si el hash ya se calculó al recibir el archivo se pasa en `content_hash`.
+    """
+    path = Path(path)
+    content_hash = content_hash or file_content_hash(path)
+    if not cache_dir:
+        store_source(path, cache_dir, content_hash)
+        return content_hash, parse_sales_csv(path)
+
+    cache_path = Path(cache_dir) / content_hash
+    if not ColumnarDataset.exists(cache_path):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_columnar(parse_sales_csv(path), cache_path, content_hash)
+        _prune_cache(Path(cache_dir), keep=cache_path)
+    store_source(path, cache_dir, content_hash)
+    return content_hash, None
+
+
+def prepare_append(base, base_hash: str, delta_path, cache_dir: str,
+                   delta_hash: str | None = None,
+                   base_csv=None) -> tuple[str, pd.DataFrame | None, dict]:
+    """
+    Parte pesada de un append: parsea sólo el CSV nuevo, descarta las
+    filas que ya estaban (por "Row ID" o, si no hay, por "Order ID") y
+    arma el dataset resultante sin re-parsear el vigente. `base` es la
+    carpeta de la caché columnar vigente o su DataFrame si la caché está
+    desactivada. Con `base_csv` (el CSV original del vigente) guarda además
+    el CSV completo resultante como copia del hash nuevo (ver source_csv_path).
+    Devuelve (hash, DataFrame | None, info) como `prepare_dataset`; si no
+    queda ninguna fila nueva el hash es `base_hash` y no se escribe nada.
+    """
+    delta_hash = delta_hash or file_content_hash(delta_path)
+    delta      = parse_sales_csv(delta_path)
+    source     = ColumnarDataset(base) if isinstance(base, (str, Path)) else base
+    columns    = list(source.columns)
+    base_rows  = source.n_rows if isinstance(source, ColumnarDataset) else len(source)
+
+    rows_in = len(delta)
+    key = next((c for c in DEDUPE_COLUMNS if c in delta.columns and c in columns), None)
+    delta = delta.drop_duplicates(subset=key if key == "Row ID" else None)
+    if key is not None:
+        delta = delta[~delta[key].isin(_existing_keys(source, key))]
+    kept  = delta.index.to_numpy()
+    delta = delta.reset_index(drop=True)
+
+    info = {"rows_in": rows_in, "rows_added": len(delta), "duplicates": rows_in - len(delta),
+            "dedupe_key": key, "parent_hash": base_hash, "base_rows": base_rows}
+    if not len(delta):
+        return base_hash, None, info
+
+    content_hash = hashlib.sha256(f"{base_hash}+{delta_hash}".encode()).hexdigest()
+    if not isinstance(source, ColumnarDataset):
+        frame = _append_frame(source, delta)
+    else:
+        frame = None
+        cache_path = Path(cache_dir) / content_hash
+        if not ColumnarDataset.exists(cache_path):
+            append_columnar(source, delta, cache_path, content_hash)
+            _prune_cache(Path(cache_dir), keep=cache_path)
+
+    target = source_csv_path(cache_dir, content_hash)
+    if base_csv is not None and not target.is_file():
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write_appended_csv(base_csv, delta_path, kept, tmp)
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+        if not cache_dir:
+            _prune_sources(keep=target)
+    return content_hash, frame, info
+
+
+def write_appended_csv(base_csv, delta_path, rows, target):
+    """
+    Escribe en `target` el CSV vigente seguido de las filas `rows` del CSV
+    anexado con su texto original (fechas y números como venían, sin pasar
+    por el parseo) y en el orden de columnas del vigente. Es el mismo CSV
+    que se subiría con `replace`, así /metrics_xgb puede evaluarlo por
+    bloques igual que después de un reemplazo.
+    """
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    header = pd.read_csv(base_csv, encoding="latin1", nrows=0).columns
+    raw    = pd.read_csv(delta_path, encoding="latin1", dtype=str, keep_default_na=False)
+    raw    = raw.iloc[rows].reindex(columns=header, fill_value="")
+    shutil.copyfile(base_csv, target)
+    with open(target, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    raw.to_csv(target, mode="a", header=False, index=False, encoding="latin1")
+
+
+def source_csv_path(cache_dir, content_hash: str) -> Path:
+    """
+    Dónde queda la copia del CSV original del dataset `content_hash`.
+    """
+    if cache_dir:
+        return Path(cache_dir) / content_hash / SOURCE_NAME
+    return SOURCE_DIR / f"{content_hash}.csv"
+
+
+def store_source(path, cache_dir, content_hash: str) -> Path:
+    """
+    Guarda la copia de sólo lectura del CSV `path` para su hash (un hard
+    link si se puede; si no, una copia). No hace nada si ya existe.
+    """
+    target = source_csv_path(cache_dir, content_hash)
+    if not target.is_file():
+        link_or_copy(path, target)
+        if not cache_dir:
+            _prune_sources(keep=target)
+    return target
+
+
+def link_or_copy(src, target):
+    """
+    Deja en `target` el contenido de `src` de una vez (os.replace), sin
+    que un lector vea el archivo a medio escribir.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _existing_keys(source, key: str):
+    if isinstance(source, ColumnarDataset):
+        # En texto alcanzan las categorías: son justamente los valores presentes
+        levels = source.categories(key)
+        return levels if levels is not None else source.array(key)
+    return source[key]
+
+
+def _append_frame(base: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    unknown = [c for c in delta.columns if c not in base.columns]
+    if unknown:
+        raise ValueError(f"Columnas que no existen en el dataset vigente: {unknown}")
+    df = pd.concat([base, delta.reindex(columns=base.columns)], ignore_index=True)
+    for col in base.columns:
+        if isinstance(base[col].dtype, pd.CategoricalDtype):
+            levels  = merged_levels(pd.Index(base[col].cat.categories), delta[col])[0]
+            df[col] = pd.Categorical(df[col], categories=levels)
+    return df
+
+
+# -------------------------------------------------------------------
+# Snapshot inmutable del dataset
+# -------------------------------------------------------------------
+class DatasetSnapshot:
+    """
+    Versión concreta del dataset subido. No se modifica nunca: una nueva
+    subida crea otro snapshot y el manager lo intercambia.
+    Los datos viven en un DataFrame en memoria o en una caché columnar
+    memory-mapped (ColumnarDataset). `path` es la copia del CSV original
+    para su hash (ver source_csv_path), o None si no hay texto del que
+    partir (p.ej. un DataFrame publicado en memoria).
+    """
+
+    def __init__(self, source, version: int, path: Path | None,
+                 content_hash: str, parent: "DatasetSnapshot | None" = None,
+                 base_rows: int = 0):
+        self._source      = source
+        self.version      = version
+        self.path         = path
+        self.content_hash = content_hash
+        self._index       = None
+        self._index_lock  = threading.Lock()
+        # Snapshot anexado: sus primeras `base_rows` filas son las del
+        # padre, así los derivados sólo procesan las filas nuevas. Al padre
+        # se lo referencia débilmente para no retener la cadena entera.
+        self.parent_version = parent.version if parent else None
+        self.parent_hash    = parent.content_hash if parent else None
+        self.base_rows      = base_rows if parent else 0
+        self._parent        = weakref.ref(parent) if parent else None
+
+    @property
+    def parent(self) -> "DatasetSnapshot | None":
+        return self._parent() if self._parent else None
+
+    @property
+    def cache_path(self) -> Path | None:
+        """
+        Carpeta de la caché columnar del snapshot (None si está en memoria).
+        """
+        src = self._source
+        return src.path if isinstance(src, ColumnarDataset) else None
+
+    @property
+    def columns(self) -> list:
+        return list(self._source.columns)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        Devuelve el dataset completo. Es una copia superficial: asignar
+        columnas sobre ella no altera el snapshot compartido.
+        """
+        return self.select()
+
+    def select(self, columns=None) -> pd.DataFrame:
+        """
+        DataFrame sólo con las columnas pedidas que existan (todas si es
+        None). Con la caché columnar no se lee nada más del disco.
+        """
+        if isinstance(self._source, ColumnarDataset):
+            return self._source.select(columns)
+        df = self._source
+        if columns is not None:
+            df = df[[c for c in dict.fromkeys(columns) if c in df.columns]]
+        return df.copy(deep=False)
+
+    def codes(self, name: str) -> tuple:
+        """
+        (códigos, valores ordenados) de una columna, con -1 para nulos.
+        En la caché columnar las columnas de texto ya están guardadas así
+        y se devuelven sin copiar.
+        """
+        src = self._source
+        if isinstance(src, ColumnarDataset):
+            levels = src.categories(name)
+            if levels is not None:
+                return src.array(name), pd.Index(levels)
+        return series_codes(self.select([name])[name])
+
+    def derived(self, name: str, kind: str, build):
+        """
+        Array derivado de la columna `name`. Con la caché columnar se
+        guarda en disco y lo comparten todos los workers (ver
+        ColumnarDataset.derived); en memoria simplemente se calcula.
+        """
+        src = self._source
+        if isinstance(src, ColumnarDataset):
+            return src.derived(name, kind, build)
+        return build()
+
+    @property
+    def index(self) -> DatasetIndex:
+        """
+        Índice de filtros (códigos, mes y filas por valor) del snapshot.
+        """
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    parent = self.parent
+                    base   = parent._index if parent is not None else None
+                    self._index = DatasetIndex(self, base)
+        return self._index
+
+    def __len__(self) -> int:
+        src = self._source
+        return src.n_rows if isinstance(src, ColumnarDataset) else len(src)
+
+
+# -------------------------------------------------------------------
+# Manager: carga una vez y publica el snapshot vigente
+# -------------------------------------------------------------------
+class DatasetManager:
+    """
+    Mantiene el dataset de ventas ya parseado en memoria.
+    `load()` parsea fuera del lock de lectura y luego publica el nuevo
+    snapshot con un único intercambio de referencia, así las peticiones
+    en curso siguen usando el snapshot que ya tenían.
+
+    Con la caché columnar activa, cada publicación queda además en el
+    puntero CURRENT.json de la caché (con un número de versión común a
+    todos los procesos). `current()` lo consulta con un stat() y, si otro
+    worker publicó un dataset nuevo, abre esa caché: todos los workers
+    sirven la misma versión y comparten las páginas del dataset.
+    """
+
+    def __init__(self):
+        self._load_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._snapshot: DatasetSnapshot | None = None
+        self._version = 0
+        self._pointer_sig = None
+
+    def load(self, path) -> DatasetSnapshot:
+        """
+        Publica el CSV de `path`. Si ya existe una caché columnar con el
+        mismo hash de contenido se abre directamente sin parsear el CSV.
+        """
+        path = Path(path)
+        with self._load_lock:
+            content_hash, df = prepare_dataset(path, CACHE_DIR)
+            return self._publish_prepared(source_csv_path(CACHE_DIR, content_hash),
+                                          content_hash, df, CACHE_DIR)
+
+    def publish_prepared(self, path, content_hash: str, df: pd.DataFrame | None,
+                         cache_dir: str = None, lineage: dict | None = None) -> DatasetSnapshot:
+        """
+        Publica el resultado de `prepare_dataset()` / `prepare_append()`
+        ejecutado en otro proceso: abre la caché ya escrita o publica el
+        DataFrame recibido. `lineage` es el info de prepare_append (hash
+        del padre y filas heredadas) cuando no hay caché que lo guarde.
+        """
+        with self._load_lock:
+            return self._publish_prepared(Path(path) if path else None, content_hash, df,
+                                          CACHE_DIR if cache_dir is None else cache_dir,
+                                          lineage)
+
+    def _publish_prepared(self, path, content_hash, df, cache_dir, lineage=None) -> DatasetSnapshot:
+        if df is not None:
+            return self._publish(df, path, content_hash, lineage=lineage)
+        source = ColumnarDataset(Path(cache_dir) / content_hash)
+        with _pointer_lock(Path(cache_dir)):
+            pointer = _read_pointer(Path(cache_dir))
+            version = max(self._version, pointer["version"] if pointer else 0) + 1
+            snapshot = self._publish(source, path, content_hash, version)
+            _write_pointer(Path(cache_dir), {"version": version, "content_hash": content_hash,
+                                             "path": str(path) if path else None})
+        if Path(cache_dir) == _cache_root():
+            self._pointer_sig = _pointer_signature(Path(cache_dir))
+        return snapshot
+
+    def publish(self, df: pd.DataFrame, path=None,
+                content_hash: str | None = None) -> DatasetSnapshot:
+        """
+        Publica un DataFrame ya parseado (p.ej. generado en memoria).
+        Queda sólo en este proceso: no toca el puntero compartido.
+        """
+        with self._load_lock:
+            if content_hash is None:
+                content_hash = frame_content_hash(df)
+            root = _cache_root()
+            if root is not None:
+                # Un puntero anterior no debe pisar este dataset
+                self._pointer_sig = _pointer_signature(root)
+            return self._publish(df, Path(path) if path else None, content_hash)
+
+    def _publish(self, df, path, content_hash, version: int | None = None,
+                 lineage: dict | None = None) -> DatasetSnapshot:
+        if isinstance(df, ColumnarDataset) and df.parent_hash:
+            lineage = {"parent_hash": df.parent_hash, "base_rows": df.base_rows}
+        with self._swap_lock:
+            current = self._snapshot
+            parent  = current if lineage and current is not None \
+                and current.content_hash == lineage["parent_hash"] else None
+            self._version = max(self._version + 1, version or 0)
+            snapshot = DatasetSnapshot(df, self._version, path, content_hash, parent,
+                                       lineage["base_rows"] if parent else 0)
+            self._snapshot = snapshot
+        return snapshot
+
+    def current(self) -> DatasetSnapshot | None:
+        self._sync()
+        return self._snapshot
+
+    def _sync(self):
+        """
+        Adopta el dataset del puntero compartido si cambió desde la última
+        vez (lo publicó otro worker, o es el arranque de este proceso).
+        """
+        root = _cache_root()
+        if root is None:
+            return
+        sig = _pointer_signature(root)
+        if sig is None or sig == self._pointer_sig:
+            return
+        with self._sync_lock:
+            if sig == self._pointer_sig:
+                return
+            pointer = _read_pointer(root)
+            snapshot = self._snapshot
+            if pointer and (snapshot is None or pointer["version"] > snapshot.version) \
+                    and ColumnarDataset.exists(root / pointer["content_hash"]):
+                try:
+                    source = ColumnarDataset(root / pointer["content_hash"])
+                except (OSError, ValueError):
+                    source = None
+                if source is not None:
+                    path = source_csv_path(root, pointer["content_hash"])
+                    self._publish(source, path if path.is_file() else None,
+                                  pointer["content_hash"], pointer["version"])
+            self._pointer_sig = sig
+
+    @property
+    def version(self) -> int:
+        snapshot = self.current()
+        return snapshot.version if snapshot else 0
+
+
+# -------------------------------------------------------------------
+# Puntero compartido entre workers
+# -------------------------------------------------------------------
+def _cache_root() -> Path | None:
+    return Path(CACHE_DIR) if CACHE_DIR else None
+
+
+def _pointer_signature(cache_dir: Path):
+    # os.replace cambia el inodo: alcanza con stat() para detectar cambios
+    try:
+        st = os.stat(cache_dir / POINTER_NAME)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _read_pointer(cache_dir: Path) -> dict | None:
+    try:
+        pointer = json.loads((cache_dir / POINTER_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(pointer, dict) or "content_hash" not in pointer:
+        return None
+    pointer["version"] = int(pointer.get("version", 0))
+    return pointer
+
+
+def _write_pointer(cache_dir: Path, pointer: dict):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{POINTER_NAME}.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps(pointer), encoding="utf-8")
+    os.replace(tmp, cache_dir / POINTER_NAME)
+
+
+class _pointer_lock:
+    """
+    Lock entre procesos (flock) para numerar las versiones sin repetir
+    cuando dos workers publican a la vez.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / ".lock"
+        self._fd  = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def _prune_sources(keep: Path):
+    """
+    Como _prune_cache, para las copias de SOURCE_DIR (caché desactivada).
+    """
+    files = sorted((f for f in SOURCE_DIR.glob("*.csv") if f.is_file()),
+                   key=lambda f: f.stat().st_mtime, reverse=True)
+    for f in files[CACHE_KEEP:]:
+        if f != keep:
+            f.unlink(missing_ok=True)
+
+
+def _prune_cache(cache_dir: Path, keep: Path):
+    """
+    Borra las cachés más antiguas y conserva las CACHE_KEEP más recientes.
+    Un proceso que todavía tenga mapeada una caché borrada la sigue
+    leyendo sin problemas hasta soltarla.
+    """
+    dirs = sorted((d for d in cache_dir.iterdir() if d.is_dir() and not d.name.startswith(".")),
+                  key=lambda d: d.stat().st_mtime, reverse=True)
+    for d in dirs[CACHE_KEEP:]:
+        if d != keep:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+dataset_manager = DatasetManager()
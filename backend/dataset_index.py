@@ -0,0 +1,258 @@
+# backend/dataset_index.py
+
+from __future__ import annotations
+
+import threading
+import weakref
+
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Columnas que se indexan por valor (códigos + posiciones de fila)
+INDEXED_COLUMNS = ("Customer Name", "Product Name", "Region", "Sub-Category", "Category")
+
+# Columna de fecha de la que sale la clave de mes
+MONTH_COLUMN = "Order Date"
+
+
+def series_codes(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """
+    Códigos enteros (-1 para NaN) y valores distintos ordenados, en el
+    mismo orden en que groupby(sort=True) devuelve los grupos.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return np.asarray(s.cat.codes, dtype="int64"), pd.Index(s.cat.categories)
+    codes, uniques = pd.factorize(s, sort=True)
+    return codes.astype("int64"), pd.Index(uniques)
+
+
+def month_keys(dates) -> np.ndarray:
+    """
+    Clave de mes (año * 12 + mes - 1) de cada fecha; -1 para NaT.
+    """
+    values = np.asarray(dates, dtype="datetime64[ns]")
+    keys   = values.astype("datetime64[M]").astype("int64") + 1970 * 12
+    return np.where(np.isnat(values), -1, keys)
+
+
+def sort_rows(codes: np.ndarray, levels: pd.Index) -> np.ndarray:
+    """
+    Posiciones de fila ordenadas por código. Sort estable (radix sobre el
+    entero más chico que alcance): las filas de cada código quedan en
+    orden creciente, listas para intersectar. Van en int32 si alcanzan.
+    """
+    small = codes.astype(np.int16 if len(levels) < 2**15 else np.int32, copy=False)
+    order = np.argsort(small, kind="stable")
+    return order.astype(np.int32) if len(codes) < 2**31 else order
+
+
+# -------------------------------------------------------------------
+# Índice de una columna
+# -------------------------------------------------------------------
+class ColumnIndex:
+    """
+    Columna codificada como diccionario: `codes` (int, -1 = nulo) sobre
+    `levels`, y las posiciones de fila agrupadas por código (`order`
+    ordenado por código y, dentro de cada código, por fila). Las filas
+    de un valor son el tramo order[offsets[c]:offsets[c + 1]].
+    """
+
+    def __init__(self, codes: np.ndarray, levels: pd.Index, order: np.ndarray | None = None):
+        self.codes  = codes
+        self.levels = levels
+        self.order  = sort_rows(codes, levels) if order is None else order
+        valid       = codes >= 0
+        self.counts = np.bincount(codes[valid], minlength=len(levels))
+        n_null      = len(codes) - int(valid.sum())
+        self.offsets = np.concatenate([[n_null], n_null + np.cumsum(self.counts)])
+
+    def code(self, value) -> int:
+        return int(self.levels.get_indexer([value])[0])
+
+    def rows_for_code(self, code: int) -> np.ndarray:
+        if code < 0 or code >= len(self.levels):
+            return np.empty(0, dtype=self.order.dtype)
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def rows(self, value) -> np.ndarray:
+        """
+        Posiciones (crecientes) de las filas con ese valor.
+        """
+        return self.rows_for_code(self.code(value))
+
+    def present(self) -> pd.Index:
+        """
+        Valores que aparecen al menos una vez, ordenados.
+        """
+        return self.levels[self.counts > 0]
+
+
+def merge_rows(base: ColumnIndex, codes: np.ndarray, levels: pd.Index,
+               base_rows: int) -> np.ndarray | None:
+    """
+    `order` de una columna a la que se le anexaron filas, a partir del
+    índice de las primeras `base_rows`: como las categorías nuevas se
+    intercalan ordenadas, las filas viejas conservan su orden relativo y
+    las nuevas se insertan al final del tramo de su código, sin volver a
+    ordenar la columna. None si el re-mapeo de códigos no es monótono.
+    """
+    remap = levels.get_indexer(base.levels)
+    if len(remap) and (remap.min() < 0 or (np.diff(remap) <= 0).any()):
+        return None
+    tail   = codes[base_rows:]
+    added  = sort_rows(tail, levels).astype(np.int64) + base_rows
+    counts = np.zeros(len(levels), dtype=np.int64)
+    counts[remap] = base.counts
+    n_null = int(base.offsets[0])
+    ends   = n_null + np.cumsum(counts)
+    added_codes = tail[added - base_rows]
+    pos    = np.where(added_codes >= 0, ends[np.maximum(added_codes, 0)], n_null)
+    dtype  = np.int32 if len(codes) < 2**31 else np.int64
+    return np.insert(np.asarray(base.order, dtype=dtype), pos, added.astype(dtype))
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersección de dos arrays crecientes sin repetidos: se busca cada
+    elemento del más corto en el más largo.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = 0
+    return a[b[pos] == a]
+
+
+# -------------------------------------------------------------------
+# Índice del dataset
+# -------------------------------------------------------------------
+class DatasetIndex:
+    """
+    Códigos por diccionario e índices de filas por valor de las columnas
+    de filtro, más la clave entera de mes de "Order Date". Se construye
+    por columna la primera vez que se pide y vive lo mismo que el
+    snapshot. Un filtro se resuelve intersectando las filas de cada valor
+    en lugar de comparar la columna entera. Sobre la caché columnar los
+    arrays grandes (orden de filas, códigos de mes) quedan en disco y los
+    workers los comparten memory-mapped.
+
+    Si el snapshot se anexó a otro (`base`, el índice del padre) cada
+    columna ya indexada en el padre se extiende con las filas nuevas en
+    lugar de reconstruirse.
+    """
+
+    def __init__(self, snapshot, base: "DatasetIndex | None" = None):
+        self._snapshot = snapshot
+        # Referencia débil: un índice no mantiene vivo al del padre
+        self._base     = weakref.ref(base) if base is not None else lambda: None
+        self._columns: dict[str, ColumnIndex | None] = {}
+        self._month: ColumnIndex | None = None
+        self._month_keys_arr = None
+        self.month_min = 0
+        self._lock = threading.Lock()
+
+    def _build_order(self, name: str, base: ColumnIndex | None, codes, levels) -> np.ndarray:
+        if base is not None:
+            order = merge_rows(base, codes, levels, self._snapshot.base_rows)
+            if order is not None:
+                return order
+        return sort_rows(codes, levels)
+
+    def _base_column(self, name: str) -> ColumnIndex | None:
+        base = self._base()
+        return base._columns.get(name) if base is not None else None
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def column(self, name: str) -> ColumnIndex | None:
+        """
+        Índice de la columna (None si el dataset no la tiene).
+        """
+        if name not in self._columns:
+            with self._lock:
+                if name not in self._columns:
+                    if name in self._snapshot.columns:
+                        codes, levels = self._snapshot.codes(name)
+                        base  = self._base_column(name)
+                        order = self._snapshot.derived(
+                            name, "order", lambda: self._build_order(name, base, codes, levels))
+                        self._columns[name] = ColumnIndex(codes, levels, order)
+                    else:
+                        self._columns[name] = None
+        return self._columns[name]
+
+    def month(self) -> ColumnIndex:
+        """
+        Índice por mes: el código es la clave de mes menos la mínima.
+        """
+        if self._month is None:
+            with self._lock:
+                if self._month is None:
+                    if MONTH_COLUMN not in self._snapshot.columns:
+                        self.month_min = 0
+                        self._month = ColumnIndex(np.full(len(self), -1, dtype="int64"),
+                                                  pd.Index([], dtype="int64"))
+                        return self._month
+                    # La clave de mes se guarda tal cual (int32) para no
+                    # depender del mínimo al compartirla entre workers
+                    keys = self._snapshot.derived(MONTH_COLUMN, "month", self._month_keys)
+                    valid = keys >= 0
+                    lo    = int(keys[valid].min()) if valid.any() else 0
+                    hi    = int(keys[valid].max()) if valid.any() else -1
+                    codes  = np.where(valid, keys - lo, -1)
+                    levels = pd.Index(np.arange(lo, hi + 1))
+                    parent = self._base()
+                    base   = parent._month if parent is not None else None
+                    order  = self._snapshot.derived(
+                        MONTH_COLUMN, "month_order",
+                        lambda: self._build_order(MONTH_COLUMN, base, codes, levels))
+                    self.month_min = lo
+                    self._month_keys_arr = keys
+                    self._month = ColumnIndex(codes, levels, order)
+        return self._month
+
+    def _month_keys(self) -> np.ndarray:
+        s = self._snapshot.select([MONTH_COLUMN])[MONTH_COLUMN]
+        base_rows = self._snapshot.base_rows
+        parent    = self._base()
+        base_keys = parent._month_keys_arr if parent is not None else None
+        if base_keys is not None and len(base_keys) == base_rows:
+            tail = month_keys(pd.to_datetime(s.iloc[base_rows:], errors="coerce"))
+            return np.concatenate([base_keys, tail.astype(np.int32)])
+        return month_keys(pd.to_datetime(s, errors="coerce")).astype(np.int32)
+
+    def month_code(self, key: int) -> int:
+        self.month()
+        return key - self.month_min
+
+    def rows(self, values: dict | None = None, month_key: int | None = None) -> np.ndarray | None:
+        """
+        Filas que cumplen todos los filtros: {columna: valor} sobre las
+        columnas indexadas y `month_key` (clave de mes). None = sin filtros
+        (todas las filas). Las posiciones salen en orden creciente.
+        """
+        parts = []
+        if month_key is not None:
+            parts.append(self.month().rows_for_code(self.month_code(month_key)))
+        for name, value in (values or {}).items():
+            idx = self.column(name)
+            parts.append(idx.rows(value) if idx is not None else np.empty(0, dtype="int64"))
+        if not parts:
+            return None
+
+        parts.sort(key=len)
+        rows = parts[0]
+        for other in parts[1:]:
+            if not len(rows):
+                break
+            rows = intersect_sorted(rows, other)
+        return rows
@@ -0,0 +1,179 @@
+# backend/encoder.py
+
+from __future__ import annotations
+
+from bisect import bisect_left
+
+from backend.instrumentation import stage
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Tipos que pd.get_dummies codifica cuando no se le pasan columnas
+ENCODED_DTYPES = ["object", "string", "category"]
+
+# Tamaño aproximado (bytes) de cada bloque denso float32 que se predice.
+# Se usa matriz densa y no CSR porque XGBoost trata las entradas ausentes
+# de una matriz dispersa como "missing" y no como 0, y cambiaría el resultado.
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+# -------------------------------------------------------------------
+# Plan de codificación de un DataFrame concreto
+# -------------------------------------------------------------------
+class EncodedFrame:
+    """
+    Resultado de compilar un DataFrame contra el encoder: por cada columna
+    útil guarda lo mínimo para escribir sus valores en la matriz final
+    (valores numéricos o códigos de categoría + tabla código → columna).
+    """
+
+    def __init__(self, n_rows: int, n_features: int, numeric: list, categorical: list):
+        self.n_rows      = n_rows
+        self.n_features  = n_features
+        self.numeric     = numeric        # [(posiciones, valores)]
+        self.categorical = categorical    # [(códigos, lut (k, n_niveles))]
+
+    def fill(self, start: int, stop: int, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Escribe las filas [start, stop) en una matriz float32 (n, n_features).
+        """
+        with stage("encode_fill", rows=stop - start):
+            return self._fill(start, stop, out)
+
+    def _fill(self, start: int, stop: int, out: np.ndarray | None) -> np.ndarray:
+        n = stop - start
+        if out is None:
+            out = np.zeros((n, self.n_features), dtype="float32")
+        else:
+            out = out[:n]
+            out.fill(0)
+
+        for positions, values in self.numeric:
+            out[:, positions] = values[start:stop, np.newaxis]
+
+        rows = np.arange(n)
+        for codes, lut in self.categorical:
+            chunk = codes[start:stop]
+            valid = chunk >= 0
+            for cols in lut:
+                target = np.where(valid, cols[chunk], -1)
+                hit    = target >= 0
+                out[rows[hit], target[hit]] = 1.0
+
+        return out
+
+    def iter_chunks(self, chunk_rows: int | None = None):
+        """
+        Itera la matriz codificada en bloques de filas, reutilizando un
+        único buffer preasignado.
+        """
+        if chunk_rows is None:
+            chunk_rows = max(1, CHUNK_BYTES // (4 * max(1, self.n_features)))
+        buf = np.empty((min(chunk_rows, max(1, self.n_rows)), self.n_features), dtype="float32")
+        for start in range(0, self.n_rows, chunk_rows):
+            stop = min(start + chunk_rows, self.n_rows)
+            yield start, self.fill(start, stop, buf)
+
+    def to_array(self) -> np.ndarray:
+        return self.fill(0, self.n_rows)
+
+
+# -------------------------------------------------------------------
+# Encoder compilado a partir de feature_names.pkl
+# -------------------------------------------------------------------
+class DummyEncoder:
+    """
+    Equivalente a `pd.get_dummies(X, drop_first=True).reindex(columns=features,
+    fill_value=0)` pero sin materializar las columnas dummy que luego se
+    descartan: cada valor se traduce directamente a su índice de columna.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features    = len(self.feature_names)
+        self.positions: dict[str, list[int]] = {}
+        for i, name in enumerate(self.feature_names):
+            self.positions.setdefault(name, []).append(i)
+        # Índice nombre → primera posición; los nombres repetidos guardan
+        # el resto de posiciones aparte.
+        self._name_index = pd.Index(list(self.positions))
+        self._first_pos  = np.array([p[0] for p in self.positions.values()], dtype="int64")
+        self._extra_pos  = {n: p[1:] for n, p in self.positions.items() if len(p) > 1}
+        self._sorted     = sorted(self.positions)
+
+    def compile(self, df: pd.DataFrame, drop_first: bool = True,
+                lut_cache: dict | None = None) -> EncodedFrame:
+        """
+        `lut_cache` (opcional) guarda la tabla código → columna de cada
+        columna categórica; sirve al compilar muchos bloques que comparten
+        el mismo CategoricalDtype, así no se recalcula por bloque.
+        """
+        encoded_cols = set(df.select_dtypes(include=ENCODED_DTYPES).columns)
+        numeric, categorical = [], []
+
+        for col in df.columns:
+            if col not in encoded_cols:
+                positions = self.positions.get(col)
+                if positions:
+                    numeric.append((positions, df[col].to_numpy(dtype="float32", na_value=np.nan)))
+                continue
+
+            # Columnas sin ningún feature "<col>_..." no aportan nada
+            if not self._has_prefix(f"{col}_"):
+                continue
+            plan = self._compile_categorical(col, df[col], drop_first, lut_cache)
+            if plan is not None:
+                categorical.append(plan)
+
+        return EncodedFrame(len(df), self.n_features, numeric, categorical)
+
+    def transform(self, df: pd.DataFrame, drop_first: bool = True) -> np.ndarray:
+        return self.compile(df, drop_first).to_array()
+
+    def _has_prefix(self, prefix: str) -> bool:
+        i = bisect_left(self._sorted, prefix)
+        return i < len(self._sorted) and self._sorted[i].startswith(prefix)
+
+    def _compile_categorical(self, col, s: pd.Series, drop_first: bool, lut_cache=None):
+        # Mismos niveles que usa get_dummies: las categorías del dtype si es
+        # categórico, o los valores únicos ordenados en otro caso.
+        cat    = s.array if isinstance(s.dtype, pd.CategoricalDtype) else pd.Categorical(s)
+        levels = cat.categories
+        codes  = np.asarray(cat.codes, dtype="int64")
+
+        if lut_cache is not None:
+            cached = lut_cache.get((col, drop_first))
+            if cached is not None and cached[0] is levels:
+                lut = cached[1]
+            else:
+                lut = self._category_lut(col, levels, drop_first)
+                lut_cache[(col, drop_first)] = (levels, lut)
+        else:
+            lut = self._category_lut(col, levels, drop_first)
+        return None if lut is None else (codes, lut)
+
+    def _category_lut(self, col, levels: pd.Index, drop_first: bool):
+        names = [f"{col}_{lvl}" for lvl in levels]
+        idx   = self._name_index.get_indexer(names)
+        first = np.where(idx >= 0, self._first_pos[idx], -1)
+        if drop_first and len(first):
+            first[0] = -1
+        if not (first >= 0).any():
+            return None
+
+        layers = [first]
+        extras = [(j, self._extra_pos[n]) for j, n in enumerate(names)
+                  if first[j] >= 0 and n in self._extra_pos]
+        for k in range(max((len(p) for _, p in extras), default=0)):
+            layer = np.full(len(levels), -1, dtype="int64")
+            for j, positions in extras:
+                if k < len(positions):
+                    layer[j] = positions[k]
+            layers.append(layer)
+
+        return np.vstack(layers)
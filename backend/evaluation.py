@@ -0,0 +1,137 @@
+# backend/evaluation.py
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Resultados guardados (uno por par modelo/dataset) y trabajos recordados
+RESULTS_KEEP = 16
+JOBS_KEEP    = 64
+
+
+# -------------------------------------------------------------------
+# Trabajo de evaluación (para el modo en segundo plano)
+# -------------------------------------------------------------------
+class EvaluationJob:
+    """
+    Evaluación de un par (modelo, dataset). El hilo que evalúa actualiza
+    `progress` y al terminar deja `metrics` o `error`.
+    """
+
+    def __init__(self, key: tuple):
+        self.id          = uuid.uuid4().hex
+        self.key         = key
+        self.status      = "running"
+        self.progress    = 0.0
+        self.metrics     = None
+        self.error       = None
+        self.started_at  = time.time()
+        self.finished_at = None
+        self.task        = None
+
+    def set_progress(self, fraction: float):
+        self.progress = min(1.0, max(self.progress, fraction))
+
+    def finish(self, metrics: dict | None = None, error: str | None = None):
+        self.metrics     = metrics
+        self.error       = error
+        self.progress    = 1.0 if error is None else self.progress
+        self.status      = "done" if error is None else "error"
+        self.finished_at = time.time()
+
+    def to_dict(self) -> dict:
+        out = {"job_id": self.id, "status": self.status, "progress": self.progress,
+               "model_version": self.key[0], "dataset_hash": self.key[1]}
+        if self.metrics is not None:
+            out["metrics"] = self.metrics
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+# -------------------------------------------------------------------
+# Resultados por (hash del modelo, hash del dataset)
+# -------------------------------------------------------------------
+class MetricsStore:
+    """
+    Guarda las métricas ya calculadas por par (versión del modelo, hash de
+    contenido del dataset), así repetir la consulta no vuelve a evaluar.
+    Como la clave son hashes de contenido, un resultado nunca queda viejo:
+    si cambia el modelo o el CSV cambia la clave.
+    """
+
+    def __init__(self, keep: int = RESULTS_KEEP, jobs_keep: int = JOBS_KEEP):
+        self.keep      = keep
+        self.jobs_keep = jobs_keep
+        self._results: OrderedDict = OrderedDict()
+        self._jobs: OrderedDict    = OrderedDict()
+        self._running: dict[tuple, EvaluationJob] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> dict | None:
+        with self._lock:
+            metrics = self._results.get(key)
+            if metrics is not None:
+                self._results.move_to_end(key)
+            return metrics
+
+    def put(self, key: tuple, metrics: dict):
+        with self._lock:
+            self._results[key] = metrics
+            self._results.move_to_end(key)
+            while len(self._results) > self.keep:
+                self._results.popitem(last=False)
+
+    def running(self, key: tuple) -> EvaluationJob | None:
+        with self._lock:
+            return self._running.get(key)
+
+    def add_job(self, job: EvaluationJob):
+        with self._lock:
+            self._running[job.key] = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.jobs_keep:
+                self._jobs.popitem(last=False)
+        if job.task is not None:
+            job.task.add_done_callback(lambda task: self._task_done(job, task))
+
+    def _task_done(self, job: EvaluationJob, task):
+        # La tarea terminó sin que run() llegara a ejecutarse (p.ej. venció
+        # en la cola del pool): el trabajo no puede quedar "running".
+        if job.status != "running":
+            return
+        exc = None if task.cancelled() else task.exception()
+        job.finish(error=str(exc) if exc is not None else "Evaluación cancelada.")
+        with self._lock:
+            if self._running.get(job.key) is job:
+                del self._running[job.key]
+
+    def job(self, job_id: str) -> EvaluationJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def run(self, job: EvaluationJob, evaluate):
+        """
+        Ejecuta `evaluate(progress)` para el trabajo (dentro del pool) y
+        guarda el resultado. Los errores quedan en el trabajo y se relanzan.
+        """
+        try:
+            metrics = evaluate(job.set_progress)
+        except Exception as e:
+            job.finish(error=str(e))
+            raise
+        else:
+            self.put(job.key, metrics)
+            job.finish(metrics=metrics)
+            return metrics
+        finally:
+            with self._lock:
+                if self._running.get(job.key) is job:
+                    del self._running[job.key]
+
+
+metrics_store = MetricsStore()
@@ -0,0 +1,198 @@
+# backend/executor.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# Inferencia: XGBoost libera el GIL al predecir, así que alcanza con hilos.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", min(4, os.cpu_count() or 1)))
+INFERENCE_QUEUE   = int(os.environ.get("INFERENCE_QUEUE", 16))
+
+# Parseo de CSV: pandas retiene el GIL, va a procesos aparte (spawn: los
+# scripts que importen la app necesitan `if __name__ == "__main__":`).
+# PARSE_WORKERS=0 lo deja en un hilo dentro del mismo proceso.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", 1))
+PARSE_QUEUE   = int(os.environ.get("PARSE_QUEUE", 4))
+
+# Un trabajo que espera en cola más que esto se descarta sin ejecutarse
+# (503); con la cola llena se rechaza al entrar (429).
+QUEUE_TIMEOUT = float(os.environ.get("EXECUTOR_QUEUE_TIMEOUT", 30))
+RETRY_AFTER   = int(os.environ.get("EXECUTOR_RETRY_AFTER", 2))
+
+
+class Overloaded(Exception):
+    """
+    El pool no puede aceptar (429) o no llegó a ejecutar a tiempo (503)
+    el trabajo. main.py lo traduce a una respuesta con Retry-After.
+    """
+
+    def __init__(self, pool: str, status_code: int, detail: str):
+        super().__init__(detail)
+        self.pool        = pool
+        self.status_code = status_code
+        self.detail      = detail
+        self.retry_after = RETRY_AFTER
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+def _run_admitted(enqueued: float, timeout: float, fn, args, kwargs):
+    # Corre dentro del worker (hilo o proceso): CLOCK_MONOTONIC es común
+    # a todos los procesos de la máquina.
+    if timeout and time.monotonic() - enqueued > timeout:
+        raise QueueTimeout()
+    return fn(*args, **kwargs)
+
+
+# -------------------------------------------------------------------
+# Pool acotado
+# -------------------------------------------------------------------
+class BoundedExecutor:
+    """
+    Pool de hilos o procesos con admisión acotada: como mucho
+    `workers + queue` trabajos en vuelo. Los endpoints hacen
+    `await pool.run(fn, ...)` y el event loop queda libre para las
+    lecturas baratas mientras tanto.
+    """
+
+    def __init__(self, name: str, kind: str, workers: int, queue: int,
+                 queue_timeout: float = QUEUE_TIMEOUT):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Tipo de pool desconocido: {kind!r}")
+        self.name          = name
+        self.kind          = kind
+        self.workers       = max(1, workers)
+        self.queue         = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self._pool         = None
+        self._lock         = threading.Lock()
+        self._in_flight    = 0
+        self._stats        = {"submitted": 0, "completed": 0, "failed": 0,
+                              "rejected": 0, "timed_out": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "thread":
+                        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+                    else:
+                        # spawn: el proceso del servidor ya tiene hilos corriendo
+                        self._pool = ProcessPoolExecutor(
+                            self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._stats["rejected"] += 1
+                raise Overloaded(self.name, 429,
+                                 f"Servidor ocupado: la cola de '{self.name}' está llena.")
+            self._in_flight += 1
+            self._stats["submitted"] += 1
+
+    def _release(self, outcome: str):
+        with self._lock:
+            self._in_flight -= 1
+            self._stats[outcome] += 1
+
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor().submit(
+                _run_admitted, time.monotonic(), self.queue_timeout, fn, args, kwargs)
+            return await asyncio.wrap_future(future, loop=loop)
+        except QueueTimeout:
+            raise Overloaded(self.name, 503,
+                             f"Servidor saturado: el trabajo esperó más de {self.queue_timeout:g}s en '{self.name}'.")
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            raise Overloaded(self.name, 503, f"El pool '{self.name}' se reinició; reintentar.")
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Ejecuta fn(*args, **kwargs) en el pool. Lanza Overloaded si no hay
+        lugar en la cola o si el trabajo esperó demasiado para empezar.
+        """
+        self._admit()
+        return await self._finish(fn, *args, **kwargs)
+
+    def spawn(self, fn, *args, **kwargs) -> asyncio.Task:
+        """
+        Como `run` pero sin esperar: la admisión se decide ya (Overloaded)
+        y se devuelve la tarea, que ocupa su lugar hasta terminar.
+        """
+        self._admit()
+        task = asyncio.ensure_future(self._finish(fn, *args, **kwargs))
+        # Evita el aviso de "exception was never retrieved" si nadie la espera
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _finish(self, fn, *args, **kwargs):
+        outcome = "failed"
+        try:
+            result  = await self._call(fn, *args, **kwargs)
+            outcome = "completed"
+            return result
+        except Overloaded as e:
+            outcome = "timed_out" if e.status_code == 503 else "failed"
+            raise
+        finally:
+            self._release(outcome)
+
+    def iterate(self, iterator):
+        """
+        Consume un iterador bloqueante dentro del pool, un elemento por
+        vez (p.ej. los bloques de una respuesta en streaming). La admisión
+        se decide aquí, antes de empezar a responder, y el iterador ocupa
+        un único lugar de la cola mientras dure. Sólo para pools de hilos.
+        """
+        self._admit()
+        return self._drain(iterator)
+
+    async def _drain(self, iterator):
+        outcome = "failed"
+        try:
+            while True:
+                item = await self._call(next, iterator, _DONE)
+                if item is _DONE:
+                    break
+                yield item
+            outcome = "completed"
+        except Overloaded as e:
+            outcome = "timed_out" if e.status_code == 503 else "failed"
+            raise
+        finally:
+            self._release(outcome)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"kind": self.kind, "workers": self.workers, "queue": self.queue,
+                    "in_flight": self._in_flight, **self._stats}
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_DONE = object()
+
+inference_pool = BoundedExecutor("inference", "thread", INFERENCE_WORKERS, INFERENCE_QUEUE)
+parse_pool     = BoundedExecutor("parse", "process" if PARSE_WORKERS > 0 else "thread",
+                                 PARSE_WORKERS, PARSE_QUEUE)
@@ -1,15 +1,26 @@
 # backend/feature_engineering.py
 
-import pandas as pd
-import joblib
+from __future__ import annotations
+
+import threading
 from pathlib import Path
 
+from backend.dataset import dataset_manager, file_content_hash
+from backend.instrumentation import stage, timed
+from backend.lazy import lazy_import
+from backend.model_registry import registry
+
+joblib = lazy_import("joblib")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 # -------------------------------------------------------------------
 # Configuración de rutas
 # -------------------------------------------------------------------
 BASE_DIR   = Path(__file__).resolve().parent
 MODELS_DIR = BASE_DIR / "models_features"
 TRAIN_CSV  = BASE_DIR.parent / "stores_sales_forecasting.csv"
+STATS_PATH = MODELS_DIR / "feature_stats.pkl"
 
 # -------------------------------------------------------------------
 # Carga de lista de features
@@ -18,14 +29,163 @@ def _load_features(model_type: str) -> list[str]:
     """
     Devuelve la lista de features esperados por el modelo "profit" o "quantity".
     """
-    if model_type == "profit":
-        return joblib.load(MODELS_DIR / "features_Profit.pkl")
+    return registry.get("profit" if model_type == "profit" else "quantity").features
+
+
+def _feature_layout(model_type: str) -> tuple[list[str], dict[str, list[int]]]:
+    """
+    Columnas del modelo y, para cada nombre, las posiciones que ocupa
+    (la lista de features puede tener nombres repetidos).
+    """
+    encoder = registry.get("profit" if model_type == "profit" else "quantity").encoder
+    return encoder.feature_names, encoder.positions
+
+# -------------------------------------------------------------------
+# Índice de estadísticos por grupo
+# -------------------------------------------------------------------
+REGION_STATS  = ("Profit_Region_Mean", "Profit_Region_Min", "Profit_Region_Max")
+SUBCAT_STATS  = ("Sub-Category_Count", "Profit_Sub-Category_Mean")
+PRODUCT_STATS = ("Quantity_ProductName_Mean", "Quantity_ProductName_Std",
+                 "Quantity_ProductName_Median", "Quantity_ProductName_Max")
+
+
+class FeatureStatsIndex:
+    """
+    Agregados por Region, Sub-Category y Product Name precalculados una
+    vez por versión del dataset. Cada entrada es una tupla con los
+    valores en el orden de REGION_STATS / SUBCAT_STATS / PRODUCT_STATS.
+    """
+
+    def __init__(self, source_hash: str, region: dict, subcat: dict, product: dict):
+        self.source_hash = source_hash
+        self.region      = region
+        self.subcat      = subcat
+        self.product     = product
+
+    # tabla → (columna de grupo, columna agregada, agregados)
+    TABLES = {
+        "region":  ("Region",       "Profit",   ["mean", "min", "max"]),
+        "subcat":  ("Sub-Category", "Profit",   ["count", "mean"]),
+        "product": ("Product Name", "Quantity", ["mean", "std", "median", "max"]),
+    }
+
+    @classmethod
+    def from_frame(cls, df_all: pd.DataFrame, source_hash: str) -> "FeatureStatsIndex":
+        tables = {
+            name: _table_to_dict(
+                df_all.groupby(group, observed=True)[value].agg(aggs)
+            )
+            for name, (group, value, aggs) in cls.TABLES.items()
+        }
+        return cls(source_hash, **tables)
+
+    def extend(self, df_all: pd.DataFrame, base_rows: int, source_hash: str) -> "FeatureStatsIndex":
+        """
+        Estadísticos tras anexar filas a partir de `base_rows`: sólo se
+        recalculan los grupos que aparecen en las filas nuevas (con todas
+        sus filas, así la mediana y el desvío son exactos); el resto se
+        copia tal cual.
+        """
+        delta  = df_all.iloc[base_rows:]
+        tables = {}
+        for name, (group, value, aggs) in self.TABLES.items():
+            touched = delta[group].dropna().unique()
+            rows    = df_all[df_all[group].isin(touched)]
+            fresh   = _table_to_dict(rows.groupby(group, observed=True)[value].agg(aggs))
+            tables[name] = {**getattr(self, name), **fresh}
+        return FeatureStatsIndex(source_hash, **tables)
+
+    def lookup(self, table: str, keys) -> np.ndarray:
+        """
+        Versión vectorizada de `.get(key, ceros)`: devuelve una matriz
+        (len(keys), n_stats) con los agregados de cada clave.
+        """
+        arrays = self.__dict__.setdefault("_arrays", {})
+        if table not in arrays:
+            entries = getattr(self, table)
+            values  = np.array(list(entries.values()), dtype="float64").reshape(len(entries), -1)
+            # Fila extra de ceros para las claves desconocidas (índice -1)
+            arrays[table] = (pd.Index(list(entries.keys())),
+                             np.vstack([values, np.zeros((1, values.shape[1]))]))
+        keys_index, values = arrays[table]
+        return values[keys_index.get_indexer(keys)]
+
+    def save(self, path: Path | None = None):
+        data = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        joblib.dump(data, path or STATS_PATH)
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "FeatureStatsIndex":
+        return cls(**joblib.load(path or STATS_PATH))
+
+
+def _table_to_dict(table: pd.DataFrame) -> dict:
+    return dict(zip(table.index.tolist(), table.itertuples(index=False, name=None)))
+
+
+_stats_lock  = threading.Lock()
+_stats_index: FeatureStatsIndex | None = None
+_stats_key   = None
+
+
+def get_stats_index() -> FeatureStatsIndex:
+    """
+    Devuelve el índice de estadísticos del dataset vigente.
+    Sólo se reconstruye cuando cambia el CSV: primero se intenta
+    reutilizar el pickle persistido en models_features/, y si su hash no
+    coincide se recalcula y se vuelve a guardar.
+    """
+    global _stats_index, _stats_key
+
+    snapshot = dataset_manager.current()
+    if snapshot is not None:
+        key = ("snapshot", snapshot.version)
     else:
-        return joblib.load(MODELS_DIR / "features_Quantity.pkl")
+        if not TRAIN_CSV.is_file():
+            raise FileNotFoundError(f"No encontré el CSV de entrenamiento en: {TRAIN_CSV}")
+        st  = TRAIN_CSV.stat()
+        key = ("file", st.st_mtime_ns, st.st_size)
+
+    index = _stats_index
+    if index is not None and _stats_key == key:
+        return index
+
+    with _stats_lock:
+        if _stats_index is not None and _stats_key == key:
+            return _stats_index
+
+        source_hash = snapshot.content_hash if snapshot else file_content_hash(TRAIN_CSV)
+        index = None
+        if STATS_PATH.is_file():
+            try:
+                persisted = FeatureStatsIndex.load()
+                if persisted.source_hash == source_hash:
+                    index = persisted
+            except Exception:
+                index = None
+        if index is None:
+            cols   = ["Region", "Sub-Category", "Product Name", "Profit", "Quantity"]
+            df_all = snapshot.select(cols) if snapshot else pd.read_csv(TRAIN_CSV, encoding="latin1", usecols=cols)
+            base   = _stats_index
+            with stage("stats_index_build", rows=len(df_all)):
+                if snapshot is not None and base is not None and snapshot.parent_hash \
+                        and base.source_hash == snapshot.parent_hash:
+                    # CSV anexado al anterior: sólo los grupos con filas nuevas
+                    index = base.extend(df_all, snapshot.base_rows, source_hash)
+                else:
+                    index = FeatureStatsIndex.from_frame(df_all, source_hash)
+            try:
+                index.save()
+            except OSError:
+                pass
+
+        _stats_index, _stats_key = index, key
+        return index
 
 # -------------------------------------------------------------------
 # Construcción de features a partir de inputs sencillos
 # -------------------------------------------------------------------
+@timed("build_features")
 def build_features(region: str,
                    product_name: str,
                    sub_category: str,
@@ -41,84 +201,71 @@ def build_features(region: str,
     Construye un DataFrame de 1 fila con todas las columnas (dummies + agregaciones)
     que el modelo espera, alineado al pickle de features.
     """
-    # 1) Cargar CSV completo de entrenamiento
-    df_all = pd.read_csv(TRAIN_CSV, encoding="latin1")
+    # 1) Índice de agregados del dataset vigente
+    stats = get_stats_index()
 
     # 2) Parsear la fecha
     od = pd.to_datetime(order_date)
 
-    # 3) Inputs base
+    # 3) Inputs base numéricos. Con una sola fila, get_dummies(drop_first=True)
+    #    no genera ninguna columna dummy, así que sólo cuentan estos valores.
     base = {
-        "Order Date":    od,
-        "Region":        region,
-        "Product Name":  product_name,
-        "Sub-Category":  sub_category,
-        "Month":         od.month,
-        "DayOfWeek":     od.weekday(),
+        "Month":     od.month,
+        "DayOfWeek": od.weekday(),
     }
 
-    # 4) Agregados por región (Profit)
-    reg = (
-        df_all
-        .groupby("Region")["Profit"]
-        .agg(["mean", "min", "max"])
-        .rename(columns={
-            "mean": "Profit_Region_Mean",
-            "min":  "Profit_Region_Min",
-            "max":  "Profit_Region_Max"
-        })
-    )
-    if region in reg.index:
-        for c in reg.columns:
-            base[c] = reg.at[region, c]
-    else:
-        for c in reg.columns:
-            base[c] = 0.0
-
-    # 5) Agregados por sub-categoría (Profit & Count)
-    sub = (
-        df_all
-        .groupby("Sub-Category")["Profit"]
-        .agg(["count", "mean"])
-        .rename(columns={
-            "count": "Sub-Category_Count",
-            "mean":  "Profit_Sub-Category_Mean"
-        })
-    )
-    if sub_category in sub.index:
-        for c in sub.columns:
-            base[c] = sub.at[sub_category, c]
-    else:
-        for c in sub.columns:
-            base[c] = 0.0
-
-    # 6) Estadísticos de Quantity por nombre de producto
-    prod = (
-        df_all
-        .groupby("Product Name")["Quantity"]
-        .agg(["mean", "std", "median", "max"])
-        .rename(columns={
-            "mean":   "Quantity_ProductName_Mean",
-            "std":    "Quantity_ProductName_Std",
-            "median": "Quantity_ProductName_Median",
-            "max":    "Quantity_ProductName_Max"
-        })
-    )
-    if product_name in prod.index:
-        for c in prod.columns:
-            base[c] = prod.at[product_name, c]
-    else:
-        for c in prod.columns:
-            base[c] = 0.0
+    # 4) Agregados por región, sub-categoría y producto (0.0 si no existe)
+    base.update(zip(REGION_STATS,  stats.region.get(region,        (0.0,) * len(REGION_STATS))))
+    base.update(zip(SUBCAT_STATS,  stats.subcat.get(sub_category,  (0.0,) * len(SUBCAT_STATS))))
+    base.update(zip(PRODUCT_STATS, stats.product.get(product_name, (0.0,) * len(PRODUCT_STATS))))
+
+    # 5) Escribir los valores en el layout de columnas del modelo
+    cols, positions = _feature_layout(model_type)
+    row = np.zeros(len(cols), dtype="float64")
+    for name, value in base.items():
+        for i in positions.get(name, ()):
+            row[i] = value
 
-    # 7) Crear DataFrame y codificar categóricas
-    df_feat = pd.DataFrame([base])
-    df_feat = pd.get_dummies(df_feat, drop_first=True)
+    return pd.DataFrame(row[np.newaxis, :], columns=cols)
 
-    # 8) Alinear columnas al orden que espera el modelo
-    cols       = _load_features(model_type)
-    df_aligned = df_feat.reindex(columns=cols, fill_value=0)
 
-    return df_aligned
+BATCH_COLUMNS = ("region", "product_name", "sub_category", "order_date")
+
+
+def build_features_batch(inputs: pd.DataFrame, model_type: str = "profit") -> np.ndarray:
+    """
+    Versión vectorizada de build_features para muchas tuplas a la vez.
+    `inputs` debe tener las columnas region, product_name, sub_category y
+    order_date. Devuelve una matriz (n_filas, n_features) alineada al
+    pickle de features, en el mismo orden que las filas de entrada; cada
+    fila es idéntica a la que devolvería build_features.
+    """
+    missing = [c for c in BATCH_COLUMNS if c not in inputs.columns]
+    if missing:
+        raise KeyError(f"Faltan columnas: {missing}")
+    with stage("build_features", rows=len(inputs)):
+        return _build_features_batch(inputs, model_type)
+
+
+def _build_features_batch(inputs: pd.DataFrame, model_type: str) -> np.ndarray:
+    stats = get_stats_index()
+    od    = pd.to_datetime(inputs["order_date"], format="mixed")
+
+    values = {
+        "Month":     od.dt.month.to_numpy(),
+        "DayOfWeek": od.dt.weekday.to_numpy(),
+    }
+    for names, table, col in ((REGION_STATS,  "region",  "region"),
+                              (SUBCAT_STATS,  "subcat",  "sub_category"),
+                              (PRODUCT_STATS, "product", "product_name")):
+        block = stats.lookup(table, inputs[col])
+        for j, name in enumerate(names):
+            values[name] = block[:, j]
 
+    cols, positions = _feature_layout(model_type)
+    matrix = np.zeros((len(inputs), len(cols)), dtype="float64")
+    for name, column in values.items():
+        for i in positions.get(name, ()):
+            matrix[:, i] = column
 
+    return matrix
@@ -0,0 +1,229 @@
+# backend/http_cache.py
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl
+
+import anyio
+from starlette.routing import Match
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli sólo se comprime con gzip
+    brotli = None
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# HTTP_CACHE_ENABLED=0 apaga ETag/304 y compresión (el middleware no hace nada)
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "1") != "0"
+# Segundos que el navegador puede reusar una respuesta sin preguntar. Con 0
+# (por defecto) siempre revalida con If-None-Match: nunca ve datos viejos.
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", 0))
+
+# Compresión de cuerpos grandes (HTTP_COMPRESS_MIN_BYTES=0 la apaga)
+COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL         = int(os.environ.get("HTTP_GZIP_LEVEL", 6))
+BROTLI_QUALITY     = int(os.environ.get("HTTP_BROTLI_QUALITY", 5))
+
+CACHE_CONTROL = (f"public, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate" if HTTP_CACHE_MAX_AGE > 0
+                 else "public, no-cache")
+
+# Desde este tamaño se comprime en un hilo y no en el event loop
+COMPRESS_THREAD_BYTES = 256 * 1024
+
+# Codificaciones en orden de preferencia a igual q
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+# -------------------------------------------------------------------
+# ETag y negociación de codificación
+# -------------------------------------------------------------------
+def make_etag(path: str, versions: tuple, query: bytes, accept: str) -> str:
+    """
+    Hash de la ruta, las versiones de las que depende la respuesta
+    (dataset, modelo) y la consulta normalizada: parámetros ordenados por
+    nombre (los repetidos conservan su orden) y el header Accept, que
+    decide el formato del cuerpo.
+    """
+    params = sorted(parse_qsl(query.decode("latin-1"), keep_blank_values=True), key=lambda kv: kv[0])
+    h = hashlib.sha256()
+    for part in (path, *map(str, versions), *(f"{k}={v}" for k, v in params), accept.strip().lower()):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """
+    Mejor codificación que acepta el cliente según Accept-Encoding (con q),
+    o None para mandar el cuerpo tal cual.
+    """
+    if not accept_encoding:
+        return None
+    q = {}
+    for part in accept_encoding.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        weight = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    weight = float(p[2:])
+                except ValueError:
+                    weight = 0.0
+        q[name.lower()] = weight
+    ranked = [(-q.get(e, q.get("*", 0.0)), i, e) for i, e in enumerate(ENCODINGS)]
+    best = min(ranked)
+    return best[2] if best[0] < 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _matches(if_none_match: str, tags: tuple) -> str | None:
+    # Comparación débil (RFC 9110 §13.1.2): se ignora el prefijo W/
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return tags[0]
+        candidate = candidate[2:] if candidate.startswith("W/") else candidate
+        if candidate in tags:
+            return candidate
+    return None
+
+
+# -------------------------------------------------------------------
+# Middleware ASGI
+# -------------------------------------------------------------------
+class HttpCacheMiddleware:
+    """
+    ETag fuerte, 304 y Cache-Control para las lecturas de `routes`
+    (ruta → función que devuelve las versiones de las que depende la
+    respuesta, p.ej. (hash del dataset, versión del modelo)).
+
+    El ETag se calcula antes de llamar al endpoint, así que un
+    If-None-Match que coincide se contesta con 304 sin ejecutarlo. Si
+    alguna versión es None (sin dataset, modelo sin cargar) la petición
+    pasa sin caché. Sólo se etiquetan las respuestas 200.
+
+    Los cuerpos de al menos COMPRESS_MIN_BYTES se comprimen con br o gzip
+    según Accept-Encoding; la variante comprimida lleva su propio ETag
+    ("<hash>-gzip"), como pide un ETag fuerte.
+    """
+
+    def __init__(self, app, routes: dict):
+        self.app     = app
+        self.routes  = routes
+        self._routes = {}   # ruta → objeto Route de Starlette (para las métricas)
+
+    async def __call__(self, scope, receive, send):
+        versions_of = self.routes.get(scope.get("path")) if scope["type"] == "http" else None
+        if not HTTP_CACHE_ENABLED or versions_of is None or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        versions = versions_of()
+        if not isinstance(versions, tuple):
+            versions = (versions,)
+        if any(v is None for v in versions):
+            _count("bypass")
+            await self.app(scope, receive, send)
+            return
+
+        headers  = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        etag     = make_etag(scope["path"], versions, scope.get("query_string", b""),
+                             headers.get("accept", ""))
+        encoding = choose_encoding(headers.get("accept-encoding", "")) if COMPRESS_MIN_BYTES > 0 else None
+        tags     = (f'"{etag}"',) + ((f'"{etag}-{encoding}"',) if encoding else ())
+
+        matched = _matches(headers.get("if-none-match", ""), tags)
+        if matched:
+            _count("not_modified")
+            scope["route"] = self._route(scope)
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": self._cache_headers(matched)})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, chunks = None, []
+
+        async def buffered(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_tagged(send, start, b"".join(chunks), etag, encoding)
+
+        await self.app(scope, receive, buffered)
+
+    async def _send_tagged(self, send, start: dict, body: bytes, etag: str, encoding: str | None):
+        raw = [(k, v) for k, v in start["headers"]
+               if k.lower() not in (b"content-length", b"etag", b"cache-control", b"vary")]
+        already = any(k.lower() == b"content-encoding" for k, _ in raw)
+        tag = f'"{etag}"'
+        if encoding and not already and len(body) >= COMPRESS_MIN_BYTES:
+            if len(body) >= COMPRESS_THREAD_BYTES:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            _count("compressed")
+            _count("bytes_raw", len(body))
+            _count("bytes_sent", len(compressed))
+            body = compressed
+            tag  = f'"{etag}-{encoding}"'
+            raw.append((b"content-encoding", encoding.encode()))
+        _count("tagged")
+        raw += [(b"content-length", str(len(body)).encode())] + self._cache_headers(tag)
+        await send({**start, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _cache_headers(tag: str) -> list:
+        return [(b"etag", tag.encode()), (b"cache-control", CACHE_CONTROL.encode()),
+                (b"vary", b"Accept, Accept-Encoding")]
+
+    def _route(self, scope):
+        path  = scope["path"]
+        route = self._routes.get(path)
+        if route is None and "app" in scope:
+            route = next((r for r in scope["app"].router.routes
+                          if r.matches(scope)[0] == Match.FULL), None)
+            self._routes[path] = route
+        return route
+
+
+# -------------------------------------------------------------------
+# Contadores (por proceso)
+# -------------------------------------------------------------------
+_lock   = threading.Lock()
+_counts = Counter()
+
+
+def _count(name: str, n: int = 1):
+    with _lock:
+        _counts[name] += n
+
+
+def stats() -> dict:
+    """
+    Respuestas etiquetadas, 304, peticiones sin caché (falta una versión)
+    y bytes antes/después de comprimir.
+    """
+    with _lock:
+        counts = dict(_counts)
+    return {k: counts.get(k, 0) for k in ("tagged", "not_modified", "bypass", "compressed",
+                                          "bytes_raw", "bytes_sent")}
@@ -0,0 +1,141 @@
+# backend/inference.py
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+
+from backend.instrumentation import stage
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Núcleos de la máquina para inferencia, repartidos entre los workers de
+# serve.py (WEB_CONCURRENCY): cada proceso usa a lo sumo su parte.
+INFERENCE_CORES   = int(os.environ.get("INFERENCE_CORES", _available_cores()))
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", 0)) or \
+    max(1, INFERENCE_CORES // max(1, int(os.environ.get("WEB_CONCURRENCY", 1))))
+
+# Hasta este número de filas se predice con un solo hilo: repartir unas
+# pocas filas entre hilos OpenMP cuesta más que recorrer los árboles.
+SINGLE_THREAD_ROWS = int(os.environ.get("INFERENCE_SINGLE_THREAD_ROWS", 512))
+
+
+# -------------------------------------------------------------------
+# Presupuesto de hilos
+# -------------------------------------------------------------------
+class ThreadBudget:
+    """
+    Reparte `total` hilos entre las predicciones por lote en curso del
+    proceso: cada una recibe total // activas (al menos 1) al empezar, así
+    varias peticiones simultáneas no piden cada una todos los núcleos.
+    """
+
+    def __init__(self, total: int = INFERENCE_THREADS):
+        self.total   = max(1, total)
+        self._active = 0
+        self._lock   = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            self._active += 1
+            n = max(1, self.total // self._active)
+        try:
+            yield n
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+thread_budget = ThreadBudget()
+
+
+# -------------------------------------------------------------------
+# Predictor nativo
+# -------------------------------------------------------------------
+class Predictor:
+    """
+    Predicción directa con el Booster de un XGBRegressor: `inplace_predict`
+    sobre una matriz float32 contigua, sin la validación ni las
+    conversiones del wrapper de sklearn. Usa el mismo rango de iteraciones
+    y el mismo valor de "missing" que `model.predict`, así que el
+    resultado es idéntico.
+
+    Hasta SINGLE_THREAD_ROWS filas se usa un solo hilo; los lotes más
+    grandes toman su parte del presupuesto de hilos del proceso. Cada
+    cantidad de hilos tiene su copia del Booster (nthread es un parámetro
+    del Booster y cambiarlo en uno compartido no es seguro entre hilos).
+    """
+
+    def __init__(self, model, budget: ThreadBudget | None = None):
+        self.model   = model
+        self.budget  = budget or thread_budget
+        self.missing = model.missing if model.missing is not None else np.nan
+        try:
+            best = model.best_iteration
+        except AttributeError:
+            best = None
+        self.iteration_range = (0, best + 1) if best is not None else (0, 0)
+        self.n_features = model.get_booster().num_features()
+        self._source    = model.get_booster()
+        self._boosters: dict[int, object] = {}
+        self._lock   = threading.Lock()
+        self._counts = {"single_calls": 0, "batch_calls": 0, "rows": 0}
+
+    def _booster(self, nthread: int):
+        booster = self._boosters.get(nthread)
+        if booster is None:
+            with self._lock:
+                booster = self._boosters.get(nthread)
+                if booster is None:
+                    booster = self._source.copy()
+                    booster.set_param({"nthread": nthread})
+                    self._boosters = {**self._boosters, nthread: booster}
+        return booster
+
+    def predict(self, X, nthread: int | None = None) -> np.ndarray:
+        """
+        Predicciones float32 de una matriz (n_filas, n_features) o de una
+        sola fila. `nthread` fuerza la cantidad de hilos.
+        """
+        X = np.asarray(X, dtype="float32")
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X = np.ascontiguousarray(X)
+        n = len(X)
+        if n == 0:
+            return np.empty(0, dtype="float32")
+
+        if nthread is not None:
+            return self._predict(X, nthread, "batch_calls")
+        if n <= SINGLE_THREAD_ROWS:
+            return self._predict(X, 1, "single_calls")
+        with self.budget.acquire() as nthread:
+            return self._predict(X, nthread, "batch_calls")
+
+    def _predict(self, X: np.ndarray, nthread: int, kind: str) -> np.ndarray:
+        with stage("xgboost", rows=len(X)):
+            preds = self._booster(nthread).inplace_predict(
+                X, iteration_range=self.iteration_range, missing=self.missing,
+                validate_features=False)
+        with self._lock:
+            self._counts[kind] += 1
+            self._counts["rows"] += len(X)
+        return preds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counts, "threads_budget": self.budget.total,
+                    "boosters": sorted(self._boosters)}
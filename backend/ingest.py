@@ -0,0 +1,79 @@
+# backend/ingest.py
+
+import hashlib
+import threading
+import time
+from collections import deque
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Tamaño de bloque al copiar la subida a disco y cargas recordadas
+UPLOAD_CHUNK_BYTES = 1 << 20
+INGEST_KEEP        = 32
+
+
+def save_upload(src, target, chunk_size: int = UPLOAD_CHUNK_BYTES) -> tuple[str, int]:
+    """
+    Copia el archivo subido a `target` por bloques y calcula su SHA-256
+    en la misma pasada. Devuelve (hash, bytes escritos).
+    """
+    h, n_bytes = hashlib.sha256(), 0
+    with open(target, "wb") as f:
+        for block in iter(lambda: src.read(chunk_size), b""):
+            h.update(block)
+            f.write(block)
+            n_bytes += len(block)
+    return h.hexdigest(), n_bytes
+
+
+# -------------------------------------------------------------------
+# Estadísticas de carga
+# -------------------------------------------------------------------
+class IngestStats:
+    """
+    Registro de las últimas cargas de /upload_csv: filas leídas y
+    anexadas, duplicados descartados, filas/s y cuánto tardó el dashboard
+    en ver los datos nuevos (`visible_seconds`: snapshot publicado;
+    `ready_seconds`: cubo, series y estadísticos ya actualizados).
+    """
+
+    def __init__(self, keep: int = INGEST_KEEP):
+        self._records = deque(maxlen=keep)
+        self._totals  = {"uploads": 0, "unchanged": 0, "rows_in": 0, "rows_added": 0,
+                         "duplicates": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, n_bytes: int, started: float, unchanged: bool = False,
+               **fields) -> dict:
+        """
+        Agrega una carga. `started` es el perf_counter() del inicio de la
+        petición; `fields` trae filas, tiempos parciales, versión, etc.
+        """
+        visible = time.perf_counter() - started
+        rows_in = fields.get("rows_in", 0)
+        entry = {"mode": mode, "unchanged": unchanged, "bytes": n_bytes,
+                 "at": time.time(), **fields,
+                 "visible_seconds": visible,
+                 "rows_per_second": rows_in / visible if visible > 0 else None,
+                 "ready_seconds": visible if unchanged else None}
+        with self._lock:
+            self._records.append(entry)
+            self._totals["uploads"]    += 1
+            self._totals["unchanged"]  += int(unchanged)
+            self._totals["rows_in"]    += rows_in
+            self._totals["rows_added"] += fields.get("rows_added", 0)
+            self._totals["duplicates"] += fields.get("duplicates", 0)
+            self._totals["bytes"]      += n_bytes
+        return entry
+
+    def ready(self, entry: dict, started: float):
+        with self._lock:
+            entry["ready_seconds"] = time.perf_counter() - started
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"totals": dict(self._totals), "last": [dict(e) for e in self._records]}
+
+
+ingest_stats = IngestStats()
@@ -0,0 +1,349 @@
+# backend/instrumentation.py
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+from urllib.parse import parse_qs
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# METRICS_ENABLED=0 apaga middleware y cronómetros (quedan como no-op)
+METRICS_ENABLED   = os.environ.get("METRICS_ENABLED", "1") != "0"
+# El perfilador por petición es opt-in: sin PROFILING_ENABLED=1 se ignora
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL  = float(os.environ.get("PROFILE_INTERVAL", 0.005))
+
+# Límites (segundos) de los histogramas de latencia
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# -------------------------------------------------------------------
+# Histogramas y contadores
+# -------------------------------------------------------------------
+class Histogram:
+    """
+    Histograma acumulativo estilo Prometheus: cuenta por bucket, suma y total.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)   # el último es +Inf
+        self.sum     = 0.0
+        self.count   = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Latencia por ruta (método, plantilla de ruta, status) y duración y
+    filas por etapa. Cada proceso (worker de serve.py) tiene las suyas.
+    """
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self.routes: dict[tuple, Histogram] = {}
+        self.stages: dict[str, Histogram]   = {}
+        self.rows    = Counter()
+        self.started = time.time()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        with self._lock:
+            hist = self.routes.get(key)
+            if hist is None:
+                hist = self.routes[key] = Histogram()
+            hist.observe(seconds)
+
+    def observe_stage(self, name: str, seconds: float, rows: int | None = None):
+        with self._lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = Histogram()
+            hist.observe(seconds)
+            if rows:
+                self.rows[name] += rows
+
+    def render(self) -> list[str]:
+        with self._lock:
+            routes = {k: (list(h.counts), h.sum, h.count) for k, h in self.routes.items()}
+            stages = {k: (list(h.counts), h.sum, h.count) for k, h in self.stages.items()}
+            rows   = dict(self.rows)
+        lines  = []
+        lines += histogram_lines("http_request_duration_seconds",
+                                 "Latencia de las peticiones HTTP por ruta",
+                                 {(("method", m), ("route", r), ("status", str(s))): v
+                                  for (m, r, s), v in sorted(routes.items())})
+        lines += histogram_lines("stage_duration_seconds",
+                                 "Duración de cada etapa interna",
+                                 {(("stage", n),): v for n, v in sorted(stages.items())})
+        lines += metric_lines("stage_rows_total", "counter", "Filas procesadas por etapa",
+                              {(("stage", n),): v for n, v in sorted(rows.items())})
+        return lines
+
+
+metrics = Metrics()
+
+
+# -------------------------------------------------------------------
+# Formato de texto de Prometheus
+# -------------------------------------------------------------------
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metric_lines(name: str, kind: str, help_text: str, samples: dict) -> list[str]:
+    """
+    Líneas de una métrica simple (counter/gauge); `samples` va de tuplas
+    de etiquetas ((clave, valor), ...) al valor.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {_number(v)}" for labels, v in samples.items()]
+    return lines
+
+
+def histogram_lines(name: str, help_text: str, samples: dict,
+                    buckets: tuple = LATENCY_BUCKETS) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, (counts, total, count) in samples.items():
+        cumulative = 0
+        for bound, n in zip(buckets + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return lines
+
+
+# -------------------------------------------------------------------
+# Cronómetros por etapa
+# -------------------------------------------------------------------
+class _Stage:
+    __slots__ = ("name", "rows", "_t0")
+
+    def __init__(self, name: str, rows: int | None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        metrics.observe_stage(self.name, time.perf_counter() - self._t0, self.rows)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str, rows: int | None = None):
+    """
+    `with stage("xgboost", rows=n): ...` mide la duración de una etapa.
+    Las filas se pueden fijar después con `s.rows = n`.
+    """
+    return _Stage(name, rows) if METRICS_ENABLED else _NO_STAGE
+
+
+def timed(name: str):
+    """
+    Decorador: mide cada llamada a la función como la etapa `name`.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe_stage(name, time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+# -------------------------------------------------------------------
+# Perfilador por muestreo
+# -------------------------------------------------------------------
+# Hojas de pila de hilos ociosos (esperando trabajo o eventos)
+_IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"),
+                ("queue.py", "get"), ("thread.py", "_worker")}
+
+
+class SamplingProfiler:
+    """
+    Muestrea cada `interval` segundos la pila de todos los hilos del
+    proceso (sys._current_frames) y cuenta pilas iguales. `folded()`
+    devuelve el formato "hilo;f1;f2;... n" que leen flamegraph.pl y
+    speedscope. Los hilos ociosos no se cuentan.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples  = 0
+        self._stacks  = Counter()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        me    = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                if not stack or stack[0] in _IDLE_LEAVES:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                root = names.get(tid, str(tid))
+                self._stacks[(root,) + tuple(f"{f}:{n}" for f, n in reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{';'.join(s)} {n}\n" for s, n in self._stacks.most_common())
+
+
+_profile_lock = threading.Lock()
+
+
+# -------------------------------------------------------------------
+# Middleware ASGI
+# -------------------------------------------------------------------
+class InstrumentationMiddleware:
+    """
+    Mide cada petición HTTP hasta terminar de enviar la respuesta
+    (incluye las respuestas en streaming) y la registra con la plantilla
+    de la ruta (/metrics_xgb/jobs/{job_id}, no el path concreto).
+
+    Con PROFILING_ENABLED=1, una petición con el header `X-Profile: 1` (o
+    `?_profile=1`) corre bajo el perfilador y en lugar de su respuesta
+    devuelve el perfil en formato folded (text/plain); el status original
+    va en X-Profile-Status. Se perfila una petición por vez y las pilas
+    de otras peticiones simultáneas también aparecen.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED and not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        if PROFILING_ENABLED and _wants_profile(scope):
+            await self._profiled(scope, receive, send)
+            return
+
+        status = 500
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            metrics.observe_request(scope["method"], getattr(route, "path", "<unmatched>"),
+                                    status, time.perf_counter() - t0)
+
+    async def _profiled(self, scope, receive, send):
+        if not _profile_lock.acquire(blocking=False):
+            await _plain(send, 409, b"Ya hay un perfil en curso.\n")
+            return
+        status = 500
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            t0 = time.perf_counter()
+            with SamplingProfiler() as profiler:
+                await self.app(scope, receive, capture)
+            elapsed = time.perf_counter() - t0
+        finally:
+            _profile_lock.release()
+        await _plain(send, 200, profiler.folded().encode("utf-8"), {
+            "x-profile-status":  str(status),
+            "x-profile-samples": str(profiler.samples),
+            "x-profile-seconds": f"{elapsed:.6f}",
+        })
+
+
+def _wants_profile(scope) -> bool:
+    for key, value in scope.get("headers", ()):
+        if key == b"x-profile" and value not in (b"", b"0"):
+            return True
+    query = scope.get("query_string", b"")
+    return b"_profile" in query and \
+        parse_qs(query.decode("latin-1")).get("_profile", ["0"])[0] not in ("", "0")
+
+
+async def _plain(send, status: int, body: bytes, headers: dict | None = None):
+    raw = [(b"content-type", b"text/plain; charset=utf-8"),
+           (b"content-length", str(len(body)).encode())]
+    raw += [(k.encode(), v.encode()) for k, v in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw})
+    await send({"type": "http.response.body", "body": body})
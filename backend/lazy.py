@@ -0,0 +1,73 @@
+# backend/lazy.py
+
+import importlib
+import sys
+import threading
+
+# -------------------------------------------------------------------
+# Importación diferida de librerías pesadas
+# -------------------------------------------------------------------
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Representa un módulo que todavía no se importó: el primer acceso a un
+    atributo lo importa (importlib, con su lock por módulo, así que es
+    seguro entre hilos) y copia sus atributos, de modo que los accesos
+    siguientes (`np.float32`, `pd.DataFrame`) no pasan por __getattr__.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"]   = name
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_load(), attr)
+
+    def _lazy_load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_lazy_name"])
+            with _lock:
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __repr__(self):
+        state = "cargado" if self.loaded else "sin cargar"
+        return f"<LazyModule {self.__dict__['_lazy_name']!r} ({state})>"
+
+
+_modules: dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str):
+    """
+    `np = lazy_import("numpy")`: si el módulo ya está importado lo
+    devuelve tal cual; si no, un LazyModule (uno solo por nombre,
+    compartido por todos los módulos) que lo importa en el primer uso.
+    Las anotaciones de tipo que lo mencionen necesitan
+    `from __future__ import annotations` para no forzar la importación.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        return _modules.setdefault(name, LazyModule(name))
+
+
+def load_all() -> list[str]:
+    """
+    Importa todos los módulos diferidos que todavía no se usaron
+    (precalentamiento) y devuelve sus nombres.
+    """
+    with _lock:
+        pending = [m for m in _modules.values() if not m.loaded]
+    for module in pending:
+        module._lazy_load()
+    return [m.__dict__["_lazy_name"] for m in pending]
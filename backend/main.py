@@ -1,28 +1,91 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
-from fastapi.responses import JSONResponse, FileResponse
+from __future__ import annotations
+
+from fastapi import BackgroundTasks, FastAPI, File, UploadFile, HTTPException, Path as PathParam, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from pydantic import BaseModel
 from typing import List
-import pandas as pd
+from contextlib import asynccontextmanager
+import asyncio
 import io
+import json
+import os
+import time
 from pathlib import Path
-import joblib
-from functools import lru_cache
 
-from backend.model_utils import load_data, predict_from_dataframe, evaluate_model, parse_month
-from backend.feature_engineering import build_features
+from backend.model_utils import load_predictor, predict_array, evaluate_csv, parse_month, iter_chunk_predictions
+from backend.feature_engineering import build_features, build_features_batch, BATCH_COLUMNS, get_stats_index
+from backend import dataset
+from backend.dataset import dataset_manager, prepare_dataset, prepare_append, source_csv_path, link_or_copy
+from backend.ingest import ingest_stats, save_upload
+from backend.prediction_cache import prediction_cache, frame_digest, unique_rows
+from backend import responses
+from backend.aggregates import get_cube, get_daily_sales
+from backend.search import SEARCH_COLUMNS, SORTS, get_search_index
+from backend.model_registry import registry
+from backend.executor import inference_pool, parse_pool, Overloaded
+from backend.evaluation import EvaluationJob, metrics_store
+from backend import instrumentation
+from backend.instrumentation import InstrumentationMiddleware, metric_lines, stage
+from backend import http_cache
+from backend.http_cache import HttpCacheMiddleware
+from backend.lazy import lazy_import
+from backend.warmup import WARMUP_ENABLED, warmup
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 # -------------------------------------------------------
 # Configuración de FastAPI
 # -------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Modelos, dataset y librerías pesadas se cargan en segundo plano: la
+    # API atiende desde ya y /readyz avisa cuando terminó (ver backend/warmup.py)
+    if WARMUP_ENABLED:
+        warmup.start()
+    yield
+    inference_pool.shutdown()
+    parse_pool.shutdown()
+
 app = FastAPI(
     title="Sales Forecasting API",
     description="API para predicciones de Profit/Quantity y KPIs de ventas",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
+# -------------------------------------------------------
+# Caché HTTP: versiones de las que depende cada lectura
+# -------------------------------------------------------
+def _dataset_version():
+    # Hash del contenido: cambia con cada /upload_csv que cambia los datos
+    # y es el mismo en todos los workers
+    snapshot = dataset_manager.current()
+    return snapshot.content_hash if snapshot is not None else None
+
+CACHED_ROUTES = {
+    "/kpis":                   _dataset_version,
+    "/grouped":                _dataset_version,
+    "/grouped/multi":          _dataset_version,
+    "/sales_trend":            _dataset_version,
+    "/metadata/regions":       _dataset_version,
+    "/metadata/products":      _dataset_version,
+    "/metadata/subcategories": _dataset_version,
+    **{f"/search/{kind}": _dataset_version for kind in SEARCH_COLUMNS},
+    "/metrics_xgb":            lambda: (_dataset_version(), registry.loaded_version("xgb")),
+}
+
+# ETag/304, Cache-Control y compresión (ver backend/http_cache.py); va
+# dentro del middleware de métricas para que los 304 también se midan
+app.add_middleware(HttpCacheMiddleware, routes=CACHED_ROUTES)
+
+# Latencia por ruta y perfil opcional por petición (ver backend/instrumentation.py)
+app.add_middleware(InstrumentationMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,6 +94,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pool lleno o trabajo vencido en cola: 429/503 con Retry-After
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # -------------------------------------------------------
 # Paths globales
 # -------------------------------------------------------
@@ -41,7 +113,7 @@ PROJECT_DIR = BASE_DIR.parent
 MODELS_DIR = BASE_DIR / "models_features"
 
 # CSV de entrenamiento subido
-uploaded_csv_path: Path | None = None
+UPLOAD_CSV_PATH = Path(os.environ.get("UPLOAD_CSV_PATH", PROJECT_DIR / "stores_sales_forecasting.csv"))
 
 # Frontend estático
 FRONTEND_DIR = PROJECT_DIR / "frontend"
@@ -50,15 +122,13 @@ CSS_DIR      = FRONTEND_DIR / "css"
 JS_DIR       = FRONTEND_DIR / "js"
 
 # -------------------------------------------------------
-# Carga dinámica de modelos con caché
+# Modelos residentes en el registro
 # -------------------------------------------------------
-@lru_cache()
 def load_profit_model():
-    return joblib.load(MODELS_DIR / "model_Profit.pkl")
+    return registry.model("profit")
 
-@lru_cache()
 def load_quantity_model():
-    return joblib.load(MODELS_DIR / "model_Quantity.pkl")
+    return registry.model("quantity")
 
 # -------------------------------------------------------
 # Pydantic schemas
@@ -69,6 +139,12 @@ class PredictionIn(BaseModel):
 class PredictionOut(BaseModel):
     prediction: float
 
+class FieldsIn(BaseModel):
+    region:       str
+    product_name: str
+    sub_category: str
+    order_date:   str
+
 # -------------------------------------------------------
 # Montaje de estáticos y frontend
 # -------------------------------------------------------
@@ -83,67 +159,295 @@ def serve_frontend():
     return FileResponse(str(index_path))
 
 # -------------------------------------------------------
-# Util: cargar DataFrame desde CSV subido
+# Liveness y readiness
 # -------------------------------------------------------
-def _get_df() -> pd.DataFrame:
-    if not uploaded_csv_path:
+@app.get("/healthz")
+def liveness():
+    """
+    El proceso responde; no depende de modelos ni datos.
+    """
+    return {"status": "ok", "uptime_seconds": time.time() - instrumentation.metrics.started}
+
+@app.get("/readyz")
+def readiness():
+    """
+    200 cuando terminó el precalentamiento (modelos, dataset e índices
+    cargados); 503 mientras corre o si falló, con el estado de cada paso.
+    """
+    state = warmup.to_dict()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+# -------------------------------------------------------
+# Util: DataFrame del CSV subido (parseado una sola vez)
+# -------------------------------------------------------
+def _get_snapshot():
+    snapshot = dataset_manager.current()
+    if snapshot is None:
         raise HTTPException(400, "No se ha subido ningún CSV de entrenamiento.")
-    return pd.read_csv(str(uploaded_csv_path), encoding="latin1")
+    return snapshot
 
 # -------------------------------------------------------
 # 1) CSV upload
 # -------------------------------------------------------
 @app.post("/upload_csv")
-def upload_training_csv(file: UploadFile = File(...)):
-    global uploaded_csv_path
+async def upload_training_csv(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    mode: str = Query("replace", pattern="^(replace|append)$",
+                      description="replace: reemplaza el dataset; append: anexa las filas nuevas")
+):
+    started = time.perf_counter()
+    target  = UPLOAD_CSV_PATH
+    # Con varios workers dos subidas pueden llegar a la vez: cada una se
+    # escribe aparte y el CSV definitivo se reemplaza de una vez.
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{id(file):x}.tmp")
     try:
-        data = file.file.read()
-        target = PROJECT_DIR / "stores_sales_forecasting.csv"
-        with open(target, "wb") as f:
-            f.write(data)
-        uploaded_csv_path = target
-        return {"detail": f"CSV cargado en {target.name}"}
+        # Se copia por bloques calculando el hash en la misma pasada
+        with stage("upload_save"):
+            content_hash, n_bytes = await run_in_threadpool(save_upload, file.file, tmp)
+        save_seconds = time.perf_counter() - started
+        current   = dataset_manager.current()
+        cache_dir = dataset.CACHE_DIR
+        if current is None:
+            mode = "replace"
+
+        # El parseo (pandas) corre en un proceso aparte; aquí sólo se publica
+        if mode == "append":
+            base = str(current.cache_path) if current.cache_path else current.frame
+            # El CSV original del vigente más las filas nuevas queda como
+            # CSV del hash nuevo: /metrics_xgb lo evalúa desde el texto
+            base_csv = str(current.path) if current.path and current.path.is_file() else None
+            with stage("upload_parse"):
+                new_hash, df, info = await parse_pool.run(
+                    prepare_append, base, current.content_hash, tmp, cache_dir, content_hash, base_csv)
+            unchanged = new_hash == current.content_hash
+            source    = source_csv_path(cache_dir, new_hash)
+            if not unchanged and base_csv is not None:
+                await run_in_threadpool(link_or_copy, source, target)
+            snapshot  = current if unchanged else dataset_manager.publish_prepared(
+                source if base_csv is not None else None, new_hash, df, cache_dir, lineage=info)
+        else:
+            # Mismo contenido que el dataset vigente: no hay nada que hacer
+            unchanged = current is not None and content_hash == current.content_hash
+            if unchanged:
+                snapshot, rows = current, 0
+            else:
+                with stage("upload_parse"):
+                    new_hash, df = await parse_pool.run(prepare_dataset, tmp, cache_dir, content_hash)
+                os.replace(tmp, target)
+                snapshot = dataset_manager.publish_prepared(
+                    source_csv_path(cache_dir, new_hash), new_hash, df, cache_dir)
+                rows = len(snapshot)
+            info = {"rows_in": rows, "rows_added": rows, "duplicates": 0}
+
+        entry = ingest_stats.record(
+            mode, n_bytes, started, unchanged=unchanged,
+            rows_in=info["rows_in"], rows_added=info["rows_added"],
+            duplicates=info["duplicates"], dedupe_key=info.get("dedupe_key"),
+            version=snapshot.version, content_hash=snapshot.content_hash,
+            save_seconds=save_seconds)
+        if not unchanged:
+            # Las predicciones por campos dependen de los estadísticos del dataset
+            prediction_cache.invalidate()
+            background_tasks.add_task(_warm_derived, snapshot, entry, started)
+
+        detail = "Sin cambios: el dataset ya estaba cargado." if unchanged \
+            else f"CSV cargado en {target.name}" if mode == "replace" \
+            else f"{info['rows_added']} filas anexadas ({info['duplicates']} repetidas)."
+        return {"detail": detail, "version": snapshot.version, "unchanged": unchanged,
+                "rows_added": info["rows_added"], "duplicates": info["duplicates"]}
+    except Overloaded:
+        raise
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def _warm_derived(snapshot, entry: dict, started: float):
+    # Cubo, series diarias y estadísticos del snapshot nuevo (anexado:
+    # se extienden desde los del anterior) antes de que los pida el dashboard
+    try:
+        get_cube(snapshot).kpis()
+        get_daily_sales(snapshot)
+        get_stats_index()
+        for kind, column in SEARCH_COLUMNS.items():
+            if column in snapshot.columns:
+                get_search_index(snapshot, kind)
+    except Exception:
+        pass
+    ingest_stats.ready(entry, started)
+
+@app.get("/ingest/stats")
+def ingest_stats_endpoint():
+    """
+    Últimas cargas: filas/s, duplicados y tiempo hasta ver los datos nuevos.
+    """
+    return ingest_stats.stats()
 
 # -------------------------------------------------------
 # 2) Métricas XGBoost
 # -------------------------------------------------------
 @app.get("/metrics_xgb")
-def metrics_xgb_endpoint():
+async def metrics_xgb_endpoint(
+    background: bool = Query(False, description="Devolver un job_id y evaluar en segundo plano")
+):
+    snapshot = _get_snapshot()
     try:
-        df = load_data(str(uploaded_csv_path)) if uploaded_csv_path else _get_df()
-        metrics = evaluate_model(df)
+        entry     = registry.get("xgb")
+        predictor = entry.predictor
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+    # Resultado ya calculado para este modelo y este dataset
+    key     = (entry.version, snapshot.content_hash)
+    metrics = metrics_store.get(key)
+    if metrics is not None:
+        if background:
+            return {"job_id": None, "status": "done", "progress": 1.0, "metrics": metrics}
         return {"metrics": metrics}
-    except HTTPException:
+
+    job = metrics_store.running(key)
+    if job is None:
+        # Siempre desde el texto del CSV de este hash (nunca se reescribe):
+        # el DataFrame parseado ya no tiene las fechas como las vio el modelo
+        path = snapshot.path
+        if not (path and path.is_file()):
+            raise HTTPException(400, "No se encontró el CSV original del dataset; vuelva a subirlo.")
+        job      = EvaluationJob(key)
+        evaluate = lambda progress: evaluate_csv(str(path), model=predictor, progress=progress)
+        job.task = inference_pool.spawn(metrics_store.run, job, evaluate)
+        metrics_store.add_job(job)
+
+    if background:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    try:
+        metrics = await asyncio.shield(job.task)
+        return {"metrics": metrics}
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
         raise HTTPException(500, str(e))
 
+@app.get("/metrics_xgb/jobs/{job_id}")
+def metrics_xgb_job(job_id: str):
+    job = metrics_store.job(job_id)
+    if job is None:
+        raise HTTPException(404, f"No existe el trabajo '{job_id}'")
+    return job.to_dict()
+
 # -------------------------------------------------------
 # 3) Predicción batch CSV
 # -------------------------------------------------------
 @app.post("/predict_csv")
-def predict_csv(file: UploadFile = File(...)):
+async def predict_csv(
+    request:    Request,
+    file:       UploadFile = File(...),
+    stream:     str = Query(None, pattern="^(ndjson|csv)$", description="Respuesta en streaming (ndjson o csv)"),
+    chunk_rows: int = Query(50_000, ge=1, description="Filas por bloque en modo streaming"),
+    output:     str = Query(None, pattern=responses.OUTPUT_PATTERN,
+                            description="json (por defecto), columnar, arrow o f32; también vía Accept")
+):
+    if stream:
+        try:
+            model  = load_predictor()
+            reader = pd.read_csv(file.file, encoding="latin1", chunksize=chunk_rows)
+        except Exception as e:
+            raise HTTPException(400, str(e))
+        body   = _stream_predictions(iter_chunk_predictions(reader, model), stream)
+        media  = "application/x-ndjson" if stream == "ndjson" else "text/csv"
+        return StreamingResponse(inference_pool.iterate(body), media_type=media)
+    media = responses.negotiate(request.headers.get("accept"), output, responses.VECTOR_FORMATS)
+    return await inference_pool.run(_predict_csv, file.file, media)
+
+def _predict_csv(src, media=responses.JSON):
     try:
-        raw = file.file.read()
-        df  = pd.read_csv(io.BytesIO(raw), encoding="latin1")
-        preds = predict_from_dataframe(df)
-        return {"predictions": preds}
+        with stage("csv_read") as s:
+            raw = src.read()
+            df  = pd.read_csv(io.BytesIO(raw), encoding="latin1")
+            s.rows = len(df)
+        preds = predict_array(df)
     except Exception as e:
         raise HTTPException(400, str(e))
+    return _predictions_response(preds, media)
+
+def _predictions_response(preds, media):
+    # La serialización también corre en el pool, no en el event loop
+    return responses.respond(
+        media,
+        lambda: {"predictions": preds.astype("float64")},
+        lambda: {"prediction": preds},
+    )
+
+def _stream_predictions(results, fmt: str):
+    """
+    Serializa los resultados por bloque: una línea por fila de entrada, en
+    el mismo orden. Las filas de un bloque fallido llevan el error.
+    """
+    if fmt == "csv":
+        yield "row,prediction,error\n"
+    for start, n, preds, error in results:
+        if fmt == "ndjson":
+            if error is not None:
+                lines = [json.dumps({"row": start + i, "error": error}) for i in range(n)] or \
+                        [json.dumps({"row": start, "error": error})]
+            else:
+                lines = [json.dumps({"row": start + i, "prediction": float(p)}) for i, p in enumerate(preds)]
+        else:
+            if error is not None:
+                msg   = '"' + error.replace('"', '""') + '"'
+                lines = [f"{start + i},,{msg}" for i in range(n)] or [f"{start},,{msg}"]
+            else:
+                lines = [f"{start + i},{float(p)!r}," for i, p in enumerate(preds)]
+        yield "\n".join(lines) + "\n"
 
 # -------------------------------------------------------
 # 4) Predicción JSON genérico
 # -------------------------------------------------------
 @app.post("/predict")
-def predict_json(data: List[dict]):
+async def predict_json(
+    request: Request,
+    data:    List[dict],
+    output:  str = Query(None, pattern=responses.OUTPUT_PATTERN,
+                         description="json (por defecto), columnar, arrow o f32; también vía Accept")
+):
+    media = responses.negotiate(request.headers.get("accept"), output, responses.VECTOR_FORMATS)
+    return await inference_pool.run(_predict_records, data, media)
+
+def _predict_records(data: List[dict], media=responses.JSON):
     try:
         df = pd.DataFrame(data)
-        preds = predict_from_dataframe(df)
-        return {"predictions": preds}
+        preds = _cached_predict_array(df)
     except Exception as e:
         raise HTTPException(400, str(e))
+    return _predictions_response(preds, media)
+
+def _cached_predict_array(df: pd.DataFrame) -> np.ndarray:
+    """
+    predict_array con caché por lote (versión del modelo + contenido del
+    DataFrame) y filas repetidas predichas una sola vez. Con drop_first la
+    predicción de una fila depende de los niveles presentes en el lote,
+    por eso la clave es el lote entero y no cada fila; quitar repetidas
+    no cambia esos niveles.
+    """
+    try:
+        key = ("predict", registry.get("xgb").version, frame_digest(df))
+    except TypeError:
+        key = None   # celdas no hasheables: se predice sin caché
+    if key is not None:
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached
+
+    dedup = unique_rows(df)
+    if dedup is None:
+        preds = predict_array(df)
+    else:
+        first, codes = dedup
+        preds = predict_array(df.iloc[first].reset_index(drop=True))[codes]
+        prediction_cache.record_deduplicated(len(df) - len(first))
+    return prediction_cache.put(key, preds) if key is not None else preds
 
 # -------------------------------------------------------
 # 5) KPIs con filtros
@@ -154,113 +458,182 @@ def get_kpis(
     vendor: str = Query("Todos", description="Customer Name"),
     product: str = Query("Todos", description="Product Name")
 ):
-    df = _get_df()
-    if "Order Date" in df.columns:
-        df["Order Date"] = pd.to_datetime(df["Order Date"], errors="coerce")
-    if month:
-        df = df[df["Order Date"].dt.to_period("M") == pd.Period(month)]
-    if vendor != "Todos":
-        df = df[df["Customer Name"] == vendor]
-    if product != "Todos":
-        df = df[df["Product Name"] == product]
+    snapshot = _get_snapshot()
     for col in ("Sales","Profit"):
-        if col not in df.columns:
+        if col not in snapshot.columns:
             raise HTTPException(500, f"Falta columna '{col}'")
-    total_sales    = df["Sales"].sum()
-    avg_profit_pct = (df["Profit"]/df["Sales"]).mean() if total_sales else 0
-    count          = len(df)
-    avg_sales      = df["Sales"].mean() if count else 0
-    return {
-        "total_sales": float(total_sales),
-        "avg_profit_pct": float(avg_profit_pct),
-        "sale_count": count,
-        "avg_sales": float(avg_sales)
-    }
+    return get_cube(snapshot).kpis(month=month, vendor=vendor, product=product)
 
 # -------------------------------------------------------
 # 6) Datos agrupados
 # -------------------------------------------------------
 @app.get("/grouped")
 def get_grouped_data(
+    request: Request,
     field: str = Query(..., description="Campo a agrupar"),
     month: str = Query(None),
     vendor: str = Query("Todos"),
-    product: str = Query("Todos")
+    product: str = Query("Todos"),
+    output: str = Query(None, pattern=responses.OUTPUT_PATTERN,
+                        description="json (por defecto), columnar o arrow; también vía Accept")
 ):
-    df = _get_df()
-    if "Order Date" in df.columns:
-        df["Order Date"] = pd.to_datetime(df["Order Date"], errors="coerce")
-    if month:
-        df = df[df["Order Date"].dt.to_period("M") == pd.Period(month)]
-    if vendor != "Todos":
-        df = df[df["Customer Name"] == vendor]
-    if product != "Todos":
-        df = df[df["Product Name"] == product]
-    if field not in df.columns:
+    media    = responses.negotiate(request.headers.get("accept"), output)
+    snapshot = _get_snapshot()
+    if field not in snapshot.columns:
         raise HTTPException(400, f"Campo '{field}' no existe")
     for col in ("Sales","Quantity","Discount","Profit"):
-        if col not in df.columns:
+        if col not in snapshot.columns:
             raise HTTPException(500, f"Falta columna '{col}'")
-    grouped = (
-        df.groupby(field, dropna=False)
-          .agg(
-            total_sales   = ("Sales", "sum"),
-            total_quantity= ("Quantity","sum"),
-            avg_discount  = ("Discount","mean"),
-            total_profit  = ("Profit","sum")
-          )
-          .reset_index()
-          .rename(columns={field:"group"})
-          .sort_values("total_sales", ascending=False)
+    grouped = get_cube(snapshot).grouped(field, month=month, vendor=vendor, product=product)
+    return responses.respond(
+        media,
+        lambda: {"data": grouped.to_dict("records")},
+        lambda: {c: grouped[c].to_numpy() for c in grouped.columns},
     )
-    return {"data": grouped.to_dict("records")}
+
+# -------------------------------------------------------
+# 6b) Varias agrupaciones con los mismos filtros
+# -------------------------------------------------------
+@app.get("/grouped/multi")
+def get_grouped_multi(
+    fields:  List[str] = Query(..., description="Campos a agrupar (repetible); 'A,B' agrupa por ambos"),
+    month:   str = Query(None),
+    vendor:  str = Query("Todos"),
+    product: str = Query("Todos"),
+    top:     int = Query(None, ge=1, description="Sólo los N grupos con más ventas"),
+    skip_missing: bool = Query(False, description="Omitir los campos que no existan en vez de fallar")
+):
+    snapshot = _get_snapshot()
+    specs, groupings = [], []
+    for spec in dict.fromkeys(fields):
+        grouping = tuple(f.strip() for f in spec.split(","))
+        missing  = [f for f in grouping if f not in snapshot.columns]
+        if missing:
+            if skip_missing:
+                continue
+            raise HTTPException(400, f"Campo '{missing[0]}' no existe")
+        specs.append(spec)
+        groupings.append(grouping)
+    for col in ("Sales","Quantity","Discount","Profit"):
+        if col not in snapshot.columns:
+            raise HTTPException(500, f"Falta columna '{col}'")
+    tables = get_cube(snapshot).grouped_many(groupings, month=month, vendor=vendor,
+                                             product=product, top=top)
+    return {"data": {spec: t.to_dict("records") for spec, t in zip(specs, tables)}}
 
 # -------------------------------------------------------
 # 7) Metadata para selects
 # -------------------------------------------------------
 @app.get("/metadata/regions")
 def get_regions():
-    df = _get_df()
-    if "Region" not in df.columns:
+    index = _get_snapshot().index.column("Region")
+    if index is None:
         raise HTTPException(500, "No existe la columna 'Region'.")
-    return sorted(df["Region"].dropna().unique().tolist())
+    return sorted(index.present().tolist())
 
 @app.get("/metadata/products")
 def get_products():
-    df = _get_df()
-    if "Product Name" not in df.columns:
+    index = _get_snapshot().index.column("Product Name")
+    if index is None:
         raise HTTPException(500, "No existe la columna 'Product Name'.")
-    return sorted(df["Product Name"].dropna().unique().tolist())
+    return sorted(index.present().tolist())
 
 @app.get("/metadata/subcategories")
 def get_subcategories():
-    df = _get_df()
-    if "Sub-Category" not in df.columns:
+    index = _get_snapshot().index.column("Sub-Category")
+    if index is None:
         raise HTTPException(500, "No existe la columna 'Sub-Category'.")
-    return sorted(df["Sub-Category"].dropna().unique().tolist())
+    return sorted(index.present().tolist())
+
+# -------------------------------------------------------
+# 7b) Búsqueda paginada en productos, clientes y sub-categorías
+# -------------------------------------------------------
+@app.get("/search/{kind}")
+def search_catalog(
+    kind:   str = PathParam(..., pattern="^(" + "|".join(SEARCH_COLUMNS) + ")$",
+                       description="products, customers (filtro vendor) o subcategories"),
+    q:      str = Query("", description="Prefijo de alguna palabra; sin distinguir mayúsculas ni acentos"),
+    limit:  int = Query(20, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort:   str = Query("name", pattern="^(" + "|".join(SORTS) + ")$",
+                        description="name (alfabético), rows o sales (mayores primero)"),
+    totals: bool = Query(False, description="Incluir filas y ventas totales de cada valor")
+):
+    snapshot = _get_snapshot()
+    # Un dataset sin esa columna tiene el catálogo vacío: no es un error del servidor
+    if SEARCH_COLUMNS[kind] not in snapshot.columns:
+        return {"query": q, "total": 0, "offset": offset, "limit": limit, "items": []}
+    index = get_search_index(snapshot, kind)
+    return index.search(q, limit=limit, offset=offset, sort=sort, totals=totals)
 
 # -------------------------------------------------------
 # 8) Predicción simplified por campos
 # -------------------------------------------------------
 @app.post("/predict/by_fields", response_model=PredictionOut)
-def predict_by_fields(
+async def predict_by_fields(
     region:        str = Query(..., description="Región (p.ej. West)"),
     product_name:  str = Query(..., description="Product Name (p.ej. iPhone 12)"),
     sub_category:  str = Query(..., description="Sub-Category"),
     order_date:    str = Query(..., description="Fecha (YYYY-MM-DD)"),
-    model:         str = Query("profit", regex="^(profit|quantity)$")
+    model:         str = Query("profit", pattern="^(profit|quantity)$")
 ):
+    return await inference_pool.run(_predict_one, region, product_name, sub_category, order_date, model)
+
+def _predict_one(region, product_name, sub_category, order_date, model):
     try:
-        df_feat = build_features(
-            region=region,
-            product_name=product_name,
-            sub_category=sub_category,
-            order_date=order_date,
-            model_type=model
-        )
-        mdl  = load_profit_model() if model=="profit" else load_quantity_model()
-        pred = mdl.predict(df_feat)[0]
-        return {"prediction": float(pred)}
+        # Clave: entradas canónicas (los features sólo usan mes y día de
+        # la semana de la fecha) + versión del modelo + hash del dataset
+        key = ("by_fields", model, registry.get(model).version, get_stats_index().source_hash,
+               region, product_name, sub_category, pd.Timestamp(order_date).date().isoformat())
+        pred = prediction_cache.get_or_compute(
+            key, lambda: _predict_one_uncached(region, product_name, sub_category, order_date, model))
+        return {"prediction": float(pred[0])}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _predict_one_uncached(region, product_name, sub_category, order_date, model):
+    df_feat = build_features(
+        region=region,
+        product_name=product_name,
+        sub_category=sub_category,
+        order_date=order_date,
+        model_type=model
+    )
+    # Una sola fila: camino de un hilo del predictor nativo
+    return registry.predictor(model).predict(df_feat.to_numpy())
+
+# -------------------------------------------------------
+# 8b) Predicción por campos en lote (JSON o CSV)
+# -------------------------------------------------------
+def _predict_fields_frame(inputs: pd.DataFrame, model: str) -> list:
+    X    = build_features_batch(inputs, model_type=model)
+    return registry.predictor(model).predict(X).tolist() if len(inputs) else []
+
+@app.post("/predict/by_fields/batch")
+async def predict_by_fields_batch(
+    items: List[FieldsIn],
+    model: str = Query("profit", pattern="^(profit|quantity)$")
+):
+    return await inference_pool.run(_predict_fields_items, items, model)
+
+def _predict_fields_items(items: List[FieldsIn], model: str):
+    try:
+        inputs = pd.DataFrame([it.model_dump() for it in items], columns=list(BATCH_COLUMNS))
+        return {"predictions": _predict_fields_frame(inputs, model)}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/predict/by_fields/batch_csv")
+async def predict_by_fields_batch_csv(
+    file:  UploadFile = File(...),
+    model: str = Query("profit", pattern="^(profit|quantity)$")
+):
+    return await inference_pool.run(_predict_fields_csv, file.file, model)
+
+def _predict_fields_csv(src, model: str):
+    try:
+        inputs = pd.read_csv(src, encoding="latin1", dtype=str)
+        return {"predictions": _predict_fields_frame(inputs, model)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -269,44 +642,130 @@ def predict_by_fields(
 # -------------------------------------------------------
 @app.get("/sales_trend")
 def sales_trend(
+    request: Request,
     year:   int = Query(2020, description="Año (p.ej. 2020)"),
     month:  str = Query(None, description="Mes YYYY-MM, opcional"),
-    vendor: str = Query("Todos", description="Customer Name")
+    vendor: str = Query("Todos", description="Customer Name"),
+    format: str = Query("dense", pattern="^(dense|sparse)$", description="dense (por defecto) o sparse"),
+    top:    int = Query(None, ge=1, description="Sólo los N clientes con más ventas"),
+    output: str = Query(None, pattern=responses.OUTPUT_PATTERN,
+                        description="json (por defecto), columnar o arrow; también vía Accept")
 ):
-    df = _get_df()
-    if "Order Date" not in df.columns:
+    media    = responses.negotiate(request.headers.get("accept"), output)
+    snapshot = _get_snapshot()
+    if "Order Date" not in snapshot.columns:
         raise HTTPException(500, "No existe 'Order Date'")
-    df["Order Date"] = pd.to_datetime(df["Order Date"], errors="coerce")
-    df = df[df["Order Date"].dt.year == year]
-
-    if month:
-        periodo = pd.Period(month)
-        df = df[df["Order Date"].dt.to_period("M")==periodo]
-        if vendor!="Todos":
-            df = df[df["Customer Name"]==vendor]
-        df["Day"] = df["Order Date"].dt.day
-        pivot = df.groupby(["Day","Customer Name"])["Sales"].sum().unstack(fill_value=0)
-        days = list(range(1, periodo.days_in_month+1))
-        labels = [f"{month}-{d:02d}" for d in days]
-        return {
-            "labels": labels,
-            "datasets": [
-                {"vendor": v, "values": pivot.get(v, pd.Series([0]*len(days))).tolist()}
-                for v in pivot.columns
-            ]
-        }
-
-    if vendor!="Todos":
-        df = df[df["Customer Name"]==vendor]
-    df["YearMonth"] = df["Order Date"].dt.to_period("M").astype(str)
-    pivot = df.groupby(["YearMonth","Customer Name"])["Sales"].sum().unstack(fill_value=0)
-    months = [f"{year}-{m:02d}" for m in range(1,13)]
-    pivot = pivot.reindex(months, fill_value=0)
-    return {
-        "labels": months,
-        "datasets": [
-            {"vendor": v, "values": pivot.get(v, pd.Series([0]*12)).tolist()}
-            for v in pivot.columns
-        ]
-    }
+    daily = get_daily_sales(snapshot)
+    return responses.respond(
+        media,
+        lambda: daily.trend(year, month, vendor, fmt=format, top=top),
+        lambda: _trend_table(daily.trend(year, month, vendor, fmt="sparse", top=top), format),
+    )
+
+def _trend_table(trend: dict, layout: str) -> dict:
+    """
+    Tendencia (formato sparse) como tabla: una fila por cliente y una
+    columna por etiqueta (dense) o una fila por punto (sparse).
+    """
+    labels, vendors = trend["labels"], trend["vendors"]
+    points = np.asarray(trend["points"], dtype="float64").reshape(-1, 3)
+    row, col = points[:, 0].astype("int64"), points[:, 1].astype("int64")
+    if layout == "sparse":
+        return {"vendor": [vendors[i] for i in row],
+                "label":  [labels[j] for j in col],
+                "sales":  points[:, 2]}
+    matrix = np.zeros((len(vendors), len(labels)))
+    matrix[row, col] = points[:, 2]
+    return {"vendor": vendors, **{label: matrix[:, j] for j, label in enumerate(labels)}}
+
+
+# -------------------------------------------------------
+# 10) Registro de modelos, pools y caché: estadísticas y recarga
+# -------------------------------------------------------
+@app.get("/models/stats")
+def models_stats():
+    return registry.stats()
+
+@app.post("/models/reload")
+def models_reload(force: bool = Query(False, description="Recargar aunque no cambien los archivos")):
+    reloaded = registry.reload(force=force)
+    if reloaded:
+        prediction_cache.invalidate()
+    return {"reloaded": reloaded}
+
+@app.get("/predict/cache/stats")
+def prediction_cache_stats():
+    """
+    Aciertos, fallos, desalojos y tamaño de la caché de predicciones.
+    """
+    return prediction_cache.stats()
+
+@app.get("/executor/stats")
+def executor_stats():
+    return {"inference": inference_pool.stats(), "parse": parse_pool.stats()}
+
+# -------------------------------------------------------
+# 11) Métricas en formato Prometheus
+# -------------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Latencias por ruta, duración y filas por etapa, caché de predicciones,
+    cargas de modelos, pools y datos cargados. Son las del worker que
+    atiende la petición (cada proceso de serve.py lleva las suyas).
+    """
+    lines = instrumentation.metrics.render()
+
+    cache = prediction_cache.stats()
+    lines += metric_lines("prediction_cache_lookups_total", "counter", "Búsquedas en la caché de predicciones",
+                          {(("result", r),): cache[k] for r, k in (("hit", "hits"), ("disk_hit", "disk_hits"),
+                                                                   ("miss", "misses"))})
+    lines += metric_lines("prediction_cache_hit_ratio", "gauge", "Aciertos / búsquedas",
+                          {(): cache["hit_rate"]})
+    lines += metric_lines("prediction_cache_evictions_total", "counter", "Entradas desalojadas",
+                          {(("reason", "size"),): cache["evictions"],
+                           (("reason", "ttl"),): cache["expirations"]})
+    lines += metric_lines("prediction_cache_invalidations_total", "counter",
+                          "Vaciados por CSV nuevo o recarga de modelos", {(): cache["invalidations"]})
+    lines += metric_lines("prediction_cache_entries", "gauge", "Entradas en memoria", {(): cache["entries"]})
+    lines += metric_lines("prediction_cache_bytes", "gauge", "Bytes en memoria", {(): cache["bytes"]})
+
+    models = registry.stats()["models"]
+    lines += metric_lines("model_loads_total", "counter", "Cargas (joblib.load) de cada modelo",
+                          {(("model", n),): m["load_count"] for n, m in models.items()})
+    lines += metric_lines("model_load_seconds", "gauge", "Duración de la última carga",
+                          {(("model", n),): m["load_seconds"] for n, m in models.items() if m["loaded"]})
+    lines += metric_lines("model_predict_calls_total", "counter", "Llamadas al predictor por camino",
+                          {(("model", n), ("path", path)): m["inference"][f"{path}_calls"]
+                           for n, m in models.items() if m["inference"] for path in ("single", "batch")})
+    lines += metric_lines("model_predict_rows_total", "counter", "Filas predichas",
+                          {(("model", n),): m["inference"]["rows"]
+                           for n, m in models.items() if m["inference"]})
+
+    http = http_cache.stats()
+    lines += metric_lines("http_cache_responses_total", "counter", "Lecturas con ETag por resultado",
+                          {(("result", r),): http[r] for r in ("tagged", "not_modified", "bypass")})
+    lines += metric_lines("http_compression_bytes_total", "counter", "Bytes de cuerpos comprimidos",
+                          {(("kind", "raw"),): http["bytes_raw"], (("kind", "sent"),): http["bytes_sent"]})
+
+    pools = {"inference": inference_pool.stats(), "parse": parse_pool.stats()}
+    lines += metric_lines("executor_in_flight", "gauge", "Trabajos en cola o ejecutándose",
+                          {(("pool", p),): st["in_flight"] for p, st in pools.items()})
+    lines += metric_lines("executor_jobs_total", "counter", "Trabajos por resultado",
+                          {(("pool", p), ("outcome", o)): st[o] for p, st in pools.items()
+                           for o in ("completed", "failed", "rejected", "timed_out")})
+
+    ingest = ingest_stats.stats()["totals"]
+    lines += metric_lines("ingest_uploads_total", "counter", "Subidas de CSV", {(): ingest["uploads"]})
+    lines += metric_lines("ingest_rows_total", "counter", "Filas leídas y anexadas",
+                          {(("kind", "read"),): ingest["rows_in"], (("kind", "added"),): ingest["rows_added"],
+                           (("kind", "duplicate"),): ingest["duplicates"]})
 
+    snapshot = dataset_manager.current()
+    lines += metric_lines("dataset_version", "gauge", "Versión del dataset publicado",
+                          {(): snapshot.version if snapshot else 0})
+    lines += metric_lines("dataset_rows", "gauge", "Filas del dataset publicado",
+                          {(): len(snapshot) if snapshot else 0})
+    lines += metric_lines("process_start_time_seconds", "gauge", "Inicio del proceso (epoch)",
+                          {(("pid", str(os.getpid())),): instrumentation.metrics.started})
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
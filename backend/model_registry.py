@@ -0,0 +1,279 @@
+# backend/model_registry.py
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from backend.encoder import DummyEncoder
+from backend.inference import Predictor
+from backend.instrumentation import stage
+from backend.lazy import lazy_import
+
+joblib = lazy_import("joblib")
+
+# -------------------------------------------------------------------
+# Rutas de los artefactos (relativas al paquete)
+# -------------------------------------------------------------------
+BASE_DIR    = Path(__file__).resolve().parent
+PROJECT_DIR = BASE_DIR.parent
+MODELS_DIR  = BASE_DIR / "models_features"
+
+# nombre → (pickle del modelo, pickle con la lista de features)
+MODEL_ARTIFACTS = {
+    "xgb":      (PROJECT_DIR / "best_xgb_model.pkl",    PROJECT_DIR / "feature_names.pkl"),
+    "profit":   (MODELS_DIR / "model_Profit.pkl",       MODELS_DIR / "features_Profit.pkl"),
+    "quantity": (MODELS_DIR / "model_Quantity.pkl",     MODELS_DIR / "features_Quantity.pkl"),
+}
+
+# Artefactos auxiliares (diccionarios de configuración y métricas)
+EXTRA_ARTIFACTS = {
+    "config":           MODELS_DIR / "config.pkl",
+    "metrics_profit":   MODELS_DIR / "metrics_Profit.pkl",
+    "metrics_quantity": MODELS_DIR / "metrics_Quantity.pkl",
+}
+
+# Cada cuánto (segundos) se mira si cambiaron los archivos en disco
+RELOAD_CHECK_SECONDS = 5.0
+
+
+def _signature(*paths: Path) -> tuple:
+    sig = []
+    for p in paths:
+        try:
+            st = p.stat()
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _file_hash(path: Path) -> str | None:
+    if not path.is_file():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# -------------------------------------------------------------------
+# Entrada del registro: modelo + layout de features residentes
+# -------------------------------------------------------------------
+class ModelEntry:
+    """
+    Modelo deserializado junto con su lista de features, el encoder
+    compilado para esa lista y el predictor nativo sobre su Booster. Si
+    falta el pickle del modelo, la entrada igual carga los features y
+    `model` / `predictor` lanzan FileNotFoundError al usarse.
+    """
+
+    def __init__(self, name: str, model_path: Path, features_path: Path):
+        self.name          = name
+        self.model_path    = model_path
+        self.features_path = features_path
+        self.signature     = _signature(model_path, features_path)
+
+        t0 = time.perf_counter()
+        if not features_path.is_file():
+            raise FileNotFoundError(f"No encontré el archivo de features en: {features_path}")
+        with stage("joblib_load"):
+            self.features = joblib.load(str(features_path))
+            self.encoder  = DummyEncoder(self.features)
+            self._model   = joblib.load(str(model_path)) if model_path.is_file() else None
+        self._predictor = Predictor(self._model) if self._model is not None else None
+        self.version  = _file_hash(model_path)
+        self.load_seconds = time.perf_counter() - t0
+        self.loaded_at    = time.time()
+
+    @property
+    def model(self):
+        if self._model is None:
+            raise FileNotFoundError(f"El modelo no fue encontrado en: {self.model_path}")
+        return self._model
+
+    @property
+    def predictor(self) -> Predictor:
+        if self._predictor is None:
+            raise FileNotFoundError(f"El modelo no fue encontrado en: {self.model_path}")
+        return self._predictor
+
+
+# -------------------------------------------------------------------
+# Registro
+# -------------------------------------------------------------------
+class ModelRegistry:
+    """
+    Carga cada artefacto una sola vez (al arrancar o en el primer uso) y
+    lo mantiene residente. La recarga construye las entradas nuevas aparte
+    y después reemplaza el diccionario completo, así las peticiones en
+    curso terminan con la entrada que ya tenían sin esperar a nadie.
+    """
+
+    def __init__(self, artifacts: dict | None = None, extras: dict | None = None):
+        self.artifacts  = dict(artifacts or MODEL_ARTIFACTS)
+        self.extras     = dict(extras or EXTRA_ARTIFACTS)
+        self._entries: dict[str, ModelEntry] = {}
+        self._extra_values: dict[str, object] = {}
+        self._lock        = threading.Lock()
+        self._reloading   = threading.Lock()
+        self._last_check  = time.monotonic()
+        self._load_counts: dict[str, int] = {}
+        self._errors: dict[str, str] = {}
+        self._requests    = 0
+        self._overhead_ns = 0
+        self.cold_start_seconds: float | None = None
+        self.reloads      = 0
+
+    # ---------------------------------------------------------------
+    # Acceso
+    # ---------------------------------------------------------------
+    def get(self, name: str) -> ModelEntry:
+        t0 = time.perf_counter_ns()
+        self._maybe_schedule_reload()
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._load_missing(name)
+        self._requests    += 1
+        self._overhead_ns += time.perf_counter_ns() - t0
+        return entry
+
+    def model(self, name: str):
+        return self.get(name).model
+
+    def predictor(self, name: str) -> Predictor:
+        return self.get(name).predictor
+
+    def loaded_version(self, name: str) -> str | None:
+        """
+        Hash del modelo si ya está cargado; None si no (no lo carga).
+        """
+        self._maybe_schedule_reload()
+        entry = self._entries.get(name)
+        return entry.version if entry is not None else None
+
+    def extra(self, name: str):
+        if name not in self._extra_values:
+            path = self.extras[name]
+            with self._lock:
+                if name not in self._extra_values:
+                    with stage("joblib_load"):
+                        self._extra_values[name] = joblib.load(str(path))
+                    self._count(name)
+        return self._extra_values[name]
+
+    def _load_missing(self, name: str) -> ModelEntry:
+        if name not in self.artifacts:
+            raise KeyError(f"Modelo desconocido: {name!r}")
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._build(name)
+                entries = dict(self._entries)
+                entries[name] = entry
+                self._entries = entries
+        return entry
+
+    def _build(self, name: str) -> ModelEntry:
+        model_path, features_path = self.artifacts[name]
+        try:
+            entry = ModelEntry(name, model_path, features_path)
+        except Exception as e:
+            self._errors[name] = str(e)
+            raise
+        self._errors.pop(name, None)
+        self._count(name)
+        return entry
+
+    def _count(self, name: str):
+        self._load_counts[name] = self._load_counts.get(name, 0) + 1
+
+    # ---------------------------------------------------------------
+    # Arranque y recarga
+    # ---------------------------------------------------------------
+    def preload(self):
+        """
+        Carga todos los modelos disponibles. Los que fallan quedan
+        registrados en stats() y se reintentan en el primer uso.
+        """
+        t0 = time.perf_counter()
+        for name in self.artifacts:
+            try:
+                self.get(name)
+            except Exception:
+                pass
+        self.cold_start_seconds = time.perf_counter() - t0
+
+    def reload(self, force: bool = False) -> list[str]:
+        """
+        Vuelve a cargar las entradas cuyos archivos cambiaron (o todas con
+        force=True) y las publica de una vez. Devuelve los nombres recargados.
+        """
+        with self._reloading:
+            current = self._entries
+            fresh, changed = {}, []
+            for name, entry in current.items():
+                if force or _signature(entry.model_path, entry.features_path) != entry.signature:
+                    try:
+                        fresh[name] = self._build(name)
+                        changed.append(name)
+                        continue
+                    except Exception:
+                        pass
+                fresh[name] = entry
+            if changed:
+                with self._lock:
+                    merged = dict(self._entries)
+                    merged.update({n: fresh[n] for n in changed})
+                    self._entries = merged
+                if force:
+                    self._extra_values = {}
+                self.reloads += 1
+            return changed
+
+    def _maybe_schedule_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_SECONDS:
+            return
+        self._last_check = now
+        stale = any(_signature(e.model_path, e.features_path) != e.signature
+                    for e in self._entries.values())
+        if stale and not self._reloading.locked():
+            threading.Thread(target=self.reload, daemon=True).start()
+
+    # ---------------------------------------------------------------
+    # Estadísticas
+    # ---------------------------------------------------------------
+    def stats(self) -> dict:
+        entries = self._entries
+        models = {}
+        for name, (model_path, features_path) in self.artifacts.items():
+            entry = entries.get(name)
+            models[name] = {
+                "model_path":   str(model_path),
+                "loaded":       entry is not None,
+                "has_model":    bool(entry and entry._model is not None),
+                "n_features":   len(entry.features) if entry else None,
+                "version":      entry.version if entry else None,
+                "load_seconds": entry.load_seconds if entry else None,
+                "loaded_at":    entry.loaded_at if entry else None,
+                "load_count":   self._load_counts.get(name, 0),
+                "error":        self._errors.get(name),
+                "inference":    entry._predictor.stats() if entry and entry._predictor else None,
+            }
+        return {
+            "cold_start_seconds": self.cold_start_seconds,
+            "reloads":            self.reloads,
+            "models":             models,
+            "extras":             {n: {"loaded": n in self._extra_values,
+                                       "load_count": self._load_counts.get(n, 0)}
+                                   for n in self.extras},
+            "requests":           self._requests,
+            "avg_overhead_us":    (self._overhead_ns / self._requests / 1000) if self._requests else 0.0,
+        }
+
+
+registry = ModelRegistry()
@@ -1,14 +1,19 @@
-import pandas as pd
-import joblib
+from __future__ import annotations
+
 import os
-from pathlib import Path
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+
+from backend.encoder import DummyEncoder
+from backend.instrumentation import stage
+from backend.lazy import lazy_import
+from backend.model_registry import registry, MODEL_ARTIFACTS
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 # -------------------------------------------------------------------
-# 1) Rutas absolutas al modelo XGBoost y a los feature names
+# 1) Rutas al modelo XGBoost y a los feature names (relativas al paquete)
 # -------------------------------------------------------------------
-MODEL_PATH    = Path(r"D:\Repositorios\Proyecto Sales forecasting\best_xgb_model.pkl")
-FEATURES_PATH = Path(r"D:\Repositorios\Proyecto Sales forecasting\feature_names.pkl")
+MODEL_PATH, FEATURES_PATH = MODEL_ARTIFACTS["xgb"]
 
 # Diccionario para mapear nombre de mes en español → número 1–12
 MONTH_MAP = {
@@ -50,24 +55,45 @@ def load_data(path: str) -> pd.DataFrame:
 
 def load_model():
     """
-    Carga el modelo XGBoost serializado desde disco (best_xgb_model.pkl).
+    Devuelve el modelo XGBoost (best_xgb_model.pkl) residente en el registro.
     Si no existe, lanza FileNotFoundError.
     """
-    if MODEL_PATH.is_file():
-        return joblib.load(str(MODEL_PATH))
-    else:
-        raise FileNotFoundError(f"El modelo no fue encontrado en: {MODEL_PATH}")
+    return registry.model("xgb")
+
+
+def load_predictor():
+    """
+    Predictor nativo (inplace_predict sobre el Booster) del modelo XGBoost.
+    """
+    return registry.predictor("xgb")
 
 
 def load_feature_names():
     """
-    Carga la lista de nombres de columnas (features) desde disco
-    (feature_names.pkl).
+    Devuelve la lista de nombres de columnas (features) de feature_names.pkl.
+    """
+    return registry.get("xgb").features
+
+
+def load_encoder() -> DummyEncoder:
+    """
+    Encoder one-hot compilado a partir de feature_names.pkl.
+    """
+    return registry.get("xgb").encoder
+
+
+def _predict_encoded(model, X_raw: pd.DataFrame, drop_first: bool = True) -> np.ndarray:
+    """
+    Codifica X_raw con el encoder compilado y predice por bloques de filas,
+    sin generar las dummies que el modelo no usa. `model` es el predictor
+    (o cualquier objeto con .predict sobre una matriz).
     """
-    if FEATURES_PATH.is_file():
-        return joblib.load(str(FEATURES_PATH))
-    else:
-        raise FileNotFoundError(f"No encontré el archivo de features en: {FEATURES_PATH}")
+    with stage("encode", rows=len(X_raw)):
+        encoded = load_encoder().compile(X_raw, drop_first=drop_first)
+    preds   = np.empty(encoded.n_rows, dtype="float32")
+    for start, X_chunk in encoded.iter_chunks():
+        preds[start:start + len(X_chunk)] = model.predict(X_chunk)
+    return preds
 
 
 def get_target_column_name(df: pd.DataFrame) -> str:
@@ -95,26 +121,131 @@ def predict_from_dataframe(df: pd.DataFrame):
       3) Alinea columnas con las del entrenamiento.
       4) Retorna la lista de predicciones.
     """
-    # 1) Cargar modelo
-    model = load_model()
+    return predict_array(df).tolist()
+
+
+def predict_array(df: pd.DataFrame) -> np.ndarray:
+    """
+    Igual que `predict_from_dataframe` pero devuelve el array de numpy,
+    para serializarlo sin pasar por una lista de floats de Python.
+    """
+    # 1) Cargar el predictor del modelo
+    model = load_predictor()
 
     # 2) Detectar y eliminar columna objetivo si está presente
+    X_raw = _drop_target(df)
+
+    # 3-5) Codificación one-hot alineada a los features y predicción
+    return np.asarray(_predict_encoded(model, X_raw))
+
+
+def _drop_target(df: pd.DataFrame) -> pd.DataFrame:
     try:
         target_col = get_target_column_name(df)
-        X_raw = df.drop([target_col], axis=1, errors="ignore")
+        return df.drop([target_col], axis=1, errors="ignore")
     except KeyError:
-        X_raw = df.copy()
+        return df.copy()
+
 
-    # 3) Codificación one-hot
-    X_encoded = pd.get_dummies(X_raw, drop_first=True)
+def iter_chunk_predictions(chunks, model=None):
+    """
+    Predice un iterable de DataFrames (p.ej. `pd.read_csv(..., chunksize=n)`)
+    bloque a bloque. Genera tuplas (inicio, n_filas, predicciones, error):
+    si un bloque falla se informa su error y se sigue con el siguiente.
 
-    # 4) Alinear columnas
-    trained_features = load_feature_names()
-    X_aligned = X_encoded.reindex(columns=trained_features, fill_value=0)
+    Cada bloque se codifica sin drop_first: la columna que se descarta
+    dependería de qué valores caen en cada bloque, y así cada fila da el
+    mismo resultado sea cual sea el tamaño de bloque.
+    """
+    model  = model if model is not None else load_predictor()
+    start  = 0
+    chunks = iter(chunks)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            # Error de parseo: el lector ya no puede continuar
+            yield start, 0, None, str(e)
+            return
+
+        n = len(chunk)
+        try:
+            preds = _predict_encoded(model, _drop_target(chunk), drop_first=False)
+            yield start, n, preds, None
+        except Exception as e:
+            yield start, n, None, str(e)
+        start += n
+
+# -------------------------------------------------------------------
+# Evaluación por bloques
+# -------------------------------------------------------------------
+# Filas por bloque al evaluar un CSV sin cargarlo entero
+EVAL_CHUNK_ROWS = 100_000
+
+
+class RegressionStats:
+    """
+    Estadísticos suficientes de una regresión acumulados bloque a bloque:
+    n, Σy, Σy², Σe, Σ|e| y Σe² con e = y − ŷ. La varianza de y se combina
+    además como (media, M2) por bloque, que no pierde precisión como
+    Σy² − (Σy)²/n cuando los montos son grandes.
+    """
+
+    def __init__(self):
+        self.n           = 0
+        self.sum_y       = 0.0
+        self.sum_y2      = 0.0
+        self.sum_err     = 0.0
+        self.sum_abs_err = 0.0
+        self.sum_sq_err  = 0.0
+        self._mean       = 0.0
+        self._m2         = 0.0
+
+    def update(self, y_true, y_pred):
+        y = np.asarray(y_true, dtype="float64")
+        p = np.asarray(y_pred, dtype="float64")
+        if np.isnan(y).any() or np.isnan(p).any():
+            raise ValueError("Input contains NaN.")
+        k = len(y)
+        if not k:
+            return
+        err = y - p
+        self.sum_y       += y.sum()
+        self.sum_y2      += np.dot(y, y)
+        self.sum_err     += err.sum()
+        self.sum_abs_err += np.abs(err).sum()
+        self.sum_sq_err  += np.dot(err, err)
+
+        mean_k = y.mean()
+        m2_k   = np.square(y - mean_k).sum()
+        total  = self.n + k
+        delta  = mean_k - self._mean
+        self._m2   += m2_k + delta * delta * self.n * k / total
+        self._mean += delta * k / total
+        self.n      = total
+
+    def metrics(self) -> dict:
+        """
+        R2, MAE, MSE y RMSE con las mismas convenciones que sklearn.
+        """
+        if self.n == 0:
+            raise ValueError("No hay filas para evaluar.")
+        mse = self.sum_sq_err / self.n
+        if self.n < 2:
+            r2 = float("nan")
+        elif self._m2 == 0:
+            r2 = 1.0 if self.sum_sq_err == 0 else 0.0
+        else:
+            r2 = 1.0 - self.sum_sq_err / self._m2
+        return {
+            "r2":   float(r2),
+            "mae":  float(self.sum_abs_err / self.n),
+            "mse":  float(mse),
+            "rmse": float(mse ** 0.5),
+        }
 
-    # 5) Predicción
-    preds = model.predict(X_aligned)
-    return preds.tolist()
 
 def evaluate_model(df: pd.DataFrame):
     """
@@ -123,27 +254,80 @@ def evaluate_model(df: pd.DataFrame):
     # 1) Detectar columna objetivo
     target_col = get_target_column_name(df)
 
-    y_true = df[target_col]
+    y_true = df[target_col].to_numpy(dtype="float64")
     X_raw = df.drop([target_col], axis=1, errors="ignore")
 
-    # 2) Crear dummies y alinear
-    X_encoded = pd.get_dummies(X_raw, drop_first=True)
-    trained_features = load_feature_names()
-    X_aligned = X_encoded.reindex(columns=trained_features, fill_value=0)
-
-    # 3) Cargar modelo y predecir
-    model = load_model()
-    y_pred = model.predict(X_aligned)
-
-    # 4) Métricas
-    r2   = r2_score(y_true, y_pred)
-    mae  = mean_absolute_error(y_true, y_pred)
-    mse  = mean_squared_error(y_true, y_pred)
-    rmse = mse ** 0.5
-
-    return {
-        "r2": float(r2),
-        "mae": float(mae),
-        "mse": float(mse),
-        "rmse": float(rmse)
-    }
+    # 2-4) Codificar, alinear, predecir y acumular métricas por bloques
+    model   = load_predictor()
+    with stage("encode", rows=len(X_raw)):
+        encoded = load_encoder().compile(X_raw)
+    stats   = RegressionStats()
+    for start, X_chunk in encoded.iter_chunks():
+        stats.update(y_true[start:start + len(X_chunk)], model.predict(X_chunk))
+    return stats.metrics()
+
+
+def _csv_levels(path, chunk_rows: int, progress=None) -> dict:
+    """
+    Primera pasada sobre el CSV: niveles (ordenados) de cada columna de
+    texto en todo el archivo, para que drop_first descarte el mismo nivel
+    que al leerlo entero. Guarda sólo los valores distintos.
+    """
+    size = max(1, os.path.getsize(path))
+    levels, numeric_seen = {}, set()
+    with open(path, "rb") as f:
+        for chunk in pd.read_csv(f, encoding="latin1", chunksize=chunk_rows):
+            for col in chunk.columns:
+                s = chunk[col]
+                if s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+                    levels.setdefault(col, set()).update(s.dropna().unique())
+                elif s.notna().any():
+                    numeric_seen.add(col)
+            if progress:
+                progress(f.tell() / size)
+
+    # Columnas con bloques numéricos y bloques de texto: leídas enteras
+    # serían texto, así que se releen como texto para no perder niveles.
+    mixed = [c for c in levels if c in numeric_seen]
+    if mixed:
+        for chunk in pd.read_csv(path, encoding="latin1", chunksize=chunk_rows,
+                                 usecols=mixed, dtype=str):
+            for col in mixed:
+                levels[col].update(chunk[col].dropna().unique())
+
+    return {col: pd.CategoricalDtype(sorted(values)) for col, values in levels.items()}
+
+
+def evaluate_csv(path, model=None, chunk_rows: int = EVAL_CHUNK_ROWS, progress=None) -> dict:
+    """
+    Métricas del modelo sobre un CSV leído por bloques, con memoria
+    acotada por `chunk_rows`. Da lo mismo que evaluate_model(load_data(path)).
+    `progress(fraccion)` se llama a medida que avanza la lectura.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No encontré el archivo CSV en la ruta: {path}")
+    model = model if model is not None else load_predictor()
+
+    with stage("csv_levels"):
+        dtypes = _csv_levels(path, chunk_rows, progress and (lambda x: progress(0.5 * x)))
+
+    size      = max(1, os.path.getsize(path))
+    encoder   = load_encoder()
+    lut_cache = {}
+    stats     = RegressionStats()
+    with open(path, "rb") as f:
+        reader = pd.read_csv(f, encoding="latin1", chunksize=chunk_rows,
+                             dtype={c: str for c in dtypes})
+        for chunk in reader:
+            target_col = get_target_column_name(chunk)
+            for col, dtype in dtypes.items():
+                if col in chunk.columns and col != target_col:
+                    chunk[col] = pd.Categorical(chunk[col], dtype=dtype)
+            y_true  = chunk[target_col].to_numpy(dtype="float64")
+            with stage("encode", rows=len(chunk)):
+                encoded = encoder.compile(chunk.drop(columns=[target_col]), lut_cache=lut_cache)
+            for start, X_chunk in encoded.iter_chunks():
+                stats.update(y_true[start:start + len(X_chunk)], model.predict(X_chunk))
+            if progress:
+                progress(0.5 + 0.5 * f.tell() / size)
+    return stats.metrics()
@@ -0,0 +1,297 @@
+# backend/prediction_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# Tope de entradas y de memoria (MB de predicciones) del nivel en proceso
+PREDICTION_CACHE_ENTRIES = int(os.environ.get("PREDICTION_CACHE_ENTRIES", 4096))
+PREDICTION_CACHE_MB      = float(os.environ.get("PREDICTION_CACHE_MB", 64))
+# Vida de una entrada en segundos (0 = sin vencimiento)
+PREDICTION_CACHE_TTL     = float(os.environ.get("PREDICTION_CACHE_TTL", 900))
+# Carpeta del nivel en disco (sqlite); sin definir no se usa disco.
+# Sobrevive a los reinicios y la comparten los workers de serve.py.
+PREDICTION_CACHE_DIR     = os.environ.get("PREDICTION_CACHE_DIR") or None
+PREDICTION_CACHE_DISK_ENTRIES = int(os.environ.get("PREDICTION_CACHE_DISK_ENTRIES", 100_000))
+
+
+def key_digest(key: tuple) -> str:
+    """
+    Clave estable entre procesos y reinicios (hash() de Python no lo es).
+    """
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    Huella del contenido de un DataFrame: columnas, dtypes y hash por
+    fila. Lanza TypeError si alguna celda no es hasheable (listas, dicts).
+    """
+    h = hashlib.sha256()
+    h.update(repr([(c, str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def unique_rows(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Filas distintas de `df`: devuelve (posición de la primera aparición de
+    cada una, código de cada fila), con preds = preds_unicas[codigos].
+    None si no hay repetidas o si las celdas no se pueden comparar.
+    """
+    if len(df) < 2 or df.shape[1] == 0:
+        return None
+    try:
+        codes = df.groupby(list(df.columns), dropna=False, sort=False).ngroup().to_numpy()
+    except (TypeError, ValueError):
+        return None
+    _, first = np.unique(codes, return_index=True)
+    if len(first) == len(df):
+        return None
+    return first, codes
+
+
+# -------------------------------------------------------------------
+# Nivel en disco
+# -------------------------------------------------------------------
+class _DiskTier:
+    """
+    Tabla sqlite clave → (vencimiento, predicciones float32). Cada proceso
+    abre su propia conexión (también después de un fork).
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int):
+        self.path        = Path(directory) / "predictions.sqlite"
+        self.max_entries = max_entries
+        self._conn       = None
+        self._pid        = None
+        self._lock       = threading.Lock()
+        self._writes     = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS predictions ("
+                         "key TEXT PRIMARY KEY, expires REAL, value BLOB)")
+            conn.execute("DELETE FROM predictions WHERE expires > 0 AND expires < ?", (time.time(),))
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, digest: str):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires, value FROM predictions WHERE key = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        expires, value = row
+        if expires and expires < time.time():
+            return None
+        return expires, np.frombuffer(value, dtype="<f4")
+
+    def put(self, digest: str, expires: float, value: np.ndarray):
+        blob = np.ascontiguousarray(value, dtype="<f4").tobytes()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                         (digest, expires, blob))
+            self._writes += 1
+            if self._writes % 256 == 0:
+                self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM predictions WHERE expires > 0 AND expires < ?", (time.time(),))
+        conn.execute("DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+                     "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM predictions")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+
+# -------------------------------------------------------------------
+# Caché de predicciones
+# -------------------------------------------------------------------
+class PredictionCache:
+    """
+    LRU de predicciones (arrays float32 de sólo lectura) acotado por
+    cantidad de entradas, por bytes y por antigüedad (TTL). Las claves
+    incluyen la versión del modelo y el hash del dataset, así que una
+    entrada de otra versión nunca coincide; además `invalidate()` vacía
+    todo al subir un CSV o recargar modelos.
+
+    Con `disk_dir` se agrega un segundo nivel en sqlite: un fallo en
+    memoria se busca ahí antes de predecir y cada entrada nueva se
+    escribe en ambos.
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_ENTRIES,
+                 max_bytes: int = int(PREDICTION_CACHE_MB * 1024 * 1024),
+                 ttl: float = PREDICTION_CACHE_TTL,
+                 disk_dir: str | Path | None = PREDICTION_CACHE_DIR,
+                 disk_entries: int = PREDICTION_CACHE_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.ttl         = ttl
+        self.disk        = _DiskTier(disk_dir, disk_entries) if disk_dir else None
+        self._entries: OrderedDict = OrderedDict()   # clave → (vencimiento, array)
+        self._bytes      = 0
+        self._lock       = threading.Lock()
+        self._counts     = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0,
+                            "expirations": 0, "invalidations": 0, "rows_deduplicated": 0,
+                            "disk_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    # ---------------------------------------------------------------
+    # Acceso
+    # ---------------------------------------------------------------
+    def get(self, key: tuple) -> np.ndarray | None:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires, value = item
+                if expires and expires < now:
+                    self._drop(key)
+                    self._counts["expirations"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return value
+
+        if self.disk is not None:
+            try:
+                found = self.disk.get(key_digest(key))
+            except sqlite3.Error:
+                found = None
+                self._count("disk_errors")
+            if found is not None:
+                expires, value = found
+                value.setflags(write=False)
+                with self._lock:
+                    self._store(key, expires, value)
+                    self._counts["disk_hits"] += 1
+                return value
+
+        self._count("misses")
+        return None
+
+    def put(self, key: tuple, value) -> np.ndarray:
+        """
+        Guarda `value` (se convierte a float32 de sólo lectura) y lo devuelve.
+        """
+        value = np.array(value, dtype="float32", ndmin=1)
+        value.setflags(write=False)
+        if not self.enabled or value.nbytes > self.max_bytes:
+            return value
+        expires = time.time() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            self._store(key, expires, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key_digest(key), expires, value)
+            except sqlite3.Error:
+                self._count("disk_errors")
+        return value
+
+    def get_or_compute(self, key: tuple, compute) -> np.ndarray:
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def record_deduplicated(self, n_rows: int):
+        self._count("rows_deduplicated", n_rows)
+
+    # ---------------------------------------------------------------
+    # Internos (con el lock tomado)
+    # ---------------------------------------------------------------
+    def _store(self, key, expires: float, value: np.ndarray):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (expires, value)
+        self._bytes += value.nbytes
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._counts["evictions"] += 1
+
+    def _drop(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= value.nbytes
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counts[name] += n
+
+    # ---------------------------------------------------------------
+    # Invalidación y estadísticas
+    # ---------------------------------------------------------------
+    def invalidate(self):
+        """
+        Vacía ambos niveles (nuevo CSV o modelos recargados).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counts["invalidations"] += 1
+        if self.disk is not None:
+            try:
+                self.disk.clear()
+            except sqlite3.Error:
+                self._count("disk_errors")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts  = dict(self._counts)
+            entries = len(self._entries)
+            size    = self._bytes
+        lookups = counts["hits"] + counts["disk_hits"] + counts["misses"]
+        disk = None
+        if self.disk is not None:
+            try:
+                disk = {"path": str(self.disk.path), "entries": self.disk.count(),
+                        "max_entries": self.disk.max_entries}
+            except sqlite3.Error:
+                disk = {"path": str(self.disk.path), "entries": None,
+                        "max_entries": self.disk.max_entries}
+        return {
+            **counts,
+            "hit_rate":    (counts["hits"] + counts["disk_hits"]) / lookups if lookups else None,
+            "entries":     entries,
+            "max_entries": self.max_entries,
+            "bytes":       size,
+            "max_bytes":   self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "disk":        disk,
+        }
+
+
+prediction_cache = PredictionCache()
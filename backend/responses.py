@@ -0,0 +1,181 @@
+# backend/responses.py
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from backend.instrumentation import stage
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la stdlib
+    orjson = None
+
+# opcional: sin pyarrow no se ofrece Arrow IPC (se importa en el primer uso)
+pa = lazy_import("pyarrow") if importlib.util.find_spec("pyarrow") else None
+
+# -------------------------------------------------------------------
+# Formatos de respuesta
+# -------------------------------------------------------------------
+# JSON      forma original de cada endpoint (por defecto, el frontend usa esta)
+# COLUMNAR  {"columns": [...], "data": [[col 1], [col 2], ...]}: una lista
+#           por columna en vez de un dict por fila
+# ARROW     Apache Arrow IPC (stream) con la misma tabla, para clientes de
+#           datos (pyarrow, polars, DuckDB...)
+# FLOAT32   binario float32 little-endian; sólo para una columna numérica
+#           (las predicciones)
+JSON     = "application/json"
+COLUMNAR = "application/x-columnar+json"
+ARROW    = "application/vnd.apache.arrow.stream"
+FLOAT32  = "application/octet-stream"
+
+# Alias de ?output= para elegir el formato sin tocar el header Accept
+OUTPUTS = {"json": JSON, "columnar": COLUMNAR, "arrow": ARROW, "f32": FLOAT32}
+OUTPUT_PATTERN = "^(" + "|".join(OUTPUTS) + ")$"
+
+TABLE_FORMATS  = (JSON, COLUMNAR, ARROW)
+VECTOR_FORMATS = (JSON, COLUMNAR, ARROW, FLOAT32)
+
+
+def negotiate(accept: str | None, output: str | None = None,
+              offered: tuple = TABLE_FORMATS) -> str:
+    """
+    Elige el formato: `output` si vino, si no el primer tipo del header
+    Accept (por q) que el endpoint ofrezca. Sin Accept o con */* es JSON.
+    Lanza 406 si no hay ninguno aceptable.
+    """
+    if output:
+        media = OUTPUTS[output]
+        if media not in offered:
+            raise HTTPException(406, f"Formato '{output}' no disponible en este endpoint.")
+        return _available(media)
+    if not accept:
+        return JSON
+
+    ranges = []
+    for i, part in enumerate(accept.split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if media and q > 0:
+            ranges.append((-q, i, media.lower()))
+    for _, _, media in sorted(ranges):
+        if media in ("*/*", "application/*") or media == JSON:
+            return JSON
+        if media in offered and (media != ARROW or pa is not None):
+            return media
+    raise HTTPException(406, f"Formatos disponibles: {', '.join(offered)}")
+
+
+def _available(media: str) -> str:
+    if media == ARROW and pa is None:
+        raise HTTPException(406, "Arrow IPC no disponible: pyarrow no está instalado.")
+    return media
+
+
+# -------------------------------------------------------------------
+# Codificadores
+# -------------------------------------------------------------------
+def dumps(obj) -> bytes:
+    """
+    JSON compacto. Con orjson los arrays numpy se serializan sin pasar
+    por listas de Python; sin orjson queda igual que JSONResponse.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_plain(obj), default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _default(obj):
+    # Lo que el encoder no conoce (Timestamp, Decimal...) se convierte
+    # igual que antes lo hacía FastAPI
+    return jsonable_encoder(obj)
+
+
+def _plain(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_plain(v) for v in obj]
+    return obj
+
+
+def _json_column(values):
+    """
+    Columna lista para dumps(): numérica como array float64/int64
+    (mismo texto que float() de Python), el resto como lista.
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind == "f":
+        return np.ascontiguousarray(arr, dtype=np.float64)
+    if arr.dtype.kind in "iub":
+        return np.ascontiguousarray(arr, dtype=np.int64)
+    if arr.dtype.kind == "M":
+        return [None if pd.isna(t) else t.isoformat() for t in pd.DatetimeIndex(arr)]
+    return arr.tolist()
+
+
+def columnar(table: dict, **extra) -> bytes:
+    """
+    {"columns": [...], "data": [...]} de una tabla {columna: valores}.
+    """
+    return dumps({**extra, "columns": list(table),
+                  "data": [_json_column(v) for v in table.values()]})
+
+
+def arrow(table: dict) -> bytes:
+    """
+    Tabla como stream Arrow IPC.
+    """
+    batch = pa.table({name: pa.array(np.asarray(v) if np.asarray(v).dtype.kind in "fiub"
+                                      else list(v))
+                      for name, v in table.items()})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    return sink.getvalue()
+
+
+def float32(values) -> bytes:
+    return np.ascontiguousarray(values, dtype="<f4").tobytes()
+
+
+# -------------------------------------------------------------------
+# Respuesta
+# -------------------------------------------------------------------
+def respond(media: str, payload, table=None) -> Response:
+    """
+    Respuesta en el formato elegido. `payload` es el JSON de siempre (o
+    una función que lo arma) y `table` una función que devuelve la misma
+    información como {columna: valores}; sólo se llama la que hace falta.
+    """
+    with stage("serialize"):
+        if media == JSON:
+            body = dumps(payload() if callable(payload) else payload)
+            return Response(body, media_type=JSON)
+        data = table()
+        if media == COLUMNAR:
+            return Response(columnar(data), media_type=COLUMNAR)
+        if media == ARROW:
+            return Response(arrow(data), media_type=ARROW)
+        values, = data.values()
+        return Response(float32(values), media_type=FLOAT32,
+                        headers={"X-Rows": str(len(values)), "X-Dtype": "float32-le"})
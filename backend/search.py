@@ -0,0 +1,168 @@
+# backend/search.py
+
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# -------------------------------------------------------------------
+# Configuración
+# -------------------------------------------------------------------
+# Catálogos buscables: nombre en la URL → columna del dataset
+SEARCH_COLUMNS = {
+    "products":      "Product Name",
+    "customers":     "Customer Name",
+    "subcategories": "Sub-Category",
+}
+
+# Orden de los resultados: alfabético (sin acentos), o por filas / ventas
+SORTS = ("name", "rows", "sales")
+
+# Caracteres de cada clave del índice de prefijos. Las búsquedas más
+# largas se buscan por sus primeros KEY_CHARS y se verifican completas,
+# también desde un comienzo de palabra.
+KEY_CHARS = 32
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text) -> str:
+    """
+    Texto para comparar: sin acentos ni diacríticos, en minúsculas y con
+    los espacios colapsados ("Pañuelo  Ñandú" → "panuelo nandu").
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped   = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+# -------------------------------------------------------------------
+# Índice de búsqueda de una columna
+# -------------------------------------------------------------------
+class SearchIndex:
+    """
+    Valores distintos de una columna (los del índice del snapshot) con
+    sus filas y su total de ventas, y un índice de prefijos: una clave
+    normalizada por cada comienzo de palabra de cada valor, ordenadas.
+    Una búsqueda es una bisección sobre las claves más una máscara sobre
+    los valores para quitar repetidos y dejarlos en el orden pedido, así
+    que no recorre el dataset ni compara texto.
+    """
+
+    def __init__(self, snapshot, column: str, previous: SearchIndex | None = None):
+        self.version = snapshot.version
+        self.column  = column
+        col = snapshot.index.column(column)
+        if col is None:
+            raise KeyError(f"No existe la columna '{column}'.")
+
+        present = np.flatnonzero(col.counts > 0)
+        values  = col.levels[present].tolist()
+        rows    = col.counts[present]
+        if "Sales" in snapshot.columns:
+            sales = np.nan_to_num(snapshot.select(["Sales"])["Sales"].to_numpy(dtype="float64"))
+            valid = col.codes >= 0
+            sales = np.bincount(col.codes[valid], weights=sales[valid], minlength=len(col.levels))[present]
+        else:
+            sales = np.zeros(len(present))
+
+        # Con el índice anterior (CSV anexado) no se renormaliza lo que ya estaba
+        known      = dict(zip(previous.values, previous.normalized)) if previous is not None else {}
+        normalized = [known.get(v) or normalize(v) for v in values]
+
+        # El id de cada valor es su posición en orden alfabético sin acentos
+        order = sorted(range(len(values)), key=lambda i: (normalized[i], str(values[i])))
+        self.values     = [values[i] for i in order]
+        self.normalized = [normalized[i] for i in order]
+        self.rows       = np.asarray(rows, dtype="int64")[order]
+        self.sales      = np.asarray(sales, dtype="float64")[order]
+
+        keys = sorted((text[m.start():m.start() + KEY_CHARS], i)
+                      for i, text in enumerate(self.normalized) for m in _WORD.finditer(text))
+        self._keys = [k for k, _ in keys]
+        self._ids  = np.fromiter((i for _, i in keys), dtype=np.int32, count=len(keys))
+
+        # Por cada orden: posición → id y su inversa id → posición
+        n = len(self.values)
+        self._order = {"name": np.arange(n)}
+        self._order["rows"]  = np.lexsort((np.arange(n), -self.rows))
+        self._order["sales"] = np.lexsort((np.arange(n), -self.sales))
+        self._rank = {}
+        for sort, ids in self._order.items():
+            rank = np.empty(n, dtype=np.int64)
+            rank[ids] = np.arange(n)
+            self._rank[sort] = rank
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _matches(self, q: str) -> np.ndarray:
+        key = q[:KEY_CHARS]
+        lo  = bisect_left(self._keys, key)
+        hi  = bisect_left(self._keys, key + "\U0010ffff")
+        ids = self._ids[lo:hi]
+        if len(q) > KEY_CHARS:
+            ids = np.array([i for i in set(ids.tolist()) if self._word_prefix(self.normalized[i], q)],
+                           dtype=np.int32)
+        return ids
+
+    @staticmethod
+    def _word_prefix(text: str, q: str) -> bool:
+        return any(text.startswith(q, m.start()) for m in _WORD.finditer(text))
+
+    def search(self, query: str = "", limit: int = 20, offset: int = 0,
+               sort: str = "name", totals: bool = False) -> dict:
+        """
+        Valores con alguna palabra que empieza por `query` (sin distinguir
+        mayúsculas ni acentos; vacío = todos), ordenados por `sort` y
+        paginados con limit/offset. Con `totals` cada ítem lleva sus filas
+        y su total de ventas.
+        """
+        order = self._order[sort]
+        q     = normalize(query)
+        if q:
+            mask = np.zeros(len(self.values), dtype=bool)
+            mask[self._rank[sort][self._matches(q)]] = True
+            positions = np.flatnonzero(mask)
+            total = len(positions)
+            page  = order[positions[offset:offset + limit]]
+        else:
+            total = len(self.values)
+            page  = order[offset:offset + limit]
+
+        if totals:
+            items = [{"value": self.values[i], "rows": int(self.rows[i]), "sales": float(self.sales[i])}
+                     for i in page.tolist()]
+        else:
+            items = [{"value": self.values[i]} for i in page.tolist()]
+        return {"query": query, "total": total, "offset": offset, "limit": limit, "items": items}
+
+
+# -------------------------------------------------------------------
+# Índices vigentes (uno por catálogo y versión del dataset)
+# -------------------------------------------------------------------
+_lock = threading.Lock()
+_current: dict[str, SearchIndex] = {}
+
+
+def get_search_index(snapshot, kind: str) -> SearchIndex:
+    """
+    Índice de búsqueda del catálogo `kind` (ver SEARCH_COLUMNS) para el
+    snapshot dado; se reconstruye sólo cuando cambia la versión del dataset.
+    """
+    column = SEARCH_COLUMNS[kind]
+    index  = _current.get(column)
+    if index is not None and index.version == snapshot.version:
+        return index
+    with _lock:
+        index = _current.get(column)
+        if index is None or index.version != snapshot.version:
+            index = SearchIndex(snapshot, column, previous=index)
+            _current[column] = index
+        return index
@@ -0,0 +1,128 @@
+# backend/serve.py
+#
+# Arranque con varios workers que comparten dataset y modelos:
+#
+#   python -m backend.serve --host 0.0.0.0 --port 8000 --workers 4
+#
+# El proceso padre abre el socket, importa la app y deserializa los
+# modelos una sola vez; después hace fork() de los workers, que heredan
+# esas páginas copy-on-write (gc.freeze() evita que el recolector las
+# toque y las duplique). El dataset ya vive en la caché columnar
+# memory-mapped, así que todos los workers comparten la caché de páginas
+# del sistema, y el puntero CURRENT.json de la caché hace que todos vean
+# la misma versión apenas un worker termina un /upload_csv.
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Espera antes de reemplazar un worker que murió (evita un bucle de fork)
+RESPAWN_DELAY = 1.0
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _preload():
+    """
+    Importa la app y carga en el padre todo lo que conviene compartir.
+    """
+    from backend.main import app
+    from backend.warmup import warmup
+
+    # Precalentamiento completo en el padre: los workers nacen listos
+    warmup.run()
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    config = uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=30)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(app, sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(app, sock, log_level)
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str, port: int, workers: int = WORKERS, log_level: str = "info"):
+    """
+    Sirve la app con `workers` procesos sobre un mismo socket. Con un
+    solo worker no hay fork: equivale a `uvicorn backend.main:app`.
+    """
+    sock = _bind(host, port)
+    # backend.inference reparte los núcleos entre los workers
+    os.environ["WEB_CONCURRENCY"] = str(max(1, workers))
+    app  = _preload()
+    if workers <= 1 or not hasattr(os, "fork"):
+        _run_worker(app, sock, log_level)
+        return
+
+    children = {_fork_worker(app, sock, log_level) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"[serve] worker {pid} terminó (status {status}); se reemplaza", file=sys.stderr)
+            time.sleep(RESPAWN_DELAY)
+            if not stopping:
+                children.add(_fork_worker(app, sock, log_level))
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API con varios workers (pre-fork)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Procesos que atienden peticiones (WEB_CONCURRENCY)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.log_level)
@@ -0,0 +1,140 @@
+# backend/warmup.py
+
+import os
+import threading
+import time
+
+from backend import lazy
+from backend.dataset import dataset_manager
+from backend.feature_engineering import get_stats_index
+from backend.model_registry import registry
+from backend.search import SEARCH_COLUMNS, get_search_index
+
+# -------------------------------------------------------------------
+# Configuración (variables de entorno)
+# -------------------------------------------------------------------
+# WARMUP_ENABLED=0 no precalienta: todo se carga en el primer uso
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") != "0"
+
+
+# -------------------------------------------------------------------
+# Pasos del precalentamiento
+# -------------------------------------------------------------------
+def _imports():
+    lazy.load_all()
+
+
+def _models():
+    registry.preload()
+
+
+def _dataset():
+    if dataset_manager.current() is None:
+        raise FileNotFoundError("Todavía no hay dataset publicado")
+
+
+def _stats_index():
+    get_stats_index()
+
+
+def _search():
+    snapshot = dataset_manager.current()
+    if snapshot is None:
+        raise FileNotFoundError("Todavía no hay dataset publicado")
+    for kind, column in SEARCH_COLUMNS.items():
+        if column in snapshot.columns:
+            get_search_index(snapshot, kind)
+
+
+def _inference():
+    # Una predicción por modelo crea la copia del Booster de un hilo
+    np = lazy.lazy_import("numpy")
+    for name in registry.artifacts:
+        try:
+            predictor = registry.predictor(name)
+        except Exception:
+            continue
+        predictor.predict(np.zeros((1, predictor.n_features), dtype="float32"))
+
+
+STEPS = (
+    ("imports",     _imports),
+    ("models",      _models),
+    ("dataset",     _dataset),
+    ("stats_index", _stats_index),
+    ("search",      _search),
+    ("inference",   _inference),
+)
+
+
+# -------------------------------------------------------------------
+# Estado del precalentamiento
+# -------------------------------------------------------------------
+class Warmup:
+    """
+    Corre los pasos de STEPS en orden, en un hilo aparte (`start`) o en el
+    hilo actual (`run`, lo usa serve.py antes del fork). Mientras tanto la
+    API ya atiende: las peticiones que llegan antes cargan lo que necesiten
+    en el primer uso. Un paso que lanza FileNotFoundError (sin dataset,
+    sin un modelo) queda como "skipped" y no impide estar listo; cualquier
+    otro error lo deja "failed".
+    """
+
+    def __init__(self, steps=STEPS):
+        self.steps       = steps
+        self.status      = "pending"
+        self.results: dict[str, dict] = {}
+        self.started_at  = None
+        self.seconds     = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self.status != "pending":
+                return False
+            self.status     = "running"
+            self.started_at = time.time()
+            return True
+
+    def start(self) -> bool:
+        if not self._claim():
+            return False
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+        return True
+
+    def run(self):
+        if self._claim():
+            self._run()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self):
+        t0 = time.perf_counter()
+        for name, step in self.steps:
+            s0 = time.perf_counter()
+            try:
+                step()
+                result = {"status": "done"}
+            except FileNotFoundError as e:
+                result = {"status": "skipped", "detail": str(e)}
+            except Exception as e:
+                result = {"status": "failed", "detail": f"{type(e).__name__}: {e}"}
+            result["seconds"] = time.perf_counter() - s0
+            self.results[name] = result
+        self.seconds = time.perf_counter() - t0
+        failed = any(r["status"] == "failed" for r in self.results.values())
+        self.status = "failed" if failed else "ready"
+        self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "ready": self.ready, "seconds": self.seconds,
+                "steps": {name: dict(r) for name, r in list(self.results.items())}}
+
+
+warmup = Warmup()
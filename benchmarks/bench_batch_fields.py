@@ -0,0 +1,64 @@
+# benchmarks/bench_batch_fields.py
+#
+# Throughput de /predict/by_fields/batch frente a un bucle de llamadas a
+# /predict/by_fields con las mismas tuplas.
+#
+#   python -m benchmarks.bench_batch_fields --rows 50000 --tuples 5000
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend import main, feature_engineering
+from benchmarks.synthetic import REGIONS, write_sales_csv
+
+
+def run(rows: int, tuples: int, single_sample: int, model: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_engineering.STATS_PATH = Path(tmp) / "feature_stats.pkl"
+        main.UPLOAD_CSV_PATH = Path(tmp) / "stores_sales_forecasting.csv"
+        csv_path = write_sales_csv(Path(tmp) / "sales.csv", rows)
+        client   = TestClient(main.app)
+        with open(csv_path, "rb") as f:
+            client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")})
+
+        items = [
+            {
+                "region":       REGIONS[i % len(REGIONS)],
+                "product_name": f"Product {i % 1500:05d}",
+                "sub_category": "Chairs",
+                "order_date":   f"2021-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            }
+            for i in range(tuples)
+        ]
+
+        # Bucle sobre el endpoint de una fila (muestra y extrapola)
+        t0 = time.perf_counter()
+        for it in items[:single_sample]:
+            client.post("/predict/by_fields", params={**it, "model": model})
+        single_rps = single_sample / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        resp = client.post(f"/predict/by_fields/batch?model={model}", json=items)
+        batch_rps = tuples / (time.perf_counter() - t0)
+        resp.raise_for_status()
+
+    return {
+        "tuples":          tuples,
+        "single_rows_s":   single_rps,
+        "batch_rows_s":    batch_rps,
+        "speedup":         batch_rps / single_rps,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--tuples", type=int, default=5_000)
+    parser.add_argument("--single-sample", type=int, default=200)
+    parser.add_argument("--model", default="quantity", choices=["profit", "quantity"])
+    args = parser.parse_args()
+    print(run(args.rows, args.tuples, args.single_sample, args.model))
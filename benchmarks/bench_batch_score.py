@@ -0,0 +1,61 @@
+# benchmarks/bench_batch_score.py
+#
+# Escalado de backend.batch_score con la cantidad de procesos: filas/s de
+# una misma entrada con 1, 2, 4… workers (1 hilo de XGBoost cada uno),
+# aceleración respecto de 1 worker y verificación de que la salida es
+# idéntica en todos los casos. Con --workers 0 se mide además la
+# corrida en el mismo proceso, sin pool.
+#
+#   python -m benchmarks.bench_batch_score --rows 500000 --workers 1 2 4 8
+#   python -m benchmarks.bench_batch_score --mode fields --models quantity --rows 1000000
+
+import argparse
+import filecmp
+import tempfile
+from pathlib import Path
+
+from backend.batch_score import run as batch_score
+from benchmarks.synthetic import make_sales_frame
+
+
+def _write_input(path: Path, rows: int, mode: str):
+    df = make_sales_frame(rows)
+    if mode == "fields":
+        df = df.rename(columns={"Region": "region", "Product Name": "product_name",
+                                "Sub-Category": "sub_category", "Order Date": "order_date"})
+        df = df[["region", "product_name", "sub_category", "order_date"]]
+    df.to_csv(path, index=False, encoding="latin1")
+
+
+def run(rows: int, workers: list[int], mode: str, models: list[str], chunk_rows: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        src = tmp / "input.csv"
+        _write_input(src, rows, mode)
+        reference = None
+        for n in workers:
+            out = tmp / f"out_{n}.csv"
+            r = batch_score([src], out, mode=mode, models=models, workers=n, threads=1,
+                            chunk_rows=chunk_rows)
+            if reference is None:
+                reference = out
+            results.append({"workers": n, "rows": r["rows"], "seconds": r["seconds"],
+                            "rows_per_s": r["rows_per_s"],
+                            "same_output": filecmp.cmp(reference, out, shallow=False)})
+    base = next((r["rows_per_s"] for r in results if r["workers"] == 1), results[0]["rows_per_s"])
+    for r in results:
+        r["speedup"] = r["rows_per_s"] / base
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", choices=("rows", "fields"), default="rows")
+    parser.add_argument("--models", nargs="+", default=["profit", "quantity"])
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+    for row in run(args.rows, args.workers, args.mode, args.models, args.chunk_rows):
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
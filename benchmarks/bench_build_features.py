@@ -0,0 +1,59 @@
+# benchmarks/bench_build_features.py
+#
+# Latencia por petición de build_features con el índice de estadísticos
+# ya construido, para datasets de distinto tamaño. Debe mantenerse plana.
+#
+#   python -m benchmarks.bench_build_features --sizes 10000 100000 1000000 10000000
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend import feature_engineering
+from backend.dataset import dataset_manager
+from benchmarks.synthetic import make_sales_frame
+
+
+def run(sizes, calls: int):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_engineering.STATS_PATH = Path(tmp) / "feature_stats.pkl"
+        for n in sizes:
+            df = make_sales_frame(n, n_products=max(1500, n // 100))
+            dataset_manager.publish(df, content_hash=f"bench-{n}")
+
+            t0 = time.perf_counter()
+            feature_engineering.get_stats_index()
+            build_s = time.perf_counter() - t0
+
+            samples = []
+            for i in range(calls):
+                t0 = time.perf_counter()
+                feature_engineering.build_features(
+                    region="West",
+                    product_name=f"Product {i % 1500:05d}",
+                    sub_category="Chairs",
+                    order_date="2016-05-03",
+                )
+                samples.append(time.perf_counter() - t0)
+
+            arr = np.asarray(samples) * 1000
+            results.append({
+                "rows":          n,
+                "index_build_s": build_s,
+                "p50_ms":        float(np.percentile(arr, 50)),
+                "p99_ms":        float(np.percentile(arr, 99)),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.calls):
+        print(row)
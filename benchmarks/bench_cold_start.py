@@ -0,0 +1,169 @@
+# benchmarks/bench_cold_start.py
+#
+# Arranque en frío de la API, siempre en procesos nuevos:
+#   - tiempo de `import backend.main` y qué librerías pesadas quedan cargadas;
+#   - con uvicorn: tiempo hasta que `/` responde (liveness), hasta que
+#     /readyz da 200 (si existe) y hasta la primera /predict/by_fields exitosa.
+# El dataset se sube una vez antes de medir (caché columnar en una carpeta
+# temporal), como en una instancia que se reinicia con datos ya cargados.
+#
+# --tree apunta a otra copia del repo (p.ej. un `git worktree` del commit
+# anterior) para comparar antes/después con los mismos datos:
+#
+#   python -m benchmarks.bench_cold_start --runs 5
+#   python -m benchmarks.bench_cold_start --runs 5 --tree /tmp/antes
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from benchmarks.synthetic import write_sales_csv
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+HEAVY       = ("numpy", "pandas", "pyarrow", "joblib", "xgboost", "sklearn", "scipy")
+
+_IMPORT_SNIPPET = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {HEAVY!r} if sys.modules.get(m) is not None]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+QUERY = {"region": "West", "product_name": "Product 00001", "sub_category": "Chairs",
+         "order_date": "2020-05-04", "model": "quantity"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url: str, method: str = "GET") -> int | None:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=60) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None
+
+
+def import_time(tree: Path, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _start(tree: Path, env: dict, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tree, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def cold_start(tree: Path, env: dict, timeout: float = 120.0) -> dict:
+    port    = _free_port()
+    base    = f"http://127.0.0.1:{port}"
+    predict = f"{base}/predict/by_fields?{urllib.parse.urlencode(QUERY)}"
+    t0      = time.perf_counter()
+    proc    = _start(tree, env, port)
+    result  = {}
+    try:
+        while "live_s" not in result or "first_prediction_s" not in result:
+            if time.perf_counter() - t0 > timeout or proc.poll() is not None:
+                raise RuntimeError(f"La API no respondió: {result}")
+            if "live_s" not in result:
+                if _status(base + "/") == 200:
+                    result["live_s"] = time.perf_counter() - t0
+                else:
+                    time.sleep(0.01)
+                continue
+            if _status(predict, "POST") == 200:
+                result["first_prediction_s"] = time.perf_counter() - t0
+            else:
+                time.sleep(0.01)
+        # Readiness (si la versión medida la tiene)
+        while _status(base + "/readyz") == 503 and time.perf_counter() - t0 < timeout:
+            time.sleep(0.01)
+        if _status(base + "/readyz") == 200:
+            result["ready_s"] = time.perf_counter() - t0
+    finally:
+        _stop(proc)
+    return result
+
+
+def _prepare(tree: Path, env: dict, rows: int, tmp: Path):
+    csv = write_sales_csv(tmp / "sales.csv", rows)
+    port = _free_port()
+    proc = _start(tree, env, port)
+    try:
+        deadline = time.time() + 120
+        while _status(f"http://127.0.0.1:{port}/") != 200:
+            if time.time() > deadline or proc.poll() is not None:
+                raise RuntimeError("No pude arrancar la API para subir el dataset")
+            time.sleep(0.05)
+        boundary = "benchcoldstart"
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"sales.csv\"\r\n"
+                f"Content-Type: text/csv\r\n\r\n").encode() + csv.read_bytes() + f"\r\n--{boundary}--\r\n".encode()
+        req = urllib.request.Request(f"http://127.0.0.1:{port}/upload_csv", data=body, method="POST",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        urllib.request.urlopen(req, timeout=300).read()
+        # Primera predicción: deja persistido el índice de estadísticos
+        urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}/predict/by_fields?{urllib.parse.urlencode(QUERY)}", method="POST"),
+            timeout=120).read()
+    finally:
+        _stop(proc)
+
+
+def run(tree: Path, rows: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        env = {**os.environ, "PARSE_WORKERS": "0",
+               "PYTHONPATH": os.pathsep.join(filter(None, [str(tree), os.environ.get("PYTHONPATH")])),
+               "DATASET_CACHE_DIR": str(tmp / "cache"),
+               "UPLOAD_CSV_PATH": str(tmp / "stores_sales_forecasting.csv")}
+        _prepare(tree, env, rows, tmp)
+
+        imports = [import_time(tree, env) for _ in range(runs)]
+        starts  = [cold_start(tree, env) for _ in range(runs)]
+
+    median = lambda key, rows: statistics.median(r[key] for r in rows) if all(key in r for r in rows) else None
+    return {
+        "tree":               str(tree),
+        "import_s":           median("seconds", imports),
+        "heavy_loaded":       imports[-1]["loaded"],
+        "live_s":             median("live_s", starts),
+        "ready_s":            median("ready_s", starts),
+        "first_prediction_s": median("first_prediction_s", starts),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tree", type=Path, default=PROJECT_DIR, help="Copia del repo a medir")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.tree.resolve(), args.rows, args.runs)
+    print({k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()})
@@ -0,0 +1,66 @@
+# benchmarks/bench_cube.py
+#
+# Latencia de las consultas /kpis y /grouped sobre el cubo pre-agregado
+# para datasets de distinto tamaño (una vez construido el cubo).
+#
+#   python -m benchmarks.bench_cube --sizes 10000 100000 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.aggregates import get_cube
+from backend.dataset import dataset_manager
+from benchmarks.synthetic import make_sales_frame
+
+
+def run(sizes, queries: int):
+    rng = np.random.default_rng(0)
+    results = []
+    for n in sizes:
+        df = make_sales_frame(n)
+        df["Order Date"] = pd.to_datetime(df["Order Date"])
+        snapshot = dataset_manager.publish(df, content_hash=f"bench-{n}")
+
+        t0 = time.perf_counter()
+        cube = get_cube(snapshot)
+        cube.kpis()
+        build_s = time.perf_counter() - t0
+
+        filters = [
+            {
+                "month":   f"{rng.integers(2014, 2021)}-{rng.integers(1, 13):02d}" if i % 2 else None,
+                "vendor":  f"Customer {rng.integers(0, 800):05d}" if i % 3 == 0 else "Todos",
+                "product": f"Product {rng.integers(0, 1500):05d}" if i % 5 == 0 else "Todos",
+            }
+            for i in range(queries)
+        ]
+        # Primera pasada: construye los rollups de cada combinación de filtros
+        for f in filters[:16]:
+            cube.kpis(**f)
+            cube.grouped("Category", **f)
+
+        row = {"rows": n, "build_s": build_s}
+        for name, fn in (("kpis", lambda f: cube.kpis(**f)),
+                         ("grouped", lambda f: cube.grouped("Category", **f))):
+            samples = []
+            for f in filters:
+                t0 = time.perf_counter()
+                fn(f)
+                samples.append(time.perf_counter() - t0)
+            arr = np.asarray(samples) * 1000
+            row[f"{name}_p50_ms"] = float(np.percentile(arr, 50))
+            row[f"{name}_p99_ms"] = float(np.percentile(arr, 99))
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.queries):
+        print(row)
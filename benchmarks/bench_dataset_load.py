@@ -0,0 +1,77 @@
+# benchmarks/bench_dataset_load.py
+#
+# Tiempo de carga y RSS por proceso del dataset: parseo del CSV frente a
+# la caché columnar memory-mapped en frío (parseo + escritura) y en
+# caliente (la caché ya existe). Cada modo corre en un proceso aparte
+# para medir su RSS como lo vería un worker de uvicorn.
+#
+#   python -m benchmarks.bench_dataset_load --rows 1000000
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_sales_csv
+
+
+def _rss_mb() -> float:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _worker(mode: str, csv_path: str, cache_dir: str):
+    """
+    Se ejecuta en el subproceso: carga el dataset y toca las columnas que
+    usarían /kpis y /metadata/regions.
+    """
+    from backend import dataset
+
+    dataset.CACHE_DIR = "" if mode == "csv" else cache_dir
+    rss0 = _rss_mb()
+    t0   = time.perf_counter()
+    snapshot = dataset.dataset_manager.load(csv_path)
+    load_s   = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    snapshot.select(["Region"])["Region"].dropna().unique()
+    regions_s = time.perf_counter() - t0
+    snapshot.select(["Order Date", "Customer Name", "Product Name", "Sales", "Profit"])["Sales"].sum()
+
+    print(json.dumps({"mode": mode, "load_s": load_s, "regions_s": regions_s,
+                      "rss_mb": _rss_mb(), "rss_delta_mb": _rss_mb() - rss0}))
+
+
+def run(rows: int):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path  = write_sales_csv(Path(tmp) / "sales.csv", rows)
+        cache_dir = Path(tmp) / "cache"
+        for mode in ("csv", "cold", "warm"):
+            if mode == "cold":
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_dataset_load",
+                 "--worker", mode, str(csv_path), str(cache_dir)],
+                capture_output=True, text=True, check=True,
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "CSV", "CACHE_DIR"))
+    args = parser.parse_args()
+    if args.worker:
+        _worker(*args.worker)
+    else:
+        for row in run(args.rows):
+            print(row)
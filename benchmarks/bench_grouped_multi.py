@@ -0,0 +1,50 @@
+# benchmarks/bench_grouped_multi.py
+#
+# Carga inicial del dashboard: una petición /grouped por campo frente a
+# una sola /grouped/multi con todos los campos (cubo recién construido,
+# como justo después de subir el CSV).
+#
+#   python -m benchmarks.bench_grouped_multi --sizes 100000 1000000
+
+import argparse
+import time
+
+import pandas as pd
+
+from backend.aggregates import SalesCube
+from backend.dataset import dataset_manager
+from benchmarks.synthetic import make_sales_frame
+
+FIELDS = ["Customer Name", "Product Name", "Region", "Product ID", "Category", "Sub-Category"]
+
+
+def run(sizes):
+    results = []
+    for n in sizes:
+        df = make_sales_frame(n)
+        df["Order Date"] = pd.to_datetime(df["Order Date"])
+        snapshot = dataset_manager.publish(df, content_hash=f"bench-{n}")
+
+        row = {"rows": n}
+        for name, fn in (
+            ("per_field_s", lambda cube: [cube.grouped(f) for f in FIELDS]),
+            ("multi_s",     lambda cube: cube.grouped_many([(f,) for f in FIELDS])),
+            ("multi_filtered_s", lambda cube: cube.grouped_many(
+                [(f,) for f in FIELDS], month="2017-03", vendor="Customer 00010")),
+            ("scatter_top_s", lambda cube: cube.grouped_many([("Product Name",)], top=300)),
+        ):
+            cube = SalesCube(snapshot)
+            cube.kpis()
+            t0 = time.perf_counter()
+            fn(cube)
+            row[name] = time.perf_counter() - t0
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+    for row in run(args.sizes):
+        print(row)
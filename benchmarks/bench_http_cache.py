@@ -0,0 +1,74 @@
+# benchmarks/bench_http_cache.py
+#
+# Caché HTTP de las lecturas del dashboard: para cada endpoint, primera
+# petición completa contra revalidación con If-None-Match (304, sin
+# ejecutar el endpoint), y bytes enviados sin comprimir, con gzip y con br.
+#
+#   python -m benchmarks.bench_http_cache --rows 100000 --requests 200
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend import feature_engineering, http_cache, main
+from backend.warmup import warmup
+from benchmarks.synthetic import write_sales_csv
+
+CASES = [
+    ("/metadata/products", {}),
+    ("/kpis", {}),
+    ("/grouped", {"field": "Customer Name"}),
+    ("/grouped/multi", {"fields": ["Region", "Category", "Sub-Category"]}),
+    ("/sales_trend", {"year": 2016}),
+    ("/metrics_xgb", {}),
+]
+
+
+def _ms_per_request(client, path: str, params: dict, headers: dict, requests: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        client.get(path, params=params, headers=headers)
+    return (time.perf_counter() - t0) * 1000 / requests
+
+
+def run(rows: int, requests: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        feature_engineering.STATS_PATH = tmp / "feature_stats.pkl"
+        main.UPLOAD_CSV_PATH = tmp / "stores_sales_forecasting.csv"
+        client = TestClient(main.app)
+        client.__enter__()
+        warmup.wait()   # /metrics_xgb se etiqueta cuando el modelo ya está cargado
+        with open(write_sales_csv(tmp / "sales.csv", rows), "rb") as f:
+            client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")}).raise_for_status()
+
+        for path, params in CASES:
+            row = {"endpoint": path}
+            for encoding in ("identity", "gzip", "br"):
+                if encoding == "br" and http_cache.brotli is None:
+                    continue
+                resp = client.get(path, params=params, headers={"accept-encoding": encoding})
+                resp.raise_for_status()
+                row[f"bytes_{encoding}"] = int(resp.headers["content-length"])
+                if encoding == "identity":
+                    etag = resp.headers["etag"]
+                row[f"full_{encoding}_ms"] = _ms_per_request(
+                    client, path, params, {"accept-encoding": encoding}, requests)
+            row["revalidate_304_ms"] = _ms_per_request(
+                client, path, params, {"accept-encoding": "identity", "if-none-match": etag}, requests)
+            results.append(row)
+        client.__exit__(None, None, None)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    for row in run(args.rows, args.requests):
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
@@ -0,0 +1,101 @@
+# benchmarks/bench_index.py
+#
+# Filtros por cliente / producto / mes: comparación de la columna entera
+# (df["Customer Name"] == v, dt.to_period("M") == Period) frente a la
+# intersección de los índices por valor del snapshot.
+#
+#   python -m benchmarks.bench_index --sizes 100000 1000000 10000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.dataset import dataset_manager
+from backend.dataset_index import month_keys
+
+N_CUSTOMERS = 800
+N_PRODUCTS  = 1500
+
+
+def _frame(n: int, seed: int = 0) -> pd.DataFrame:
+    # Sólo las columnas de filtro: el generador completo no entra en
+    # memoria con 10M filas.
+    rng   = np.random.default_rng(seed)
+    start = np.datetime64("2014-01-01")
+    return pd.DataFrame({
+        "Order Date":    start + rng.integers(0, 7 * 365, n).astype("timedelta64[D]"),
+        "Customer Name": pd.Categorical.from_codes(
+            rng.integers(0, N_CUSTOMERS, n), [f"Customer {c:05d}" for c in range(N_CUSTOMERS)]),
+        "Product Name":  pd.Categorical.from_codes(
+            rng.integers(0, N_PRODUCTS, n), [f"Product {p:05d}" for p in range(N_PRODUCTS)]),
+        "Sales":         rng.gamma(2.0, 120.0, n),
+    })
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples)) * 1000
+
+
+def run(sizes, repeat: int):
+    results = []
+    for n in sizes:
+        df = _frame(n)
+        snapshot = dataset_manager.publish(df, content_hash=f"bench-index-{n}")
+        # Línea base: columnas de texto como las deja read_csv
+        text = pd.DataFrame({"Order Date":    df["Order Date"],
+                             "Customer Name": df["Customer Name"].astype("str"),
+                             "Product Name":  df["Product Name"].astype("str")})
+
+        t0 = time.perf_counter()
+        index = snapshot.index
+        for col in ("Customer Name", "Product Name"):
+            index.column(col)
+        index.month()
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        vendor, product, month = "Customer 00042", "Product 00077", "2017-03"
+        key = int(month_keys(np.array([np.datetime64(month)]))[0])
+        period = pd.Period(month)
+
+        row = {"rows": n, "index_build_ms": build_ms}
+        cases = {
+            "vendor": (
+                lambda: np.flatnonzero(text["Customer Name"] == vendor),
+                lambda: index.rows({"Customer Name": vendor}),
+            ),
+            "month": (
+                lambda: np.flatnonzero(text["Order Date"].dt.to_period("M") == period),
+                lambda: index.rows(month_key=key),
+            ),
+            "vendor_product_month": (
+                lambda: np.flatnonzero((text["Customer Name"] == vendor)
+                                       & (text["Product Name"] == product)
+                                       & (text["Order Date"].dt.to_period("M") == period)),
+                lambda: index.rows({"Customer Name": vendor, "Product Name": product}, key),
+            ),
+        }
+        for name, (scan, indexed) in cases.items():
+            assert np.array_equal(scan(), indexed())
+            scan_ms    = _time(scan, repeat)
+            indexed_ms = _time(indexed, repeat)
+            row[name] = {"scan_ms": scan_ms, "index_ms": indexed_ms,
+                         "speedup": scan_ms / indexed_ms if indexed_ms else float("inf")}
+        results.append(row)
+        del df, text, snapshot, index
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.repeat):
+        print(row)
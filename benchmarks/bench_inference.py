@@ -0,0 +1,92 @@
+# benchmarks/bench_inference.py
+#
+# Inferencia XGBoost: wrapper de sklearn (`model.predict`, lo que se usaba
+# antes) contra el predictor nativo de backend/inference.py
+# (`inplace_predict` sobre float32) en una grilla tamaño de lote × hilos.
+# También corre varias peticiones simultáneas con el presupuesto de hilos
+# automático y con todos los hilos para cada una (sobresuscripción).
+# Verifica además que ambos caminos den exactamente lo mismo.
+#
+#   python -m benchmarks.bench_inference --batches 1 16 256 4096 65536 --threads 1 2 4
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from backend import inference
+from backend.model_registry import registry
+
+
+def _matrix(rows: int, n_features: int, seed: int = 0) -> np.ndarray:
+    # Parecida a la salida del encoder: pocas columnas numéricas y dummies
+    rng = np.random.default_rng(seed)
+    X = (rng.random((rows, n_features)) < 0.02).astype("float32")
+    X[:, :4] = rng.gamma(2.0, 50.0, (rows, 4))
+    return X
+
+
+def _per_row_us(fn, rows: int, min_seconds: float) -> float:
+    fn()   # calentamiento (crea la copia del Booster para esa cantidad de hilos)
+    calls, t0 = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_seconds:
+            return elapsed / (calls * rows) * 1e6
+
+
+def _concurrent(fn, clients: int, calls: int) -> float:
+    threads = [threading.Thread(target=lambda: [fn() for _ in range(calls)])
+               for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return clients * calls / (time.perf_counter() - t0)
+
+
+def run(model_name: str, batches: list[int], threads: list[int], min_seconds: float,
+        clients: int) -> list[dict]:
+    entry     = registry.get(model_name)
+    model     = entry.model
+    predictor = inference.Predictor(model)
+    results   = []
+    for rows in batches:
+        X = _matrix(rows, predictor.n_features)
+        same = np.array_equal(model.predict(X), predictor.predict(X))
+        row = {"rows": rows, "identical": same,
+               "sklearn_us_per_row": _per_row_us(lambda: model.predict(X), rows, min_seconds),
+               "auto_us_per_row":    _per_row_us(lambda: predictor.predict(X), rows, min_seconds)}
+        for t in threads:
+            row[f"native_{t}t_us_per_row"] = _per_row_us(
+                lambda: predictor.predict(X, nthread=t), rows, min_seconds)
+        results.append(row)
+
+    # Peticiones simultáneas: presupuesto repartido vs. todos los hilos cada una
+    X     = _matrix(max(batches), predictor.n_features, seed=1)
+    calls = max(1, int(200_000 / len(X)))
+    total = inference.INFERENCE_THREADS
+    results.append({
+        "concurrent_clients": clients, "rows": len(X), "threads_budget": total,
+        "budget_batches_s":   _concurrent(lambda: predictor.predict(X), clients, calls),
+        "all_threads_batches_s": _concurrent(lambda: predictor.predict(X, nthread=total),
+                                             clients, calls),
+    })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="xgb", choices=["xgb", "profit", "quantity"])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256, 4096, 65536])
+    parser.add_argument("--threads", type=int, nargs="+",
+                        default=sorted({1, 2, 4, inference.INFERENCE_THREADS}))
+    parser.add_argument("--min-seconds", type=float, default=0.5)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+    for row in run(args.model, args.batches, args.threads, args.min_seconds, args.clients):
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
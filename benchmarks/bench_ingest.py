@@ -0,0 +1,75 @@
+# benchmarks/bench_ingest.py
+#
+# Carga diaria: un dataset base grande y un delta chico (con una parte
+# de filas ya cargadas). Compara subir el CSV completo otra vez contra
+# anexar sólo el delta (mode=append), y re-subir el mismo archivo (no-op).
+# Para cada caso se informa filas/s y el tiempo hasta que el dashboard
+# ve los datos (snapshot publicado) y hasta que cubo, series y
+# estadísticos quedan actualizados, tal como los reporta /ingest/stats.
+# Verifica además que /metrics_xgb da lo mismo después del append que
+# después de subir el CSV completo con las mismas filas.
+#
+#   python -m benchmarks.bench_ingest --rows 1000000 --delta 5000
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import make_sales_frame
+
+
+def _upload(client, path: Path, mode: str = "replace") -> dict:
+    with open(path, "rb") as f:
+        resp = client.post("/upload_csv", params={"mode": mode},
+                           files={"file": (path.name, f, "text/csv")})
+    resp.raise_for_status()
+    entry = client.get("/ingest/stats").json()["last"][-1]
+    return {k: entry[k] for k in ("mode", "unchanged", "rows_in", "rows_added", "duplicates",
+                                  "rows_per_second", "visible_seconds", "ready_seconds")}
+
+
+def run(rows: int, delta_rows: int, repeated: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        os.environ.setdefault("DATASET_CACHE_DIR", str(tmp / "cache"))
+        from backend import main
+
+        main.UPLOAD_CSV_PATH = tmp / "stores_sales_forecasting.csv"
+        base  = make_sales_frame(rows, seed=1)
+        delta = make_sales_frame(delta_rows, seed=2)
+        # Una fracción del delta repite filas ya cargadas
+        delta["Row ID"] += rows - int(delta_rows * repeated)
+        fresh = delta[delta["Row ID"] > rows]
+
+        base.to_csv(tmp / "base.csv", index=False, encoding="latin1")
+        delta.to_csv(tmp / "delta.csv", index=False, encoding="latin1")
+        pd.concat([base, fresh]).to_csv(tmp / "full.csv", index=False, encoding="latin1")
+
+        results = []
+        with TestClient(main.app) as client:
+            _upload(client, tmp / "base.csv")
+            client.get("/kpis")
+            results.append({"case": "full re-upload", **_upload(client, tmp / "full.csv")})
+            expected = client.get("/metrics_xgb").json()["metrics"]
+
+            _upload(client, tmp / "base.csv")
+            client.get("/kpis")
+            results.append({"case": "append delta", **_upload(client, tmp / "delta.csv", "append")})
+            results[-1]["same_metrics"] = client.get("/metrics_xgb").json()["metrics"] == expected
+            results.append({"case": "same file again", **_upload(client, tmp / "delta.csv", "append")})
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--delta", type=int, default=5_000)
+    parser.add_argument("--repeated", type=float, default=0.2,
+                        help="Fracción del delta que ya estaba cargada")
+    args = parser.parse_args()
+    for row in run(args.rows, args.delta, args.repeated):
+        print(row)
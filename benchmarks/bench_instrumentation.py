@@ -0,0 +1,83 @@
+# benchmarks/bench_instrumentation.py
+#
+# Costo de la instrumentación de backend/instrumentation.py: latencia de
+# peticiones baratas (/kpis, /metadata/regions, /predict/by_fields ya en
+# caché) con métricas encendidas y apagadas, alternando rondas para que
+# el ruido afecte a ambos casos por igual. También el costo de un
+# `with stage(...)` suelto y de renderizar /metrics.
+#
+#   python -m benchmarks.bench_instrumentation --rows 50000 --rounds 5
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend import feature_engineering, instrumentation, main
+from benchmarks.synthetic import write_sales_csv
+
+PATHS = [
+    ("GET", "/kpis", {}),
+    ("GET", "/metadata/regions", {}),
+    ("POST", "/predict/by_fields", {"region": "West", "product_name": "Product 00010",
+                                    "sub_category": "Chairs", "order_date": "2017-05-01",
+                                    "model": "quantity"}),
+]
+
+
+def _loop_us(client, requests: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(requests):
+        method, path, params = PATHS[i % len(PATHS)]
+        client.request(method, path, params=params)
+    return (time.perf_counter() - t0) / requests * 1e6
+
+
+def _stage_ns(n: int = 200_000) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with instrumentation.stage("bench"):
+            pass
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def run(rows: int, requests: int, rounds: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        feature_engineering.STATS_PATH = Path(tmp) / "feature_stats.pkl"
+        main.UPLOAD_CSV_PATH = Path(tmp) / "stores_sales_forecasting.csv"
+        csv_path = write_sales_csv(Path(tmp) / "sales.csv", rows)
+        with TestClient(main.app) as client:
+            with open(csv_path, "rb") as f:
+                client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")})
+            _loop_us(client, requests)   # calentamiento
+
+            times = {True: [], False: []}
+            for _ in range(rounds):
+                for enabled in (True, False):
+                    instrumentation.METRICS_ENABLED = enabled
+                    times[enabled].append(_loop_us(client, requests))
+            stage_on  = _stage_ns()
+            instrumentation.METRICS_ENABLED = False
+            stage_off = _stage_ns()
+            instrumentation.METRICS_ENABLED = True
+
+            t0 = time.perf_counter()
+            body = client.get("/metrics").text
+            render_ms = (time.perf_counter() - t0) * 1000
+
+    on, off = min(times[True]), min(times[False])
+    return {"us_per_request_enabled": on, "us_per_request_disabled": off,
+            "overhead_us": on - off, "overhead_pct": 100 * (on - off) / off,
+            "stage_ns_enabled": stage_on, "stage_ns_disabled": stage_off,
+            "metrics_render_ms": render_ms, "metrics_lines": body.count("\n")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    print(run(args.rows, args.requests, args.rounds))
@@ -0,0 +1,59 @@
+# benchmarks/bench_kpis.py
+#
+# Compara la latencia p50/p99 de /kpis parseando el CSV en cada petición
+# (comportamiento anterior) contra el dataset compartido en memoria.
+#
+#   python -m benchmarks.bench_kpis --rows 100000 --requests 200
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.dataset import dataset_manager
+from benchmarks.synthetic import write_sales_csv
+
+
+def _percentiles(samples):
+    arr = np.asarray(samples) * 1000
+    return {"p50_ms": float(np.percentile(arr, 50)), "p99_ms": float(np.percentile(arr, 99))}
+
+
+def run(rows: int, requests: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_sales_csv(Path(tmp) / "sales.csv", rows)
+        main.UPLOAD_CSV_PATH = Path(tmp) / "stores_sales_forecasting.csv"
+        client   = TestClient(main.app)
+        with open(csv_path, "rb") as f:
+            client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")})
+
+        params = {"month": "2016-03"}
+
+        # Antes: cada petición vuelve a parsear el CSV completo
+        before = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            dataset_manager.load(main.UPLOAD_CSV_PATH)
+            client.get("/kpis", params=params)
+            before.append(time.perf_counter() - t0)
+
+        # Después: el dataset ya está parseado y compartido
+        after = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            client.get("/kpis", params=params)
+            after.append(time.perf_counter() - t0)
+
+    return {"rows": rows, "before": _percentiles(before), "after": _percentiles(after)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+    print(run(args.rows, args.requests))
@@ -0,0 +1,109 @@
+# benchmarks/bench_metrics.py
+#
+# /metrics_xgb: evaluación cargando el CSV entero (evaluate_model) frente
+# a la evaluación por bloques (evaluate_csv), en tiempo y RSS pico (cada
+# modo en un proceso aparte), y la segunda consulta al endpoint, que sale
+# de la caché de métricas. Verifica que las dos evaluaciones, el endpoint
+# y el endpoint en un proceso nuevo (reinicio desde CURRENT.json, sin el
+# CSV subido) den las mismas métricas.
+#
+#   python -m benchmarks.bench_metrics --rows 200000 1000000
+
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_sales_csv
+
+
+def _worker(mode: str, csv_path: str, chunk_rows: int):
+    if mode == "restart":
+        from fastapi.testclient import TestClient
+        from backend import main
+
+        with TestClient(main.app) as client:
+            resp = client.get("/metrics_xgb")
+            resp.raise_for_status()
+        print(json.dumps({"mode": mode, "metrics": resp.json()["metrics"]}))
+        return
+
+    from backend import model_utils
+
+    model_utils.load_model()
+    model_utils.load_encoder()
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    t0   = time.perf_counter()
+    if mode == "full":
+        metrics = model_utils.evaluate_model(model_utils.load_data(csv_path))
+    else:
+        metrics = model_utils.evaluate_csv(csv_path, chunk_rows=chunk_rows)
+    print(json.dumps({"mode": mode, "seconds": time.perf_counter() - t0,
+                      "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      "rss_before_mb": rss0, "metrics": metrics}))
+
+
+def _endpoint(csv_path: Path, tmp: Path) -> dict:
+    from fastapi.testclient import TestClient
+    from backend import dataset, main
+
+    dataset.CACHE_DIR    = os.environ["DATASET_CACHE_DIR"]
+    main.UPLOAD_CSV_PATH = tmp / "upload.csv"
+    out = {}
+    with TestClient(main.app) as client, open(csv_path, "rb") as f:
+        client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")}).raise_for_status()
+        for name in ("endpoint_first_s", "endpoint_cached_s"):
+            t0 = time.perf_counter()
+            resp = client.get("/metrics_xgb")
+            resp.raise_for_status()
+            out[name] = time.perf_counter() - t0
+    out["metrics"] = resp.json()["metrics"]
+    main.UPLOAD_CSV_PATH.unlink()
+    return out
+
+
+def _same(*results) -> bool:
+    return all(math.isclose(r[k], results[0][k], rel_tol=1e-9, abs_tol=1e-9)
+               for r in results[1:] for k in results[0])
+
+
+def run(sizes, chunk_rows: int):
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            # Cada tamaño con su propia caché, compartida con los subprocesos
+            os.environ["DATASET_CACHE_DIR"] = str(tmp / "cache")
+            csv_path = write_sales_csv(tmp / "sales.csv", n)
+            row = {"rows": n}
+            row.update(_endpoint(csv_path, tmp))
+            for mode in ("full", "chunked", "restart"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_metrics",
+                     "--worker", mode, str(csv_path), "--chunk-rows", str(chunk_rows)],
+                    capture_output=True, text=True, check=True,
+                )
+                row[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            row["same_metrics"] = _same(row.pop("metrics"),
+                                        *(row[m].pop("metrics") for m in ("full", "chunked", "restart")))
+            results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000])
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "CSV"))
+    args = parser.parse_args()
+    if args.worker:
+        _worker(*args.worker, args.chunk_rows)
+    else:
+        for row in run(args.rows, args.chunk_rows):
+            print(row)
@@ -0,0 +1,142 @@
+# benchmarks/bench_mixed_load.py
+#
+# Carga mixta contra un uvicorn real: clientes "pesados" mandan
+# /predict_csv grandes en bucle mientras clientes "livianos" consultan
+# /kpis, /metadata/regions y /sales_trend. Se mide la latencia de los
+# livianos sin carga y bajo carga, y cuántos pesados reciben 429/503.
+#
+#   python -m benchmarks.bench_mixed_load --rows 200000 --heavy 8 --light 4
+#   python -m benchmarks.bench_mixed_load --env INFERENCE_QUEUE=2 --env INFERENCE_WORKERS=1
+
+import argparse
+import collections
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import write_sales_csv
+
+LIGHT_PATHS = [
+    ("/kpis", {}),
+    ("/metadata/regions", {}),
+    ("/sales_trend", {"year": 2017}),
+    ("/kpis", {"month": "2016-03"}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(tmp: Path, extra_env: dict) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env  = {**os.environ,
+            "UPLOAD_CSV_PATH":   str(tmp / "upload.csv"),
+            "DATASET_CACHE_DIR": str(tmp / "cache"),
+            **extra_env}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            httpx.get(url + "/executor/stats", timeout=1.0)
+            return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("uvicorn no arrancó")
+
+
+def _light_loop(url: str, stop: threading.Event, samples: list):
+    with httpx.Client(base_url=url, timeout=60) as client:
+        i = 0
+        while not stop.is_set():
+            path, params = LIGHT_PATHS[i % len(LIGHT_PATHS)]
+            t0 = time.perf_counter()
+            client.get(path, params=params)
+            samples.append(time.perf_counter() - t0)
+            i += 1
+            time.sleep(0.01)
+
+
+def _heavy_loop(url: str, csv_path: Path, stop: threading.Event, codes: collections.Counter):
+    with httpx.Client(base_url=url, timeout=600) as client:
+        while not stop.is_set():
+            with open(csv_path, "rb") as f:
+                resp = client.post("/predict_csv", files={"file": ("batch.csv", f, "text/csv")})
+            codes[resp.status_code] += 1
+            if resp.status_code in (429, 503):
+                time.sleep(float(resp.headers.get("Retry-After", 1)))
+
+
+def _summary(samples: list) -> dict:
+    arr = np.asarray(samples) * 1000
+    if not len(arr):
+        return {"n": 0}
+    return {"n": len(arr), "p50_ms": float(np.percentile(arr, 50)),
+            "p95_ms": float(np.percentile(arr, 95)), "p99_ms": float(np.percentile(arr, 99)),
+            "max_ms": float(arr.max())}
+
+
+def _phase(url: str, csv_path: Path, heavy: int, light: int, seconds: float) -> dict:
+    stop, samples, codes = threading.Event(), [], collections.Counter()
+    threads  = [threading.Thread(target=_light_loop, args=(url, stop, samples)) for _ in range(light)]
+    threads += [threading.Thread(target=_heavy_loop, args=(url, csv_path, stop, codes)) for _ in range(heavy)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {"heavy_clients": heavy, "light": _summary(samples), "heavy_status": dict(codes)}
+
+
+def run(rows: int, dataset_rows: int, heavy: int, light: int, seconds: float, extra_env: dict):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        dataset_csv = write_sales_csv(tmp / "dataset.csv", dataset_rows)
+        batch_csv   = write_sales_csv(tmp / "batch.csv", rows)
+
+        proc, url = _start_server(tmp, extra_env)
+        try:
+            with open(dataset_csv, "rb") as f:
+                httpx.post(url + "/upload_csv", files={"file": ("dataset.csv", f, "text/csv")},
+                           timeout=600).raise_for_status()
+            # Calienta cubo y series antes de medir
+            _phase(url, batch_csv, 0, 1, 1.0)
+
+            results = [_phase(url, batch_csv, 0, light, seconds),
+                       _phase(url, batch_csv, heavy, light, seconds)]
+            results.append({"executor": httpx.get(url + "/executor/stats").json()})
+            return results
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000, help="Filas de cada /predict_csv")
+    parser.add_argument("--dataset-rows", type=int, default=100_000)
+    parser.add_argument("--heavy", type=int, default=8)
+    parser.add_argument("--light", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Variables de entorno para el servidor (p.ej. INFERENCE_QUEUE=2)")
+    args = parser.parse_args()
+    extra = dict(kv.split("=", 1) for kv in args.env)
+    for row in run(args.rows, args.dataset_rows, args.heavy, args.light, args.seconds, extra):
+        print(row)
@@ -0,0 +1,75 @@
+# benchmarks/bench_predict_csv.py
+#
+# Latencia y memoria pico de /predict_csv con el encoder compilado.
+# Con --legacy mide además el camino get_dummies + reindex (sólo viable
+# con pocos miles de filas: expande Order ID, Customer Name, etc.).
+# Con --stream ndjson|csv usa la respuesta en streaming por bloques.
+#
+#   python -m benchmarks.bench_predict_csv --rows 1000000 --stream ndjson
+
+import argparse
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from backend import main, model_utils
+from benchmarks.synthetic import write_sales_csv
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 2**20}
+
+
+def _legacy_predict(df: pd.DataFrame):
+    model = model_utils.load_model()
+    X_raw = df.drop(columns=["Sales"], errors="ignore")
+    X     = pd.get_dummies(X_raw, drop_first=True).reindex(
+        columns=model_utils.load_feature_names(), fill_value=0)
+    return model.predict(X)
+
+
+def run(rows: int, legacy: bool, stream: str | None = None, chunk_rows: int = 50_000):
+    model_utils.load_model()
+    model_utils.load_encoder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_sales_csv(Path(tmp) / "batch.csv", rows)
+        client   = TestClient(main.app)
+
+        params = {"stream": stream, "chunk_rows": chunk_rows} if stream else {}
+
+        def call():
+            with open(csv_path, "rb") as f:
+                files = {"file": ("batch.csv", f, "text/csv")}
+                with client.stream("POST", "/predict_csv", params=params, files=files) as resp:
+                    resp.raise_for_status()
+                    for _ in resp.iter_bytes():
+                        pass
+
+        result = {"rows": rows, "encoder": _measure(call)}
+        if legacy:
+            df = pd.read_csv(csv_path, encoding="latin1")
+            result["legacy"] = _measure(lambda: _legacy_predict(df))
+
+    result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--stream", choices=["ndjson", "csv"])
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+    print(run(args.rows, args.legacy, args.stream, args.chunk_rows))
@@ -0,0 +1,107 @@
+# benchmarks/bench_prediction_cache.py
+#
+# Caché de predicciones. /predict/by_fields con un conjunto chico de
+# combinaciones populares (sorteadas con una Zipf, como muchos usuarios
+# mirando los mismos productos) con la caché apagada y encendida, y con
+# el nivel en disco tras "reiniciar" (caché en memoria vacía). Además
+# /predict con un lote que repite filas: sin quitar repetidas, quitándolas
+# (primer envío) y el mismo lote otra vez (acierto de caché), medido en
+# la función que usa el endpoint, sin el parseo del JSON.
+#
+#   python -m benchmarks.bench_prediction_cache --requests 2000 --distinct 200
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from backend import main, feature_engineering
+from backend.model_utils import predict_array
+from backend.prediction_cache import PredictionCache
+from benchmarks.synthetic import REGIONS, make_sales_frame, write_sales_csv
+
+
+def _by_fields(client, queries: list[dict]) -> dict:
+    t0 = time.perf_counter()
+    for q in queries:
+        client.post("/predict/by_fields", params=q).raise_for_status()
+    elapsed = time.perf_counter() - t0
+    stats = main.prediction_cache.stats()
+    return {"requests_s": len(queries) / elapsed, "ms_per_request": elapsed * 1000 / len(queries),
+            "hit_rate": stats["hit_rate"]}
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def run(rows: int, requests: int, distinct: int, batch_rows: int, duplicated: float, model: str):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        feature_engineering.STATS_PATH = tmp / "feature_stats.pkl"
+        main.UPLOAD_CSV_PATH = tmp / "stores_sales_forecasting.csv"
+        csv_path = write_sales_csv(tmp / "sales.csv", rows)
+        client   = TestClient(main.app)
+        with open(csv_path, "rb") as f:
+            client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")})
+
+        rng     = np.random.default_rng(0)
+        popular = [{"region":       REGIONS[i % len(REGIONS)],
+                    "product_name": f"Product {i:05d}",
+                    "sub_category": "Chairs",
+                    "order_date":   f"2021-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                    "model":        model}
+                   for i in range(distinct)]
+        picks   = np.minimum(rng.zipf(1.3, requests), distinct) - 1
+        queries = [popular[i] for i in picks]
+
+        original = main.prediction_cache
+        try:
+            main.prediction_cache = PredictionCache(max_entries=0, disk_dir=None)
+            results.append({"case": "by_fields sin caché", **_by_fields(client, queries)})
+            main.prediction_cache = PredictionCache(disk_dir=None)
+            results.append({"case": "by_fields caché en memoria", **_by_fields(client, queries)})
+
+            disk = tmp / "prediction_cache"
+            main.prediction_cache = PredictionCache(disk_dir=disk)
+            _by_fields(client, queries)
+            main.prediction_cache = PredictionCache(disk_dir=disk)   # proceso "reiniciado"
+            results.append({"case": "by_fields tras reinicio (disco)", **_by_fields(client, queries)})
+
+            # Lote con una fracción de filas repetidas
+            main.prediction_cache = PredictionCache(disk_dir=None)
+            unique  = make_sales_frame(int(batch_rows * (1 - duplicated)) or 1, seed=4)
+            batch   = pd.concat([unique, unique.sample(batch_rows - len(unique), replace=True,
+                                                       random_state=1)], ignore_index=True)
+            df      = pd.DataFrame(batch.to_dict("records"))
+            plain   = _timed(lambda: predict_array(df))
+            first   = _timed(lambda: main._cached_predict_array(df))
+            again   = _timed(lambda: main._cached_predict_array(df))
+            results.append({"case": f"/predict {batch_rows} filas, {duplicated:.0%} repetidas",
+                            "predict_array_ms": plain * 1000, "first_ms": first * 1000,
+                            "repeated_ms": again * 1000,
+                            "rows_deduplicated": main.prediction_cache.stats()["rows_deduplicated"]})
+        finally:
+            main.prediction_cache = original
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--distinct", type=int, default=200)
+    parser.add_argument("--batch-rows", type=int, default=20_000)
+    parser.add_argument("--duplicated", type=float, default=0.5)
+    parser.add_argument("--model", default="quantity", choices=["profit", "quantity"])
+    args = parser.parse_args()
+    for row in run(args.rows, args.requests, args.distinct, args.batch_rows,
+                   args.duplicated, args.model):
+        print(row)
@@ -0,0 +1,73 @@
+# benchmarks/bench_search.py
+#
+# Búsqueda de productos según el tamaño del catálogo: construcción del
+# índice, latencia de una búsqueda (función y endpoint /search/products)
+# y bytes de la página de autocompletado frente al catálogo entero que
+# devuelve /metadata/products.
+#
+#   python -m benchmarks.bench_search --products 1000 10000 100000 --requests 200
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend import feature_engineering, main
+from backend.search import SEARCH_COLUMNS, SearchIndex
+from benchmarks.synthetic import write_sales_csv
+
+QUERIES = ("p", "product 0", "product 00012", "zzz")
+
+
+def _us_per_call(fn, requests: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / requests
+
+
+def run(rows: int, products: list[int], requests: int) -> list[dict]:
+    results = []
+    for n_products in products:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            feature_engineering.STATS_PATH = tmp / "feature_stats.pkl"
+            main.UPLOAD_CSV_PATH = tmp / "stores_sales_forecasting.csv"
+            with TestClient(main.app) as client:
+                csv = write_sales_csv(tmp / "sales.csv", max(rows, n_products), n_products=n_products)
+                with open(csv, "rb") as f:
+                    client.post("/upload_csv", files={"file": ("sales.csv", f, "text/csv")}).raise_for_status()
+                snapshot = main._get_snapshot()
+
+                t0 = time.perf_counter()
+                index = SearchIndex(snapshot, SEARCH_COLUMNS["products"])
+                row = {"products": len(index), "build_ms": (time.perf_counter() - t0) * 1000}
+
+                for q in QUERIES:
+                    row[f"search_us[{q}]"] = _us_per_call(lambda: index.search(q, limit=20), requests)
+                row["search_sales_us"] = _us_per_call(
+                    lambda: index.search("product 0", limit=20, sort="sales", totals=True), requests)
+
+                headers = {"accept-encoding": "identity"}
+                params  = {"q": "product 0", "limit": 20}
+                client.get("/search/products", params=params, headers=headers).raise_for_status()
+                row["http_search_ms"] = _us_per_call(
+                    lambda: client.get("/search/products", params=params, headers=headers), requests) / 1000
+                row["http_search_bytes"] = len(client.get("/search/products", params=params, headers=headers).content)
+                row["http_catalog_ms"] = _us_per_call(
+                    lambda: client.get("/metadata/products", headers=headers), max(1, requests // 10)) / 1000
+                row["http_catalog_bytes"] = len(client.get("/metadata/products", headers=headers).content)
+                results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    for row in run(args.rows, args.products, args.requests):
+        print({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
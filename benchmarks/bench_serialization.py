@@ -0,0 +1,87 @@
+# benchmarks/bench_serialization.py
+#
+# Costo de serializar respuestas grandes: N predicciones (float32 como
+# las devuelve XGBoost) y una tabla tipo /grouped de N filas. Se compara
+# el camino anterior (lista de floats de Python + jsonable_encoder +
+# JSONResponse, lo que hace FastAPI al devolver un dict) contra cada
+# formato de backend/responses.py. Informa tiempo y tamaño del cuerpo.
+#
+#   python -m benchmarks.bench_serialization --sizes 10000 100000 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend import responses
+
+
+def _best(fn, repeat: int) -> tuple[float, int]:
+    times, size = [], 0
+    for _ in range(repeat):
+        t0   = time.perf_counter()
+        resp = fn()
+        times.append(time.perf_counter() - t0)
+        size = len(resp.body)
+    return min(times), size
+
+
+def _predictions(n: int, repeat: int) -> list[dict]:
+    preds = np.random.default_rng(0).gamma(2.0, 120.0, n).astype("float32")
+    cases = {
+        "before (tolist + jsonable_encoder)":
+            lambda: JSONResponse(jsonable_encoder({"predictions": preds.tolist()})),
+        "json":     lambda: responses.respond(responses.JSON, {"predictions": preds.astype("float64")}),
+        "columnar": lambda: responses.respond(responses.COLUMNAR, None, lambda: {"prediction": preds}),
+        "f32":      lambda: responses.respond(responses.FLOAT32, None, lambda: {"prediction": preds}),
+    }
+    if responses.pa is not None:
+        cases["arrow"] = lambda: responses.respond(responses.ARROW, None, lambda: {"prediction": preds})
+    return [_row("predictions", n, name, *_best(fn, repeat)) for name, fn in cases.items()]
+
+
+def _table(n: int, repeat: int) -> list[dict]:
+    rng = np.random.default_rng(1)
+    df  = pd.DataFrame({
+        "group":          [f"Product {i:07d}" for i in range(n)],
+        "total_sales":    rng.gamma(2.0, 1200.0, n),
+        "total_quantity": rng.integers(1, 500, n),
+        "avg_discount":   rng.random(n),
+        "total_profit":   rng.normal(100.0, 50.0, n),
+    })
+    table = lambda: {c: df[c].to_numpy() for c in df.columns}
+    cases = {
+        "before (records + jsonable_encoder)":
+            lambda: JSONResponse(jsonable_encoder({"data": df.to_dict("records")})),
+        "json":     lambda: responses.respond(responses.JSON, lambda: {"data": df.to_dict("records")}),
+        "columnar": lambda: responses.respond(responses.COLUMNAR, None, table),
+    }
+    if responses.pa is not None:
+        cases["arrow"] = lambda: responses.respond(responses.ARROW, None, table)
+    return [_row("grouped table", n, name, *_best(fn, repeat)) for name, fn in cases.items()]
+
+
+def _row(kind: str, n: int, name: str, seconds: float, size: int) -> dict:
+    return {"payload": kind, "rows": n, "format": name,
+            "ms": round(seconds * 1000, 2), "mb": round(size / 1e6, 3)}
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    rows = []
+    for n in sizes:
+        rows += _predictions(n, repeat)
+        rows += _table(n, repeat)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"orjson: {responses.orjson is not None}  pyarrow: {responses.pa is not None}")
+    for row in run(args.sizes, args.repeat):
+        print(row)
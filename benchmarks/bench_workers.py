@@ -0,0 +1,173 @@
+# benchmarks/bench_workers.py
+#
+# Rendimiento y memoria de `python -m backend.serve` con 1, 2, 4 y 8
+# workers: peticiones por segundo de lectura (/kpis, /grouped,
+# /metadata, /predict/by_fields) con varios clientes, y memoria total
+# del árbol de procesos como suma de RSS y de PSS (PSS reparte las
+# páginas compartidas entre los procesos que las usan, así que muestra
+# lo que realmente cuesta cada worker extra).
+#
+# También verifica que tras un /upload_csv todos los workers responden
+# con la versión nueva.
+#
+#   python -m benchmarks.bench_workers --dataset-rows 500000 --workers 1 2 4 8
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.synthetic import write_sales_csv
+
+READ_PATHS = [
+    ("GET", "/kpis", {}),
+    ("GET", "/kpis", {"month": "2016-03"}),
+    ("GET", "/grouped", {"field": "Region"}),
+    ("GET", "/metadata/regions", {}),
+    ("POST", "/predict/by_fields", {"region": "West", "product_name": "Staples",
+                                    "sub_category": "Binders", "order_date": "2017-05-01",
+                                    "model": "quantity"}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(tmp: Path, workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env  = {**os.environ,
+            "UPLOAD_CSV_PATH":   str(tmp / "upload.csv"),
+            "DATASET_CACHE_DIR": str(tmp / "cache")}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            httpx.get(url + "/executor/stats", timeout=1.0)
+            return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("el servidor no arrancó")
+
+
+def _tree_pids(root: int) -> list[int]:
+    children = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _memory_mb(root: int) -> dict:
+    rss = pss = 0
+    for pid in _tree_pids(root):
+        try:
+            for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Rss:"):
+                    rss += int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss += int(line.split()[1])
+        except OSError:
+            continue
+    return {"rss_mb": rss / 1024, "pss_mb": pss / 1024}
+
+
+def _client_loop(url: str, stop: threading.Event, counts: list, errors: list):
+    with httpx.Client(base_url=url, timeout=60) as client:
+        i = 0
+        while not stop.is_set():
+            method, path, params = READ_PATHS[i % len(READ_PATHS)]
+            resp = client.request(method, path, params=params)
+            (counts if resp.status_code == 200 else errors).append(1)
+            i += 1
+
+
+def _throughput(url: str, clients: int, seconds: float) -> dict:
+    stop, counts, errors = threading.Event(), [], []
+    threads = [threading.Thread(target=_client_loop, args=(url, stop, counts, errors))
+               for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {"rps": len(counts) / elapsed, "errors": len(errors)}
+
+
+def _upload(url: str, csv_path: Path) -> int:
+    with open(csv_path, "rb") as f:
+        resp = httpx.post(url + "/upload_csv", files={"file": ("dataset.csv", f, "text/csv")},
+                          timeout=600)
+    resp.raise_for_status()
+    return resp.json()["version"]
+
+
+def _consistent_after_upload(url: str, csv_path: Path, expected_rows: int, probes: int = 64) -> bool:
+    _upload(url, csv_path)
+    with httpx.Client(base_url=url, timeout=60) as client:
+        counts = {client.get("/kpis").json()["sale_count"] for _ in range(probes)}
+    return counts == {expected_rows}
+
+
+def run(dataset_rows: int, worker_counts: list[int], clients: int, seconds: float):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first  = write_sales_csv(tmp / "first.csv", dataset_rows, seed=1)
+        second = write_sales_csv(tmp / "second.csv", dataset_rows // 2, seed=2)
+        for workers in worker_counts:
+            proc, url = _start_server(tmp, workers)
+            try:
+                idle = _memory_mb(proc.pid)
+                _upload(url, first)
+                # Calienta cubo e índices en todos los workers
+                _throughput(url, clients, 1.0)
+                load = _throughput(url, clients, seconds)
+                mem  = _memory_mb(proc.pid)
+                same = _consistent_after_upload(url, second, dataset_rows // 2)
+                results.append({"workers": workers, **load,
+                                "idle_rss_mb": idle["rss_mb"], "idle_pss_mb": idle["pss_mb"],
+                                "rss_mb": mem["rss_mb"], "pss_mb": mem["pss_mb"],
+                                "same_version_after_upload": same})
+            finally:
+                proc.terminate()
+                proc.wait()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset-rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    for row in run(args.dataset_rows, args.workers, args.clients, args.seconds):
+        print(row)
@@ -0,0 +1,397 @@
+# benchmarks/suite.py
+#
+# Suite de rendimiento reproducible: genera un dataset sintético con la
+# forma de Superstore (benchmarks/synthetic.py, misma semilla => mismos
+# datos), lo sube con TestClient y mide cada endpoint de backend/main.py
+# más build_features, predict_from_dataframe y evaluate_model sueltas.
+# Todo corre en el proceso, sin red.
+#
+# Por caso se registra latencia (p50/p95/p99, media), operaciones/s,
+# filas/s cuando corresponde y el pico de memoria de Python (tracemalloc,
+# medido en una corrida aparte para no afectar los tiempos).
+#
+#   # guardar la línea base en la máquina de referencia
+#   python -m benchmarks.suite --rows 100000 --save benchmarks/baseline.json
+#   # comparar: sale con código 1 si algún caso empeora más del umbral
+#   python -m benchmarks.suite --rows 100000 --baseline benchmarks/baseline.json --threshold 0.25
+#
+# --cases filtra por subcadena del nombre (p.ej. --cases kpis grouped).
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+# La caché columnar y la de predicciones van a la carpeta temporal de la
+# corrida: deben fijarse antes de importar el backend.
+_TMP = tempfile.TemporaryDirectory(prefix="bench-suite-")
+os.environ.setdefault("DATASET_CACHE_DIR", str(Path(_TMP.name) / "cache"))
+os.environ.pop("PREDICTION_CACHE_DIR", None)
+
+import pandas as pd                                 # noqa: E402
+from fastapi.testclient import TestClient           # noqa: E402
+
+from backend import evaluation, feature_engineering, main, model_utils   # noqa: E402
+from benchmarks.synthetic import REGIONS, SUBCATEGORIES, make_sales_frame  # noqa: E402
+
+SUITE_VERSION = 2
+
+
+# -------------------------------------------------------------------
+# Casos
+# -------------------------------------------------------------------
+@dataclass
+class Case:
+    """
+    `run(i)` hace una operación (la i-ésima); `setup(i)` prepara la
+    siguiente sin contar en el tiempo. `rows` son las filas que procesa
+    cada operación (para filas/s). Los casos `heavy` repiten menos.
+    """
+    name:  str
+    run:   Callable[[int], object]
+    setup: Callable[[int], object] | None = None
+    rows:  int | None = None
+    heavy: bool = False
+    meta:  dict = field(default_factory=dict)
+
+
+def _ok(resp, status: int = 200):
+    if resp.status_code != status:
+        raise RuntimeError(f"{resp.request.method} {resp.request.url.path}: "
+                           f"{resp.status_code} {resp.text[:200]}")
+    return resp
+
+
+class Workload:
+    """
+    Datos y cliente de una corrida: dataset base, un segundo dataset para
+    alternar subidas, deltas para anexar y lotes para predecir.
+    """
+
+    def __init__(self, rows: int, batch_rows: int, customers: int, products: int,
+                 seed: int, model: str):
+        self.tmp        = Path(_TMP.name)
+        self.rows       = rows
+        self.batch_rows = batch_rows
+        self.model      = model
+        gen = dict(n_customers=customers, n_products=products)
+
+        self.frame = make_sales_frame(rows, seed=seed, **gen)
+        self.csv   = self.tmp / "base.csv"
+        self.frame.to_csv(self.csv, index=False, encoding="latin1")
+        self.alt_csv = self.tmp / "alt.csv"
+        make_sales_frame(rows, seed=seed + 1, **gen).to_csv(self.alt_csv, index=False, encoding="latin1")
+
+        self.batch       = make_sales_frame(batch_rows, seed=seed + 2, **gen)
+        self.batch_csv   = self.batch.to_csv(index=False).encode("latin1")
+        self.records     = self.batch.drop(columns=["Sales"]).to_dict("records")
+        self.delta_rows  = max(1, rows // 100)
+        subcats = sorted(s for subs in SUBCATEGORIES.values() for s in subs)
+        self.fields_items = [
+            {"region":       REGIONS[i % len(REGIONS)],
+             "product_name": f"Product {i % products:05d}",
+             "sub_category": subcats[i % len(subcats)],
+             "order_date":   f"{2015 + i % 6}-{1 + i % 12:02d}-{1 + i % 28:02d}"}
+            for i in range(max(batch_rows, 1000))
+        ]
+        self.fields_csv = pd.DataFrame(self.fields_items).to_csv(index=False).encode("latin1")
+
+        feature_engineering.STATS_PATH = self.tmp / "feature_stats.pkl"
+        main.UPLOAD_CSV_PATH = self.tmp / "stores_sales_forecasting.csv"
+        self.client = TestClient(main.app)
+        self.client.__enter__()
+        self.upload(self.csv)
+        self.wait_ready()
+
+    def wait_ready(self, timeout: float = 120.0):
+        # El precalentamiento corre en segundo plano: se espera a que
+        # termine para que no se mezcle con las mediciones
+        deadline = time.monotonic() + timeout
+        while self.client.get("/readyz").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def upload(self, path: Path, mode: str = "replace"):
+        with open(path, "rb") as f:
+            return _ok(self.client.post("/upload_csv", params={"mode": mode},
+                                        files={"file": (path.name, f, "text/csv")}))
+
+    def close(self):
+        self.client.__exit__(None, None, None)
+
+
+def build_cases(w: Workload) -> list[Case]:
+    c, model = w.client, w.model
+    months   = sorted(w.frame["Order Date"].str.slice(6, 10).str.cat(
+        w.frame["Order Date"].str.slice(0, 2), sep="-").unique())
+    vendors  = sorted(w.frame["Customer Name"].unique())
+    products = sorted(w.frame["Product Name"].unique())
+    pick     = lambda seq, i: seq[(i * 7919) % len(seq)]
+    state    = {}
+
+    def fields(i):
+        return {**w.fields_items[i % len(w.fields_items)], "model": model}
+
+    def cold_metrics(_):
+        main.metrics_store = evaluation.MetricsStore()
+
+    def start_job(_):
+        main.metrics_store = evaluation.MetricsStore()
+        job = _ok(c.get("/metrics_xgb", params={"background": True}), 202).json()
+        # Se espera a que termine: una evaluación en curso falsearía los casos siguientes
+        while job["status"] not in ("done", "error"):
+            time.sleep(0.01)
+            job = _ok(c.get(f"/metrics_xgb/jobs/{job['job_id']}")).json()
+        state["job"] = job["job_id"]
+
+    def fresh_cache(_):
+        main.prediction_cache.invalidate()
+
+    def delta_csv(i):
+        delta = make_sales_frame(w.delta_rows, seed=1000 + i)
+        delta["Row ID"] += w.rows + (i + 1) * w.delta_rows * 10
+        path = w.tmp / "delta.csv"
+        delta.to_csv(path, index=False, encoding="latin1")
+        state["delta"] = path
+
+    cases = [
+        Case("GET /", lambda i: _ok(c.get("/"))),
+        Case("GET /healthz", lambda i: _ok(c.get("/healthz"))),
+        Case("GET /readyz", lambda i: _ok(c.get("/readyz"))),
+        Case("GET /kpis", lambda i: _ok(c.get("/kpis"))),
+        Case("GET /kpis month+vendor", lambda i: _ok(c.get("/kpis", params={
+            "month": pick(months, i), "vendor": pick(vendors, i)}))),
+        Case("GET /kpis product", lambda i: _ok(c.get("/kpis", params={"product": pick(products, i)}))),
+        Case("GET /grouped Region", lambda i: _ok(c.get("/grouped", params={"field": "Region"}))),
+        Case("GET /grouped Product Name month", lambda i: _ok(c.get("/grouped", params={
+            "field": "Product Name", "month": pick(months, i)}))),
+        Case("GET /grouped Customer Name columnar", lambda i: _ok(c.get("/grouped", params={
+            "field": "Customer Name", "output": "columnar"}))),
+        Case("GET /grouped/multi", lambda i: _ok(c.get("/grouped/multi", params={
+            "fields": ["Region", "Category", "Region,Segment"]}))),
+        Case("GET /sales_trend", lambda i: _ok(c.get("/sales_trend", params={"year": 2016}))),
+        Case("GET /sales_trend month+vendor", lambda i: _ok(c.get("/sales_trend", params={
+            "year": 2016, "month": "2016-03", "vendor": pick(vendors, i)}))),
+        Case("GET /metadata/regions", lambda i: _ok(c.get("/metadata/regions"))),
+        Case("GET /metadata/products", lambda i: _ok(c.get("/metadata/products"))),
+        Case("GET /metadata/subcategories", lambda i: _ok(c.get("/metadata/subcategories"))),
+        Case("GET /search/products", lambda i: _ok(c.get("/search/products", params={
+            "q": f"product {i % 10}", "limit": 20}))),
+        Case("GET /search/products sales+totals", lambda i: _ok(c.get("/search/products", params={
+            "q": f"product {i % 10}", "limit": 20, "sort": "sales", "totals": True}))),
+        Case("GET /search/customers offset", lambda i: _ok(c.get("/search/customers", params={
+            "q": "customer", "limit": 50, "offset": (i * 50) % max(1, len(vendors))}))),
+        Case("GET /search/subcategories", lambda i: _ok(c.get("/search/subcategories", params={
+            "q": pick(sorted(s for subs in SUBCATEGORIES.values() for s in subs), i)[:3]}))),
+        Case("POST /predict/by_fields", lambda i: _ok(c.post("/predict/by_fields", params=fields(i))),
+             setup=fresh_cache, rows=1),
+        Case("POST /predict/by_fields cached", lambda i: _ok(c.post("/predict/by_fields",
+                                                                    params=fields(0))), rows=1),
+        Case("POST /predict/by_fields/batch", lambda i: _ok(c.post(
+            "/predict/by_fields/batch", params={"model": model}, json=w.fields_items)),
+            rows=len(w.fields_items)),
+        Case("POST /predict/by_fields/batch_csv", lambda i: _ok(c.post(
+            "/predict/by_fields/batch_csv", params={"model": model},
+            files={"file": ("fields.csv", w.fields_csv, "text/csv")})), rows=len(w.fields_items)),
+        Case("POST /predict", lambda i: _ok(c.post("/predict", json=w.records)),
+             setup=fresh_cache, rows=len(w.records), heavy=True),
+        Case("POST /predict_csv", lambda i: _ok(c.post("/predict_csv", files={
+            "file": ("batch.csv", w.batch_csv, "text/csv")})), rows=w.batch_rows, heavy=True),
+        Case("POST /predict_csv f32", lambda i: _ok(c.post("/predict_csv", params={"output": "f32"}, files={
+            "file": ("batch.csv", w.batch_csv, "text/csv")})), rows=w.batch_rows, heavy=True),
+        Case("POST /predict_csv stream", lambda i: _ok(c.post("/predict_csv", params={
+            "stream": "ndjson", "chunk_rows": max(1, w.batch_rows // 4)}, files={
+            "file": ("batch.csv", w.batch_csv, "text/csv")})), rows=w.batch_rows, heavy=True),
+        Case("GET /metrics_xgb", lambda i: _ok(c.get("/metrics_xgb")),
+             setup=cold_metrics, rows=w.rows, heavy=True),
+        Case("GET /metrics_xgb cached", lambda i: _ok(c.get("/metrics_xgb"))),
+        Case("GET /metrics_xgb/jobs/{job_id}", lambda i: _ok(c.get(f"/metrics_xgb/jobs/{state['job']}")),
+             setup=start_job, heavy=True),
+        Case("GET /ingest/stats", lambda i: _ok(c.get("/ingest/stats"))),
+        Case("GET /models/stats", lambda i: _ok(c.get("/models/stats"))),
+        Case("POST /models/reload", lambda i: _ok(c.post("/models/reload"))),
+        Case("GET /predict/cache/stats", lambda i: _ok(c.get("/predict/cache/stats"))),
+        Case("GET /executor/stats", lambda i: _ok(c.get("/executor/stats"))),
+        Case("GET /metrics", lambda i: _ok(c.get("/metrics"))),
+
+        # Funciones sueltas
+        Case("build_features", lambda i: feature_engineering.build_features(
+            **w.fields_items[i % len(w.fields_items)], model_type=model), rows=1),
+        Case("build_features_batch", lambda i: feature_engineering.build_features_batch(
+            pd.DataFrame(w.fields_items), model_type=model), rows=len(w.fields_items)),
+        Case("predict_from_dataframe", lambda i: model_utils.predict_from_dataframe(w.batch),
+             rows=w.batch_rows, heavy=True),
+        Case("evaluate_model", lambda i: model_utils.evaluate_model(w.batch),
+             rows=w.batch_rows, heavy=True),
+
+        # Subidas al final: cambian el dataset (se restaura después)
+        Case("POST /upload_csv", lambda i: w.upload(w.alt_csv if i % 2 == 0 else w.csv),
+             rows=w.rows, heavy=True),
+        Case("POST /upload_csv append", lambda i: w.upload(state["delta"], "append"),
+             setup=delta_csv, rows=w.delta_rows, heavy=True),
+        Case("POST /upload_csv unchanged", lambda i: w.upload(w.csv), heavy=True),
+    ]
+    return cases
+
+
+# -------------------------------------------------------------------
+# Medición
+# -------------------------------------------------------------------
+def measure(case: Case, iterations: int, warmup: int) -> dict:
+    n = max(3, iterations // 10) if case.heavy else iterations
+    for i in range(warmup):
+        if case.setup:
+            case.setup(i)
+        case.run(i)
+
+    samples = []
+    for i in range(warmup, warmup + n):
+        if case.setup:
+            case.setup(i)
+        t0 = time.perf_counter()
+        case.run(i)
+        samples.append(time.perf_counter() - t0)
+
+    # Pico de memoria en una corrida aparte (tracemalloc hace todo más lento)
+    if case.setup:
+        case.setup(warmup + n)
+    tracemalloc.start()
+    case.run(warmup + n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms    = np.asarray(samples) * 1000
+    total = float(np.sum(samples))
+    return {
+        "iterations": n,
+        "p50_ms":  float(np.percentile(ms, 50)),
+        "p95_ms":  float(np.percentile(ms, 95)),
+        "p99_ms":  float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "ops_s":   n / total if total > 0 else None,
+        "rows_s":  case.rows * n / total if case.rows and total > 0 else None,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run(rows: int, batch_rows: int, customers: int, products: int, seed: int, model: str,
+        iterations: int, warmup: int, only: list[str] | None = None) -> dict:
+    workload = Workload(rows, batch_rows, customers, products, seed, model)
+    try:
+        results = {}
+        for case in build_cases(workload):
+            if only and not any(s.lower() in case.name.lower() for s in only):
+                continue
+            results[case.name] = measure(case, iterations, warmup)
+            _print_case(case.name, results[case.name])
+    finally:
+        workload.close()
+    return {
+        "meta": {
+            "suite_version": SUITE_VERSION,
+            "rows": rows, "batch_rows": batch_rows, "customers": customers,
+            "products": products, "seed": seed, "model": model, "iterations": iterations,
+            "python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": results,
+    }
+
+
+def _print_case(name: str, r: dict):
+    rows = f"  {r['rows_s']:>12,.0f} filas/s" if r["rows_s"] else ""
+    print(f"{name:<40} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms  "
+          f"{r['ops_s']:9.1f} op/s  pico {r['peak_mb']:8.2f} MB{rows}", flush=True)
+
+
+# -------------------------------------------------------------------
+# Comparación con la línea base
+# -------------------------------------------------------------------
+# Parámetros que deben coincidir para que la comparación tenga sentido
+COMPARABLE = ("suite_version", "rows", "batch_rows", "customers", "products", "seed", "model")
+
+
+def compare(current: dict, baseline: dict, threshold: float, memory_threshold: float,
+            min_delta_ms: float = 1.0, min_delta_mb: float = 1.0) -> list[dict]:
+    """
+    Casos que empeoran respecto de la línea base: p50 o p95 más de
+    `threshold` (fracción) y al menos `min_delta_ms`, o pico de memoria más
+    de `memory_threshold` y al menos `min_delta_mb`.
+    """
+    mismatch = {k: (baseline["meta"].get(k), current["meta"].get(k)) for k in COMPARABLE
+                if baseline["meta"].get(k) != current["meta"].get(k)}
+    if mismatch:
+        raise ValueError(f"La línea base se generó con otros parámetros: {mismatch}")
+
+    regressions = []
+    for name, cur in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            b, c = base[metric], cur[metric]
+            if c > b * (1 + threshold) and c - b >= min_delta_ms:
+                regressions.append({"case": name, "metric": metric, "baseline": b, "current": c,
+                                    "change": c / b - 1 if b else None})
+        b, c = base["peak_mb"], cur["peak_mb"]
+        if c > b * (1 + memory_threshold) and c - b >= min_delta_mb:
+            regressions.append({"case": name, "metric": "peak_mb", "baseline": b, "current": c,
+                                "change": c / b - 1 if b else None})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suite de rendimiento con línea base JSON")
+    parser.add_argument("--rows", type=int, default=100_000, help="Filas del dataset subido")
+    parser.add_argument("--batch-rows", type=int, default=10_000, help="Filas de los lotes a predecir")
+    parser.add_argument("--customers", type=int, default=800, help="Clientes distintos")
+    parser.add_argument("--products", type=int, default=1500, help="Productos distintos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="quantity", choices=["profit", "quantity"])
+    parser.add_argument("--iterations", type=int, default=30,
+                        help="Repeticiones por caso (los pesados hacen un décimo, mínimo 3)")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--cases", nargs="*", help="Sólo los casos cuyo nombre contenga alguna")
+    parser.add_argument("--output", type=Path, help="Guardar los resultados en este JSON")
+    parser.add_argument("--save", type=Path, help="Guardar los resultados como línea base")
+    parser.add_argument("--baseline", type=Path, help="Comparar con esta línea base")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Empeoramiento de latencia tolerado (0.25 = 25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="Aumento del pico de memoria tolerado")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Diferencia mínima en ms para contar como regresión")
+    args = parser.parse_args()
+
+    result = run(args.rows, args.batch_rows, args.customers, args.products, args.seed,
+                 args.model, args.iterations, args.warmup, args.cases)
+    for path in (args.output, args.save):
+        if path:
+            path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+            print(f"Resultados guardados en {path}")
+
+    if args.baseline:
+        baseline    = json.loads(args.baseline.read_text())
+        try:
+            regressions = compare(result, baseline, args.threshold, args.memory_threshold,
+                                  args.min_delta_ms)
+        except ValueError as e:
+            sys.exit(str(e))
+        missing = sorted(set(baseline["cases"]) - set(result["cases"]))
+        if missing and not args.cases:
+            print(f"Casos de la línea base que no se midieron: {missing}")
+        for r in regressions:
+            print(f"REGRESIÓN {r['case']}: {r['metric']} {r['baseline']:.2f} -> "
+                  f"{r['current']:.2f} ({r['change'] or 0:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"Sin regresiones respecto de {args.baseline} (umbral {args.threshold:.0%}).")
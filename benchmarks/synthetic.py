@@ -0,0 +1,75 @@
+# benchmarks/synthetic.py
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------
+# Generador determinista de datasets con la forma de Superstore
+# -------------------------------------------------------------------
+REGIONS = ["Central", "East", "South", "West"]
+SUBCATEGORIES = {
+    "Furniture":       ["Bookcases", "Chairs", "Furnishings", "Tables"],
+    "Office Supplies": ["Binders", "Paper", "Storage", "Art"],
+    "Technology":      ["Phones", "Accessories", "Machines", "Copiers"],
+}
+SEGMENTS   = ["Consumer", "Corporate", "Home Office"]
+SHIP_MODES = ["First Class", "Same Day", "Second Class", "Standard Class"]
+
+
+def make_sales_frame(n_rows: int,
+                     n_customers: int = 800,
+                     n_products: int = 1500,
+                     start: str = "2014-01-01",
+                     end: str = "2020-12-31",
+                     seed: int = 0) -> pd.DataFrame:
+    """
+    Devuelve un DataFrame de `n_rows` filas con las columnas del CSV
+    `stores_sales_forecasting.csv`. Misma semilla => mismo dataset.
+    """
+    rng = np.random.default_rng(seed)
+
+    start_ts = pd.Timestamp(start)
+    n_days   = (pd.Timestamp(end) - start_ts).days + 1
+    dates    = start_ts + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit="D")
+
+    subcats  = [(cat, sub) for cat, subs in SUBCATEGORIES.items() for sub in subs]
+    prod_sub = rng.integers(0, len(subcats), n_products)
+    prod_idx = rng.integers(0, n_products, n_rows)
+    cust_idx = rng.integers(0, n_customers, n_rows)
+
+    categories = np.array([subcats[i][0] for i in prod_sub], dtype=object)[prod_idx]
+    sub_cats   = np.array([subcats[i][1] for i in prod_sub], dtype=object)[prod_idx]
+
+    quantity = rng.integers(1, 15, n_rows)
+    discount = rng.choice([0.0, 0.1, 0.2, 0.3, 0.5], n_rows)
+    sales    = np.round(rng.gamma(2.0, 120.0, n_rows), 4)
+    profit   = np.round(sales * rng.normal(0.12, 0.25, n_rows), 4)
+
+    return pd.DataFrame({
+        "Row ID":        np.arange(1, n_rows + 1),
+        "Order ID":      [f"CA-{d.year}-{100000 + i % 900000}" for i, d in enumerate(dates)],
+        "Order Date":    dates.strftime("%m/%d/%Y"),
+        "Ship Mode":     rng.choice(SHIP_MODES, n_rows),
+        "Customer ID":   [f"CU-{c:05d}" for c in cust_idx],
+        "Customer Name": [f"Customer {c:05d}" for c in cust_idx],
+        "Segment":       rng.choice(SEGMENTS, n_rows),
+        "Country":       "United States",
+        "Region":        rng.choice(REGIONS, n_rows),
+        "Postal Code":   rng.integers(10000, 99999, n_rows),
+        "Product ID":    [f"FUR-{p:08d}" for p in prod_idx],
+        "Category":      categories,
+        "Sub-Category":  sub_cats,
+        "Product Name":  [f"Product {p:05d}" for p in prod_idx],
+        "Sales":         sales,
+        "Quantity":      quantity,
+        "Discount":      discount,
+        "Profit":        profit,
+    })
+
+
+def write_sales_csv(path, n_rows: int, **kwargs):
+    """
+    Escribe el dataset sintético en `path` con encoding latin1.
+    """
+    make_sales_frame(n_rows, **kwargs).to_csv(path, index=False, encoding="latin1")
+    return path
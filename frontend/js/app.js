@@ -67,15 +67,15 @@ async function initPredictionByFields() {
 
   // 1) Cargar listas para dropdowns
   try {
-    const [regions, products, subcats] = await Promise.all([
+    // Productos: autocompletado contra /search/products (ver dashboard.js)
+    const [regions, subcats] = await Promise.all([
       fetch('/metadata/regions').then(r => r.ok ? r.json() : Promise.reject(r.status)),
-      fetch('/metadata/products').then(r => r.ok ? r.json() : Promise.reject(r.status)),
       fetch('/metadata/subcategories').then(r => r.ok ? r.json() : Promise.reject(r.status))
     ]);
 
     regionSel.innerHTML      = regions.map(r => `<option value="${r}">${r}</option>`).join('');
-    productNameSel.innerHTML = products.map(p => `<option value="${p}">${p}</option>`).join('');
     subcatSel.innerHTML      = subcats.map(s => `<option value="${s}">${s}</option>`).join('');
+    attachSearch(productNameSel, "products");
   } catch (err) {
     console.error('Error cargando metadatos:', err);
     errorDiv.textContent = 'No se pudo cargar las listas de selección.';
@@ -63,6 +63,26 @@ async function fetchGrouped(field, { month, vendor, product }) {
   }
 }
 
+/**
+ * fetchGroupedMulti(fields, extra): varias agrupaciones en una sola
+ * petición. Devuelve { campo: [filas] } (vacío si falla).
+ */
+async function fetchGroupedMulti(fields, extra = {}) {
+  try {
+    const query = new URLSearchParams();
+    fields.forEach(f => query.append("fields", f));
+    Object.entries(extra).forEach(([k, v]) => { if (v) query.append(k, v); });
+
+    const resp = await fetch(`/grouped/multi?${query.toString()}`);
+    if (!resp.ok) throw new Error("Error al obtener datos agrupados");
+    const json = await resp.json();
+    return json.data;
+  } catch (err) {
+    console.error("fetchGroupedMulti():", err);
+    return {};
+  }
+}
+
 /**
  * drawBarChart(groupedData): dibuja el gráfico de barras
  */
@@ -107,19 +127,15 @@ function drawBarChart(groupedData) {
   });
 }
 
+// Productos que muestra el gráfico de dispersión (los de más ventas)
+const SCATTER_TOP = 300;
+
 /**
  * fetchScatterData(): obtiene datos para el gráfico de dispersión
  */
 async function fetchScatterData() {
-  try {
-    const resp = await fetch(`/grouped?field=${encodeURIComponent("Product Name")}`);
-    if (!resp.ok) throw new Error("Error al obtener datos de productos");
-    const json = await resp.json();
-    return json.data;
-  } catch (err) {
-    console.error("fetchScatterData():", err);
-    return [];
-  }
+  const data = await fetchGroupedMulti(["Product Name"], { top: SCATTER_TOP });
+  return data["Product Name"] || [];
 }
 
 /**
@@ -208,50 +224,79 @@ async function initLineChart(selectedVendor = "Todos", selectedMonth = null) {
 }
 
 /**
- * populateDropdowns(): rellena selects de Cliente y Producto
+ * attachSearch(input, kind): autocompletado de un <input list="..."> contra
+ * /search/{kind}. Pide sólo la página que se muestra (SEARCH_LIMIT valores)
+ * mientras se escribe, en vez de bajar el catálogo entero.
  */
-async function populateDropdowns() {
-  const fields = [
-    { field: "Customer Name", selectId: "vendor-select" },
-    { field: "Product Name",  selectId: "product-select" }
-  ];
-  for (let {field, selectId} of fields) {
+const SEARCH_LIMIT    = 20;
+const SEARCH_DELAY_MS = 150;
+
+function attachSearch(input, kind) {
+  const list = document.getElementById(input.getAttribute("list"));
+  if (!list || input.dataset.search) return;
+  input.dataset.search = kind;
+
+  let timer = null;
+  let lastQuery = null;
+  let controller = null;
+
+  const refresh = async () => {
+    const q = input.value.trim();
+    if (q === lastQuery) return;
+    lastQuery = q;
+    if (controller) controller.abort();
+    controller = new AbortController();
     try {
-      const resp = await fetch(`/grouped?field=${encodeURIComponent(field)}`);
-      if (!resp.ok) throw "";
-      const { data } = await resp.json();
-      const sel = document.getElementById(selectId);
-      sel.innerHTML = `<option value="Todos">Todos</option>`;
-      data.forEach(item => {
-        if (item.group) {
-          const opt = new Option(item.group, item.group);
-          sel.append(opt);
-        }
-      });
-    } catch {}
-  }
+      const query = new URLSearchParams({ q, limit: SEARCH_LIMIT });
+      const resp = await fetch(`/search/${kind}?${query.toString()}`, { signal: controller.signal });
+      if (!resp.ok) throw new Error(`Error ${resp.status}`);
+      const { items } = await resp.json();
+      list.replaceChildren(...items.map(item => new Option(item.value, item.value)));
+    } catch (err) {
+      if (err.name !== "AbortError") console.error(`attachSearch(${kind}):`, err);
+    }
+  };
+
+  input.addEventListener("input", () => {
+    clearTimeout(timer);
+    timer = setTimeout(refresh, SEARCH_DELAY_MS);
+  });
+  input.addEventListener("focus", refresh);
+  refresh();
 }
 
 /**
- * populatePredictionDropdowns(): rellena selects de predicción
+ * setupSearchFilters(): Cliente y Producto se buscan en el servidor
  */
-async function populatePredictionDropdowns() {
-  const specs = [
-    { f:"Region",        id:"pred-region",      ph:"Ej. West" },
-    { f:"Product ID",    id:"pred-product-id",  ph:"Ej. P-1001" },
-    { f:"Category",      id:"pred-category",    ph:"Ej. Technology" },
-    { f:"Sub-Category",  id:"pred-sub-category",ph:"Ej. Phones" },
-    { f:"Product Name",  id:"pred-product-name",ph:"Ej. iPhone 12" }
-  ];
-  for (let s of specs) {
-    try {
-      const resp = await fetch(`/grouped?field=${encodeURIComponent(s.f)}`);
-      if (!resp.ok) throw "";
-      const { data } = await resp.json();
-      const sel = document.getElementById(s.id);
-      sel.innerHTML = `<option value="">${s.ph}</option>`;
-      data.forEach(r => sel.append(new Option(r.group, r.group)));
-    } catch {}
+function setupSearchFilters() {
+  attachSearch(document.getElementById("vendor-select"),  "customers");
+  attachSearch(document.getElementById("product-select"), "products");
+}
+
+// Campos de los selects de predicción
+const PREDICTION_SPECS = [
+  { f:"Region",        id:"pred-region",      ph:"Ej. West" },
+  { f:"Product ID",    id:"pred-product-id",  ph:"Ej. P-1001" },
+  { f:"Category",      id:"pred-category",    ph:"Ej. Technology" },
+  { f:"Sub-Category",  id:"pred-sub-category",ph:"Ej. Phones" },
+  { f:"Product Name",  id:"pred-product-name",ph:"Ej. iPhone 12", search:"products" }
+];
+
+/**
+ * populatePredictionDropdowns(grouped): rellena selects de predicción
+ */
+function populatePredictionDropdowns(grouped) {
+  for (let s of PREDICTION_SPECS) {
+    if (s.search) {
+      const input = document.getElementById(s.id);
+      if (input && input.list) attachSearch(input, s.search);
+      continue;
+    }
+    const data = grouped[s.f];
+    if (!data) continue;
+    const sel = document.getElementById(s.id);
+    sel.innerHTML = `<option value="">${s.ph}</option>`;
+    data.forEach(r => sel.append(new Option(r.group, r.group)));
   }
 }
 
@@ -291,8 +336,12 @@ async function submitPrediction() {
 // initDashboard(): arranca todo
 // ------------------------------
 async function initDashboard() {
-  await populateDropdowns();
-  await populatePredictionDropdowns();
+  // Los selects chicos salen de una sola consulta agrupada; los catálogos
+  // grandes (clientes, productos) se buscan a medida que se escribe
+  const selectFields = [...new Set(PREDICTION_SPECS.filter(s => !s.search).map(s => s.f))];
+  const grouped = await fetchGroupedMulti(selectFields, { skip_missing: "true" });
+  setupSearchFilters();
+  populatePredictionDropdowns(grouped);
 
   const initial = { month: null, vendor: "Todos", product: "Todos" };
   updateKpisDisplay(await fetchKpis(initial));
@@ -308,7 +357,7 @@ async function initDashboard() {
   const groupEl = document.getElementById("group-by");
 
   const onChange = async () => {
-    const f = { month: monthEl.value||null, vendor: vendorEl.value, product: prodEl.value };
+    const f = { month: monthEl.value||null, vendor: vendorEl.value.trim()||"Todos", product: prodEl.value.trim()||"Todos" };
     updateKpisDisplay(await fetchKpis(f));
     await initLineChart(f.vendor, f.month);
     drawBarChart(await fetchGrouped(groupEl.value, f));
@@ -10,6 +10,7 @@ document.addEventListener('DOMContentLoaded', () => {
   const uploadBtn = document.getElementById('uploadBtn');
   const statusP = document.getElementById('uploadStatus');
   const actions = document.getElementById('actions');
+  const appendMode = document.getElementById('appendMode');
 
   // Cuando el usuario seleccione un archivo, habilitamos el botón
   fileInput.addEventListener('change', () => {
@@ -28,7 +29,9 @@ document.addEventListener('DOMContentLoaded', () => {
     uploadBtn.disabled = true;
 
     try {
-      const res = await fetch('/upload_csv', {
+      // append: sólo se agregan las filas nuevas (por Row ID / Order ID)
+      const mode = appendMode && appendMode.checked ? 'append' : 'replace';
+      const res = await fetch(`/upload_csv?mode=${mode}`, {
         method: 'POST',
         body: formData,
       });
@@ -8,11 +8,13 @@ setup(
         "fastapi",
         "uvicorn[standard]",
         "pandas",
-        "scikit-learn",
         "joblib",
         "xgboost",
         "python-multipart",
     ],
+    # Sólo para entrenar (notebook). Si está instalado, xgboost lo importa
+    # al cargar los modelos y alarga el arranque de la API.
+    extras_require={"train": ["scikit-learn"]},
     description="API de optimización de inventario para PYMES",
     author="Federico/Paulino",
     python_requires='>=3.7',